@@ -1,10 +1,18 @@
 # analytics_dashboard.py
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from datetime import datetime
+import plotly.graph_objects as go
+from datetime import datetime, timedelta
 import pytz
-from database_manager import get_db_connection # Removed sqlite3
+from database_manager import get_pool # Pooled MySQL connections
+from data_cache import cached_read
+from progress_stats import (EPOCH, MAX_POINTS, RESOLUTIONS, SERIES_COLUMNS, WEBGL_POINTS, apply_check_ins, downsample,
+                            lead_in, resolution_for, series, summary)
+from write_behind import get_write_behind
+
+# Visible range -> days back from today (None = everything)
+RANGES = {"30 days": 30, "90 days": 90, "1 year": 365, "All time": None}
+TREND_TITLES = {"Day": "Daily", "Week": "Weekly", "Month": "Monthly"}
 
 def show_analytics():
     st.title("📈 Overall Wellness Progress")
@@ -14,59 +22,79 @@ def show_analytics():
         return
 
     username = st.session_state.username
-    conn = get_db_connection() # Using centralized MySQL connection
-    
-    if conn is None:
-        st.error("Could not connect to the database.")
-        return
-    
+    today = datetime.now(pytz.timezone('Asia/Kolkata')).date()
+
+    c1, c2 = st.columns(2)
+    range_label = c1.radio("Range", list(RANGES), index=1, horizontal=True)
+    res_choice = c2.radio("Resolution", ("Auto",) + RESOLUTIONS, horizontal=True)
+    days = RANGES[range_label]
+    start = today - timedelta(days=days - 1) if days else EPOCH
+
+    def load(fn, *args):
+        # Borrowed from the shared pool only on a cache miss
+        def loader():
+            with get_pool().connection() as conn:
+                return fn(conn, username, *args)
+        return loader
+
     try:
-        # --- MYSQL COMPATIBLE QUERY ---
-        # Logic preserved: Picks the highest ID for each date to remove the vertical line bug
-        comp_query = """
-            SELECT date, water, diet, workout, sleep, total_score 
-            FROM compliance_data 
-            WHERE username = %s 
-            AND id IN (SELECT MAX(id) FROM compliance_data GROUP BY date)
-            ORDER BY date ASC
-        """
-        
-        # In MySQL, we use %s instead of ? for placeholders
-        df_comp = pd.read_sql_query(comp_query, conn, params=(username,))
-        
+        # Aggregates come from SQL; reused across reruns until the next check-in bumps this user's data version
+        stats = cached_read(username, f"progress_summary:{start}", load(summary, start))
+        first = stats['first'] or today
+        resolution = res_choice if res_choice != "Auto" else resolution_for((today - max(start, first)).days + 1)
+        df_comp = cached_read(username, f"progress_series:{start}:{resolution}", load(series, resolution, start))
+        loaded = True
     except Exception as e:
         st.error(f"Error loading dashboard data: {e}")
-        df_comp = pd.DataFrame()
-    finally:
-        conn.close() # Always close the MySQL connection
+        stats = {'count': 0, 'score': None, 'water': None, 'diet': None, 'workout': None, 'sleep': None}
+        resolution, df_comp, loaded = "Day", pd.DataFrame(columns=SERIES_COLUMNS), False
+
+    # Check-ins still in the write-behind queue replace their day's score, and the rolling means are redone
+    queue = get_write_behind()
+    queued = queue.pending(username, "check_in") if queue else []
+    queued = {pd.Timestamp(q[1]): float(q[6]) for q in queued if pd.Timestamp(q[1]).date() >= start}
+    if queued and loaded and resolution == "Day":
+        try:
+            lead = cached_read(username, f"progress_lead_in:{start}", load(lead_in, start))
+            df_comp = apply_check_ins(df_comp, queued, lead)
+        except Exception as e:
+            st.error(f"Error loading dashboard data: {e}")
 
     if df_comp.empty:
         st.warning("Please complete your 'Daily Check-In' to see your progress graph!")
     else:
-        # Standardize columns for Plotly
-        df_comp.columns = ['Date', 'Water', 'Diet', 'Workout', 'Sleep', 'Total Score']
-        df_comp['Date'] = pd.to_datetime(df_comp['Date']).dt.date
-
         st.divider()
-        st.subheader("🎯 Daily Wellness Score Trend")
-        
-        # Plotting the clean trend line
-        fig_overall = px.line(
-            df_comp, 
-            x='Date', 
-            y='Total Score', 
-            markers=True, 
-            line_shape='linear', 
-            color_discrete_sequence=['#4CAF50']
-        )
-        
+        st.subheader(f"🎯 {TREND_TITLES[resolution]} Wellness Score Trend")
+
+        # WebGL once the series is large; never more than MAX_POINTS per trace
+        large = len(df_comp) > WEBGL_POINTS
+        shown = downsample(df_comp, MAX_POINTS)
+        trace = go.Scattergl if large else go.Scatter
+        fig_overall = go.Figure()
+        fig_overall.add_trace(trace(x=shown['Date'], y=shown['Score'], name="Score",
+                                    mode='lines' if large else 'lines+markers', line=dict(color='#4CAF50')))
+        if resolution == "Day":
+            for col, color in (("7-day mean", '#2196F3'), ("30-day mean", '#FF9800')):
+                fig_overall.add_trace(trace(x=shown['Date'], y=shown[col], name=col, mode='lines',
+                                            line=dict(color=color, width=1.5)))
+
         # Y-axis fixed from 0 to 100
         fig_overall.update_yaxes(range=[0, 105], title="Wellness Score (1-100)")
-        fig_overall.update_xaxes(type='category', title="Check-In Dates")
+        fig_overall.update_xaxes(type='date', title="Check-In Dates")
+        fig_overall.update_layout(legend=dict(orientation='h'), margin=dict(t=30))
         
         st.plotly_chart(fig_overall, use_container_width=True)
+        if len(shown) < len(df_comp):
+            st.caption(f"Showing {len(shown):,} of {len(df_comp):,} points.")
+        if queued:
+            st.caption(f"{len(queued)} check-in(s) still saving; the range averages below update once they land.")
 
         st.divider()
         # Calculate performance for your Osmania University project report
-        avg_score = round(df_comp['Total Score'].mean(), 1)
-        st.metric("Total Average Performance", f"{avg_score}%")
\ No newline at end of file
+        st.metric("Average Performance (selected range)", f"{round(stats['score'] or 0, 1)}%")
+        # Components are stored as 100 (met) / 0, so their averages are the share of days each goal was met
+        m1, m2, m3, m4 = st.columns(4)
+        for col, label, key in ((m1, "💧 Water", 'water'), (m2, "🥗 Diet", 'diet'),
+                                (m3, "🏋 Workout", 'workout'), (m4, "😴 Sleep", 'sleep')):
+            col.metric(label, f"{round(stats[key] or 0)}%")
+        st.caption(f"{stats['count']:,} check-in(s) in this range.")
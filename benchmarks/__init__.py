@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+# Offline harnesses run against a LOCAL database, e.g. `python -m benchmarks.query_plans`.
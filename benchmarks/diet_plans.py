@@ -0,0 +1,42 @@
+# benchmarks/diet_plans.py
+"""
+Diet plan throughput: plans per second for a batch of synthetic profiles,
+cold (every distinct key solved) and warm (served from the memo).
+
+    python -m benchmarks.diet_plans --profiles 50000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from diet_planner import MACRO_SPLIT, MEAL_TEMPLATES, DietPlanner, daily_target
+from food_catalog import load_catalog
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    goals, diets = list(MACRO_SPLIT), list(MEAL_TEMPLATES)
+    cals = rng.normal(2300, 350, args.profiles).clip(1200, 4000).astype(int)
+    keys = [(daily_target(int(cal), goals[g]), goals[g], diets[d])
+            for cal, g, d in zip(cals, rng.integers(0, 3, args.profiles), rng.integers(0, 3, args.profiles))]
+
+    planner = DietPlanner(load_catalog(), cache_size=None)
+    for label in ("cold", "warm"):
+        t0 = time.perf_counter()
+        planner.plan_each(keys)
+        elapsed = time.perf_counter() - t0
+        print(f"{label}: {len(keys):,} plans in {elapsed:.2f}s = {len(keys) / elapsed:,.0f} plans/s "
+              f"({planner.solves:,} distinct solves)")
+
+    errors = np.array([abs(p["totals"][0] - p["target"]) / p["target"] for p in planner.plan_each(keys[:1000])])
+    print(f"calorie error vs target: mean {errors.mean():.1%}, max {errors.max():.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/food_search.py
+"""
+Food search index at catalog scale.
+
+Generates a synthetic catalog (the built-in foods plus random multi-word
+names with aliases), then reports index build time, memory allocated by the
+index and query latency for prefix, alias and misspelt queries.
+
+    python -m benchmarks.food_search --foods 100000 --queries 2000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.forest_inference import rss_mb
+
+WORDS = ("chicken", "paneer", "rice", "brown", "masala", "dal", "tikka", "roasted", "spicy", "sweet", "green",
+         "salad", "curry", "soup", "oats", "banana", "almond", "butter", "grilled", "fried", "egg", "wheat",
+         "millet", "ragi", "moong", "chana", "aloo", "gobi", "palak", "tofu", "soy", "mango", "lassi", "kheer")
+
+
+def synthetic_names(count, seed=0):
+    """Built-in names first, then unique 2-4 word names with an occasional parenthetical alias."""
+    from database import FOOD_DB
+
+    rng = np.random.default_rng(seed)
+    names, seen = list(FOOD_DB), set(FOOD_DB)
+    while len(names) < count:
+        words = rng.choice(WORDS, rng.integers(2, 5))
+        name = " ".join(w.capitalize() for w in words) + f" {rng.integers(1, 10_000)}"
+        if rng.random() < 0.2:
+            name += f" ({rng.choice(WORDS).capitalize()} style)"
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def typo(word, rng):
+    """Drop, double or swap one character."""
+    i = int(rng.integers(1, len(word) - 1))
+    kind = rng.integers(3)
+    if kind == 0:
+        return word[:i] + word[i + 1:]
+    if kind == 1:
+        return word[:i] + word[i] + word[i:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def timed(index, queries, k):
+    lat = []
+    for q in queries:
+        t0 = time.perf_counter()
+        index.search(q, k)
+        lat.append(time.perf_counter() - t0)
+    lat = np.array(lat) * 1e3
+    return f"p50 {np.percentile(lat, 50):.3f} ms  p95 {np.percentile(lat, 95):.3f} ms  max {lat.max():.3f} ms"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--foods", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("-k", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    from food_search import FoodSearchIndex
+
+    names = synthetic_names(args.foods)
+    aliases = [[] for _ in names]
+    base = rss_mb()
+    t0 = time.perf_counter()
+    index = FoodSearchIndex(names, aliases)
+    build_s = time.perf_counter() - t0
+    rss = rss_mb() - base
+    # Second, traced build for allocation numbers (tracemalloc slows the build down)
+    tracemalloc.start()
+    traced = FoodSearchIndex(names, aliases)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del traced
+    print(f"{len(names):,} foods, {len(index._keys):,} prefix keys, {len(index._postings):,} trigram postings")
+    print(f"build {build_s:.2f}s  index memory {current / 2**20:.1f} MB "
+          f"(peak during build {peak / 2**20:.1f} MB, RSS +{rss:.1f} MB)")
+
+    rng = np.random.default_rng(1)
+    picks = [names[i] for i in rng.integers(0, len(names), args.queries)]
+    suites = {
+        "prefix (3 chars)": [p[:3] for p in picks],
+        "prefix (full word)": [p.split()[0] for p in picks],
+        "multi-word prefix": [" ".join(p.split()[:2])[:-2] for p in picks],
+        "typo": [typo(p.split()[0].lower(), rng) for p in picks],
+    }
+    for label, queries in suites.items():
+        print(f"{label:>20}: {timed(index, queries, args.k)}")
+
+    hits = index.search("chapati", 1)
+    print(f"'chapati' -> {hits[0][0] if hits else None}")
+
+
+if __name__ == "__main__":
+    main()
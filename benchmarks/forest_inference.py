@@ -0,0 +1,108 @@
+# benchmarks/forest_inference.py
+"""
+Pickled RandomForestRegressor vs. the compact memory-mapped export.
+
+Trains (or reuses) a model, exports it, checks the two agree, then reports
+load time, resident memory after load and per-prediction latency for each.
+Every loader runs in a fresh subprocess so RSS numbers don't bleed together.
+
+    python -m benchmarks.forest_inference --rows 5000 --predictions 2000
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+def rss_mb():
+    """Current resident set size (Linux /proc; falls back to peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _measure(kind, path, predictions):
+    """Runs inside the child process: load one artifact and time it."""
+    from sklearn.ensemble import RandomForestRegressor  # noqa: F401 -- import cost isn't load cost
+    from tree_ensemble import load_forest
+    base = rss_mb()
+    t0 = time.perf_counter()
+    if kind == "pickle":
+        with open(path, "rb") as f:
+            model = pickle.load(f)
+    else:
+        model = load_forest(path)
+    load_s = time.perf_counter() - t0
+    loaded = rss_mb()
+
+    rng = np.random.default_rng(0)
+    rows = np.column_stack([rng.uniform(15, 90, predictions), rng.uniform(30, 200, predictions),
+                            rng.uniform(120, 220, predictions), rng.integers(0, 2, predictions),
+                            rng.integers(1, 6, predictions)])
+    t0 = time.perf_counter()
+    for row in rows:
+        model.predict([row])
+    single_us = (time.perf_counter() - t0) / predictions * 1e6
+    t0 = time.perf_counter()
+    model.predict(rows)
+    batch_us = (time.perf_counter() - t0) / predictions * 1e6
+    return {"loader": kind, "load_ms": round(load_s * 1e3, 2),
+            "rss_after_load_mb": round(loaded - base, 1), "rss_after_predict_mb": round(rss_mb() - base, 1),
+            "single_row_us": round(single_us, 1), "batch_per_row_us": round(batch_us, 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="training rows")
+    parser.add_argument("--predictions", type=int, default=2000)
+    parser.add_argument("--child", nargs=2, metavar=("KIND", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_measure(args.child[0], args.child[1], args.predictions)))
+        return
+
+    from sklearn.ensemble import RandomForestRegressor
+    from tree_ensemble import export_forest, load_forest, max_abs_error
+
+    rng = np.random.default_rng(42)
+    X = np.column_stack([rng.integers(15, 80, args.rows), rng.integers(40, 150, args.rows),
+                         rng.integers(140, 200, args.rows), rng.integers(0, 2, args.rows),
+                         rng.integers(1, 6, args.rows)])
+    y = 10 * X[:, 1] + 6.25 * X[:, 2] - 5 * X[:, 0] + 5 * X[:, 3] + 250 * X[:, 4]
+    model = RandomForestRegressor(n_estimators=100, random_state=42).fit(X, y)
+
+    workdir = tempfile.mkdtemp(prefix="forest_bench_")
+    pkl, forest = os.path.join(workdir, "model.pkl"), os.path.join(workdir, "model.forest")
+    with open(pkl, "wb") as f:
+        pickle.dump(model, f)
+    meta = export_forest(model, forest)
+    check = rng.uniform([15, 30, 120, 0, 1], [90, 200, 220, 1.999, 5.999], size=(20_000, 5)).astype(int)
+    err = max_abs_error(model, load_forest(forest), check)
+    print(f"nodes={meta['n_nodes']:,} max_depth={meta['max_depth']} max|sklearn-compact|={err:.3g}")
+    print(f"on disk: pickle {os.path.getsize(pkl) / 2**20:.1f} MB, compact "
+          f"{sum(os.path.getsize(os.path.join(forest, n)) for n in os.listdir(forest)) / 2**20:.1f} MB")
+
+    for kind, path in (("pickle", pkl), ("compact", forest)):
+        out = subprocess.run([sys.executable, "-m", "benchmarks.forest_inference", "--predictions",
+                              str(args.predictions), "--child", kind, path],
+                             capture_output=True, text=True, check=True)
+        print(out.stdout.strip())
+    if err > 1e-3:
+        sys.exit(f"compact predictions drift from sklearn by {err}")
+
+
+if __name__ == "__main__":
+    main()
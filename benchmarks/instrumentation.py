@@ -0,0 +1,49 @@
+# benchmarks/instrumentation.py
+"""
+Per-statement cost of the query instrumentation.
+
+Runs the same indexed point query on an in-memory SQLite database (any
+DB-API driver goes through the same wrapper) through a raw connection and
+through InstrumentedConnection, and reports the added time per execute. With
+METRICS off the pool hands out raw connections, so the first number is also
+the disabled cost.
+
+    python -m benchmarks.instrumentation --queries 200000
+"""
+import argparse
+import sqlite3
+import time
+
+from instrumentation import QUERY_SECONDS, InstrumentedConnection, Metrics
+
+
+def run(conn, queries):
+    c = conn.cursor()
+    t0 = time.perf_counter()
+    for i in range(queries):
+        c.execute("SELECT v FROM t WHERE k = ?", (i % 1000,))
+        c.fetchone()
+    return (time.perf_counter() - t0) / queries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    raw = sqlite3.connect(":memory:")
+    raw.execute("CREATE TABLE t (k INTEGER PRIMARY KEY, v TEXT)")
+    raw.executemany("INSERT INTO t VALUES (?, ?)", ((i, f"row {i}") for i in range(1000)))
+    metrics = Metrics()
+    wrapped = InstrumentedConnection(raw, metrics)
+
+    base = min(run(raw, args.queries) for _ in range(3))
+    timed = min(run(wrapped, args.queries) for _ in range(3))
+    print(f"raw connection (METRICS off): {base * 1e6:7.2f} µs/query")
+    print(f"instrumented:                 {timed * 1e6:7.2f} µs/query  (+{(timed - base) * 1e6:.2f} µs)")
+    row = metrics.rows(QUERY_SECONDS)[0]
+    print(f"recorded {row['count']:,} calls of {row['label']!r}, p99 {row['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# benchmarks/load_generator.py
+"""
+Concurrent-session load generator for app.py.
+
+Every virtual user is a real AppTest session of app.py against the local
+MySQL database: it logs in through the Login form, then loops over a
+weighted navigation mix (log a food, tap a water button, submit a check-in,
+open the Progress Dashboard or the Daily Summary) with exponential think
+time, until --duration runs out. Each session is its own process: AppTest
+keeps process-global runtime state, so two sessions sharing a process fail
+each other's reruns.
+
+    python -m benchmarks.load_generator --sessions 1 2 4 8 16 32 --duration 60
+
+Each --sessions value is one stage, started with fresh processes. For each
+stage it reports throughput (actions/s), p50/p95/p99 per action, errors,
+database connections opened (the server's Connections counter, read over
+one monitoring connection so polling doesn't count) and peak
+Threads_connected, pool checkout timeouts, and peak RSS per session. The knee is the stage where p95 climbs and throughput stops
+growing. Users come from the same seed as benchmarks.tabs (user000000,
+user000001, ... with password "bench").
+"""
+import argparse
+import json
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import mysql.connector
+import numpy as np
+import pytz
+
+from migrations import migrate
+from benchmarks.local_db import add_db_arguments, connect_pool
+from benchmarks.tabs import APP, _user, git_commit, seed
+
+# action -> share of a session's steps after login
+MIX = {"log food": 0.30, "add water": 0.30, "check in": 0.10, "view dashboard": 0.20, "daily summary": 0.10}
+PAGES = {"log food": "Food Calculator", "add water": "Water Tracker", "check in": "Daily Check-In",
+         "view dashboard": "Progress Dashboard", "daily summary": "Daily Summary"}
+
+
+def _click(at, label):
+    next(b for b in at.button if b.label == label).click()
+
+
+def _check_in(at, rng):
+    # The four Yes/No radios of the check-in form (at.main leaves out the sidebar's navigation radio)
+    for radio in at.main.radio:
+        radio.set_value(rng.choice(("Yes", "No")))
+    _click(at, "Submit & Update Progress")
+
+
+def _timed(samples, action, fn):
+    """Append (action, seconds, error message or None)."""
+    t0 = time.perf_counter()
+    try:
+        fn()
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    samples.append((action, time.perf_counter() - t0, error))
+
+
+def _session(username, db, deadline, think, seed_value, timeout):
+    """One virtual user: login, then the navigation mix until `deadline`. Returns [(action, seconds, error)]."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed_value)
+    samples = []
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    at.secrets.update({"DB_HOST": db["host"], "DB_PORT": db["port"], "DB_USER": db["user"],
+                       "DB_PASS": db["password"], "DB_NAME": db["database"], "WRITE_BEHIND": False})
+
+    def run(step=None):
+        if step:
+            step()
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    def login():
+        run()
+        at.sidebar.radio[0].set_value("Login / Sign Up")
+        run()
+        at.text_input(key="l_u").set_value(username)
+        at.text_input(key="l_p").set_value("bench")
+        run(lambda: _click(at, "Login"))
+        if not at.session_state.logged_in:
+            raise RuntimeError(f"login failed for {username}")
+
+    def visit(page, *steps):
+        def go():
+            at.sidebar.radio[0].set_value(page)
+            run()
+            for step in steps:
+                run(step)
+        return go
+
+    actions = {
+        "log food": visit(PAGES["log food"], lambda: _click(at, "➕ Add to Daily History")),
+        "add water": visit(PAGES["add water"], lambda: _click(at, rng.choice(("+ 150ml", "+ 200ml", "+ 500ml")))),
+        "check in": visit(PAGES["check in"], lambda: _check_in(at, rng)),
+        "view dashboard": visit(PAGES["view dashboard"]),
+        "daily summary": visit(PAGES["daily summary"]),
+    }
+    names, weights = list(MIX), list(MIX.values())
+
+    _timed(samples, "login", login)
+    if samples[-1][2]:
+        return samples
+    while time.time() < deadline:
+        time.sleep(rng.expovariate(1 / think) if think else 0)
+        action = rng.choices(names, weights)[0]
+        _timed(samples, action, actions[action])
+    return samples
+
+
+def worker(username, db, duration, think, seed_value, timeout):
+    """One session's process. Returns its samples plus the process's pool counters and peak RSS."""
+    samples = _session(username, db, time.time() + duration, think, seed_value, timeout)
+    errors = [e for _, _, e in samples if e]
+    try:
+        from database_manager import get_pool
+        pool = get_pool().stats()  # the session's pool (cache_resource, per process)
+    except Exception:
+        pool = {}
+    return {"samples": [(a, sec, e is None) for a, sec, e in samples], "first_error": errors[0] if errors else None,
+            "pool": pool,
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+
+
+def _server_status(cursor, name):
+    cursor.execute("SHOW GLOBAL STATUS LIKE %s", (name,))
+    return int(cursor.fetchone()[1])
+
+
+def stage(sessions, args, db):
+    users = [_user(i) for i in range(sessions)]
+    monitor = mysql.connector.connect(host=db["host"], port=db["port"], user=db["user"], password=db["password"])
+    c = monitor.cursor(buffered=True)
+    connections_before = _server_status(c, "Connections")
+    peak_threads, stop = [0], threading.Event()
+
+    def watch():
+        while not stop.wait(0.5):
+            peak_threads[0] = max(peak_threads[0], _server_status(c, "Threads_connected"))
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(sessions) as ex:
+        results = list(ex.map(worker, users, [db] * sessions, [args.duration] * sessions,
+                              [args.think_ms / 1000] * sessions, [args.seed + i for i in range(sessions)],
+                              [args.timeout] * sessions))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    watcher.join()
+    connections_opened = _server_status(c, "Connections") - connections_before
+    monitor.close()
+
+    samples = [s for r in results for s in r["samples"]]
+    by_action = {}
+    for action in ("login", *MIX):
+        lat = np.array([sec for a, sec, ok in samples if a == action and ok]) * 1e3
+        errors = sum(1 for a, _, ok in samples if a == action and not ok)
+        if len(lat) or errors:
+            by_action[action] = {
+                "count": int(len(lat)), "errors": errors,
+                **({f"p{q}_ms": round(float(np.percentile(lat, q)), 1) for q in (50, 95, 99)} if len(lat) else {}),
+            }
+    done = sum(1 for a, _, ok in samples if ok and a != "login")
+    return {
+        "sessions": sessions,
+        "elapsed_s": round(elapsed, 1),
+        "throughput_per_s": round(done / args.duration, 2),
+        "actions": by_action,
+        "db_connections_opened": connections_opened,
+        "db_peak_threads_connected": peak_threads[0],
+        "pool_timeouts": sum(r["pool"].get("timeouts", 0) for r in results),
+        "pool_created": sum(r["pool"].get("created", 0) for r in results),
+        "peak_rss_mb_per_session": [r["peak_rss_mb"] for r in results],
+        "first_error": next((r["first_error"] for r in results if r["first_error"]), None),
+    }
+
+
+def report(row):
+    print(f"\n{row['sessions']} session(s): {row['throughput_per_s']} actions/s, "
+          f"{row['db_connections_opened']} connections opened (peak {row['db_peak_threads_connected']} connected), "
+          f"{row['pool_timeouts']} pool timeouts, peak RSS {max(row['peak_rss_mb_per_session'])} MB/session")
+    for action, s in row["actions"].items():
+        if "p50_ms" in s:
+            print(f"  {action:<15} n={s['count']:<6} p50 {s['p50_ms']:8.1f}  p95 {s['p95_ms']:8.1f}  "
+                  f"p99 {s['p99_ms']:8.1f} ms  errors {s['errors']}")
+        else:
+            print(f"  {action:<15} all {s['errors']} failed")
+    if row["first_error"]:
+        print(f"  first error: {row['first_error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_db_arguments(parser)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16], help="concurrent sessions per stage")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per stage")
+    parser.add_argument("--think-ms", type=float, default=500, help="mean think time between actions")
+    parser.add_argument("--timeout", type=float, default=60, help="AppTest timeout per rerun, seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-seed", action="store_true")
+    # Seed volumes (same generator as benchmarks.tabs)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--food-rows", type=int, default=200_000)
+    parser.add_argument("--compliance-rows", type=int, default=200_000)
+    parser.add_argument("--water-rows", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--meals-per-day", type=int, default=4)
+    parser.add_argument("--output", help="write all stages as JSON here")
+    args = parser.parse_args(argv)
+    if max(args.sessions) > args.users:
+        parser.error("--users must be at least the largest --sessions value")
+
+    db = dict(host=args.host, port=args.port, user=args.user, password=args.password, database=args.database)
+    pool = connect_pool(args, size=1)
+    with pool.connection() as conn:
+        migrate(conn, log=lambda msg: None)
+        if not args.skip_seed:
+            today = datetime.now(pytz.timezone('Asia/Kolkata')).date()
+            seed(conn, args, today, random.Random(args.seed), log=lambda msg: print(msg, file=sys.stderr))
+    pool.dispose()
+
+    stages = []
+    for sessions in args.sessions:
+        row = stage(sessions, args, db)
+        report(row)
+        stages.append(row)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"commit": git_commit(), "timestamp": datetime.now().isoformat(timespec="seconds"),
+                       "params": {k: getattr(args, k) for k in ("duration", "think_ms")},
+                       "stages": stages}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
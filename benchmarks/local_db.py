@@ -0,0 +1,48 @@
+# benchmarks/local_db.py
+"""Connection helpers shared by the harnesses: they never touch the cloud database in secrets."""
+import os
+
+import mysql.connector
+
+from database_manager import ConnectionPool
+
+
+def add_db_arguments(parser):
+    """Local MySQL settings; defaults come from WELLNESS_BENCH_DB_* environment variables."""
+    env = os.environ.get
+    parser.add_argument("--host", default=env("WELLNESS_BENCH_DB_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(env("WELLNESS_BENCH_DB_PORT", 3306)))
+    parser.add_argument("--user", default=env("WELLNESS_BENCH_DB_USER", "root"))
+    parser.add_argument("--password", default=env("WELLNESS_BENCH_DB_PASS", ""))
+    parser.add_argument("--database", default=env("WELLNESS_BENCH_DB_NAME", "wellness_bench"))
+
+
+def connect_pool(args, size=4):
+    """Pool onto the local database, creating the schema database first if needed."""
+    server = mysql.connector.connect(host=args.host, port=args.port, user=args.user, password=args.password)
+    server.cursor().execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+    server.close()
+    settings = dict(host=args.host, port=args.port, user=args.user,
+                    password=args.password, database=args.database)
+    return ConnectionPool(lambda: mysql.connector.connect(**settings), size=size)
+
+
+def table_rows(conn, table):
+    c = conn.cursor(buffered=True)
+    c.execute(f"SELECT COUNT(*) FROM {table}")
+    return c.fetchone()[0]
+
+
+def insert_batches(conn, sql, rows, batch=10_000):
+    """executemany in fixed-size batches (mysql.connector rewrites each into one multi-row INSERT)."""
+    c = conn.cursor()
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= batch:
+            c.executemany(sql, chunk)
+            conn.commit()
+            chunk.clear()
+    if chunk:
+        c.executemany(sql, chunk)
+        conn.commit()
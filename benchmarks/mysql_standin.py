@@ -0,0 +1,309 @@
+# benchmarks/mysql_standin.py
+"""
+A MySQL-protocol stand-in backed by SQLite, for running the harnesses where
+no MySQL server is available.
+
+    python -m benchmarks.mysql_standin --port 3307 --path /tmp/wellness_bench.sqlite &
+    WELLNESS_BENCH_DB_PORT=3307 python -m benchmarks.tabs --users 1000 ...
+
+mysql-mimic (pip install mysql-mimic; not in requirements.txt) speaks the
+wire protocol, so mysql.connector, ConnectionPool and the harnesses run
+unchanged. Every client connection gets its own SQLite connection onto one
+WAL-mode file, and each statement is rewritten from the MySQL dialect the
+app uses (ON DUPLICATE KEY UPDATE, INSERT IGNORE, RANGE ... INTERVAL window
+frames, DATE_SUB/WEEKDAY/DAYOFMONTH, multi-table DELETE, inline KEY
+definitions, information_schema probes, GET_LOCK) into SQLite's.
+
+What it measures is SQLite behind a MySQL client: use the numbers to compare
+commits or modes run against the same stand-in, never as MySQL numbers.
+Writers serialize on the whole database rather than on rows. EXPLAIN
+answers with SQLite's EXPLAIN QUERY PLAN in MySQL's table/type/key columns:
+it shows whether a query can use an index, not what MySQL's optimizer picks.
+"""
+import argparse
+import asyncio
+import logging
+import re
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from mysql_mimic import MysqlServer, ResultColumn
+from mysql_mimic import connection as mimic_connection
+from mysql_mimic import server as mimic_server
+from mysql_mimic.errors import SQLSTATES, ErrorCode, MysqlError
+from mysql_mimic.session import BaseSession
+from mysql_mimic.variables import GlobalVariables, SessionVariables
+from mysql_mimic.types import ColumnType, ServerStatus
+
+# mysql.connector picks the exception class from the SQLSTATE
+DUP_ENTRY, LOCK_WAIT_TIMEOUT = 1062, 1205
+SQLSTATES.update({DUP_ENTRY: b"23000", LOCK_WAIT_TIMEOUT: b"HY000"})
+
+# Quoted literals as mysql.connector interpolates them: backslash escapes, never ''
+LITERAL = re.compile(r"'((?:[^'\\]|\\.)*)'")
+ESCAPES = {"0": "\0", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a", "b": "\b"}
+MARK = re.compile(r"\x01(\d+)\x01")
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}$")
+ISO_DATETIME = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d+)?$")
+
+# (pattern, replacement) over the statement with its literals masked, in order
+REWRITES = [
+    (r"\bINSERT\s+IGNORE\b", "INSERT OR IGNORE"),
+    (r"\bORDER BY ([\w.]+)(\s+ASC)?\s+RANGE BETWEEN INTERVAL (\d+) DAY PRECEDING",
+     r"ORDER BY julianday(\1) RANGE BETWEEN \3 PRECEDING"),
+    (r"\bWEEKDAY\(([\w.]+)\)", r"((CAST(strftime('%w', \1) AS INTEGER) + 6) % 7)"),
+    (r"\bDAYOFMONTH\(([\w.]+)\)", r"CAST(strftime('%d', \1) AS INTEGER)"),
+    (r"\bDATE_SUB\(([\w.]+), INTERVAL (.+?) DAY\)", r"date(\1, '-' || (\2) || ' days')"),
+    (r"\bDATE_ADD\(([\w.]+), INTERVAL (.+?) DAY\)", r"date(\1, '+' || (\2) || ' days')"),
+    (r"\bNOW\(\)\s*-\s*INTERVAL (\w+) DAY", r"datetime('now', 'localtime', '-' || \1 || ' days')"),
+    (r"\bNOW\(\)", "datetime('now', 'localtime')"),
+    (r"\binformation_schema\.COLUMNS\s+WHERE TABLE_SCHEMA = DATABASE\(\) AND TABLE_NAME = (\S+) "
+     r"AND COLUMN_NAME = (\S+)", r"pragma_table_info(\1) WHERE name = \2"),
+    (r"\binformation_schema\.STATISTICS\s+WHERE TABLE_SCHEMA = DATABASE\(\) AND TABLE_NAME = (\S+) "
+     r"AND INDEX_NAME = (\S+)", r"pragma_index_list(\1) WHERE name = \2"),
+    (r"^ALTER TABLE (\w+) CHANGE COLUMN (\w+) (\w+) .*$", r"ALTER TABLE \1 RENAME COLUMN \2 TO \3"),
+    (r"^DROP INDEX (\w+) ON \w+$", r"DROP INDEX \1"),
+    (r"^DELETE (\w+) FROM (\w+) (?:AS )?\1\b(.*)$", r"DELETE FROM \2 WHERE rowid IN (SELECT \1.rowid FROM \2 \1\3)"),
+]
+REWRITES = [(re.compile(pattern, re.IGNORECASE | re.DOTALL), repl) for pattern, repl in REWRITES]
+INLINE_KEY = re.compile(r",\s*KEY (\w+) \(([^)]*)\)", re.IGNORECASE)
+PLAN_STEP = re.compile(r"(SEARCH|SCAN) (\w+)(?: AS \w+)?(?: USING (COVERING )?(?:INDEX (\w+)|(INTEGER PRIMARY KEY)))?")
+EXPLAIN_COLUMNS = ["id", "select_type", "table", "type", "key", "rows", "Extra"]
+
+# What mysql.connector asks for with SELECT @@...; anything else reads as ''
+VARIABLES = {"sql_mode": "STRICT_TRANS_TABLES,NO_ENGINE_SUBSTITUTION", "autocommit": 0}
+
+# Server-wide counters behind SHOW GLOBAL STATUS
+STATUS = {"Connections": 0, "Threads_connected": 0}
+_status_lock = threading.Lock()
+
+
+def _unescape(match):
+    return re.sub(r"\\(.)", lambda m: ESCAPES.get(m.group(1), m.group(1)), match.group(1))
+
+
+def _quote(text):
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _create_table(sql):
+    """MySQL CREATE TABLE -> SQLite CREATE TABLE plus a CREATE INDEX per inline KEY."""
+    table = re.match(r"CREATE TABLE (?:IF NOT EXISTS )?(\w+)", sql, re.IGNORECASE).group(1)
+    indexes = [f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"
+               for name, columns in INLINE_KEY.findall(sql)]
+    sql = INLINE_KEY.sub("", sql)
+    sql = re.sub(r"\bINT AUTO_INCREMENT PRIMARY KEY", "INTEGER PRIMARY KEY AUTOINCREMENT", sql, flags=re.IGNORECASE)
+    sql = re.sub(r"\bUNIQUE KEY \w+ \(", "UNIQUE (", sql, flags=re.IGNORECASE)
+    return [sql, *indexes]
+
+
+def _upsert(sql):
+    """ON DUPLICATE KEY UPDATE ... VALUES(col) -> ON CONFLICT DO UPDATE SET ... excluded.col."""
+    head, tail = re.split(r"\bON DUPLICATE KEY UPDATE\b", sql, flags=re.IGNORECASE)
+    if re.search(r"\bSELECT\b", head, re.IGNORECASE) and not re.search(r"\bWHERE\b", head, re.IGNORECASE):
+        head += " WHERE true"  # SQLite's parser needs it between INSERT ... SELECT and ON CONFLICT
+    tail = re.sub(r"\bVALUES\((\w+)\)", r"excluded.\1", tail, flags=re.IGNORECASE)
+    return f"{head} ON CONFLICT DO UPDATE SET {tail}"
+
+
+def translate(sql):
+    """
+    The SQLite statements for one MySQL statement, or a (rows, columns)
+    result for the ones answered here. Literals are masked while rewriting so
+    a food called "VALUES(x)" stays a food.
+    """
+    literals = []
+
+    def mask(match):
+        literals.append(_unescape(match))
+        return f"\x01{len(literals) - 1}\x01"
+
+    code = LITERAL.sub(mask, sql).strip().rstrip(";")
+    upper = code.upper()
+
+    if upper.startswith(("SET ", "USE ", "CREATE DATABASE")):
+        return []
+    if upper.startswith("SHOW GLOBAL STATUS LIKE"):
+        name = literals[int(MARK.search(code).group(1))]
+        return [(name, STATUS[name])] if name in STATUS else [], ["Variable_name", "Value"]
+    if upper.startswith("SELECT @@"):
+        names = re.findall(r"@@[\w.]+", code)
+        return [tuple(VARIABLES.get(name.split(".")[-1], "") for name in names)], names
+    if re.match(r"SELECT (GET|RELEASE)_LOCK\(", upper):
+        return [(1,)], [code[7:]]
+
+    statements = _create_table(code) if upper.startswith("CREATE TABLE") else [code]
+    out = []
+    for statement in statements:
+        for pattern, repl in REWRITES:
+            statement = pattern.sub(repl, statement)
+        if re.search(r"\bON DUPLICATE KEY UPDATE\b", statement, re.IGNORECASE):
+            statement = _upsert(statement)
+        out.append(MARK.sub(lambda m: _quote(literals[int(m.group(1))]), statement))
+    return out
+
+
+def _value(value):
+    """SQLite's text dates back to the date/datetime objects MySQL would return."""
+    if isinstance(value, str) and len(value) <= 26:
+        if ISO_DATE.match(value):
+            return date.fromisoformat(value)
+        if ISO_DATETIME.match(value):
+            return datetime.fromisoformat(value)
+    return value
+
+
+def _columns(names, rows):
+    """One MySQL type per column from every row, so a float after an int doesn't get truncated."""
+    columns = []
+    for i, name in enumerate(names):
+        kinds = {type(row[i]) for row in rows if row[i] is not None}
+        if float in kinds:
+            kind = ColumnType.DOUBLE
+        elif kinds == {int}:
+            kind = ColumnType.LONGLONG
+        elif kinds == {date}:
+            kind = ColumnType.DATE
+        elif kinds and kinds <= {date, datetime}:
+            kind = ColumnType.DATETIME
+        elif kinds == {bytes}:
+            kind = ColumnType.BLOB
+        else:
+            kind = ColumnType.STRING
+        columns.append(ResultColumn(name=name, type=kind))
+    return columns
+
+
+class SQLiteSession(BaseSession):
+    """One client connection: a SQLite connection and the thread that runs its statements."""
+
+    def __init__(self, path, busy_timeout):
+        super().__init__()
+        self.variables = SessionVariables(GlobalVariables())  # the handshake reads the charset from here
+        self.username = self.database = None
+        self.db = sqlite3.connect(path, timeout=busy_timeout, isolation_level="IMMEDIATE",
+                                  check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.executor = ThreadPoolExecutor(1)
+        self.connection = None
+        self.affected_rows = self.last_insert_id = 0
+
+    async def init(self, connection):
+        self.connection = connection
+        with _status_lock:
+            STATUS["Connections"] += 1
+            STATUS["Threads_connected"] += 1
+
+    async def close(self):
+        with _status_lock:
+            STATUS["Threads_connected"] -= 1
+        self.executor.submit(self.db.close)
+        self.executor.shutdown(wait=False)
+
+    async def handle_query(self, sql, attrs):
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self._run, sql)
+        finally:
+            if self.db.in_transaction:
+                self.connection.status_flags |= ServerStatus.SERVER_STATUS_IN_TRANS
+            else:
+                self.connection.status_flags &= ~ServerStatus.SERVER_STATUS_IN_TRANS
+
+    def _run(self, sql):
+        self.affected_rows = self.last_insert_id = 0
+        upper = sql.strip().upper()
+        if upper in ("START TRANSACTION", "BEGIN"):
+            if not self.db.in_transaction:
+                self.db.execute("BEGIN IMMEDIATE")
+            return None
+        if upper == "COMMIT":
+            self.db.commit()
+            return None
+        if upper == "ROLLBACK":
+            self.db.rollback()
+            return None
+
+        if upper.startswith("EXPLAIN "):
+            return self._explain(sql.strip()[8:])
+        if upper.startswith("ANALYZE TABLE"):
+            table = sql.split()[2]
+            self.db.execute(f"ANALYZE {table}")
+            return [(table, "analyze", "status", "OK")], ["Table", "Op", "Msg_type", "Msg_text"]
+
+        translated = translate(sql)
+        if isinstance(translated, tuple):
+            return translated
+        result = None
+        try:
+            for statement in translated:
+                c = self.db.execute(statement)
+                if c.description:
+                    rows = [tuple(_value(v) for v in row) for row in c.fetchall()]
+                    names = [d[0] for d in c.description]
+                    result = rows, _columns(names, rows)
+                else:
+                    self.affected_rows = max(c.rowcount, 0)
+                    self.last_insert_id = c.lastrowid or 0
+        except sqlite3.IntegrityError as e:
+            raise MysqlError(str(e), DUP_ENTRY) from e
+        except sqlite3.OperationalError as e:
+            if "locked" in str(e) or "busy" in str(e):
+                raise MysqlError(f"Lock wait timeout exceeded ({e})", LOCK_WAIT_TIMEOUT) from e
+            raise MysqlError(f"{e}\n{translated}", ErrorCode.PARSE_ERROR) from e
+        return result
+
+
+    def _explain(self, sql):
+        """
+        EXPLAIN QUERY PLAN as MySQL's EXPLAIN rows: SEARCH through an index is
+        'ref', SCAN of a covering index is 'index', any other SCAN of a base
+        table is 'ALL' with no key; subqueries show up as '<derived ...>'.
+        """
+        tables = {name for (name,) in self.db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        rows = []
+        for step_id, _, _, detail in self.db.execute("EXPLAIN QUERY PLAN " + translate(sql)[-1]).fetchall():
+            match = PLAN_STEP.match(detail)
+            if not match:
+                rows.append((step_id, "SIMPLE", None, None, None, None, detail))
+                continue
+            op, table, covering, index, rowid = match.groups()
+            if table not in tables:
+                rows.append((step_id, "DERIVED", f"<derived {table}>", "ALL", None, None, detail))
+            elif op == "SEARCH":
+                rows.append((step_id, "SIMPLE", table, "ref", index or "PRIMARY", None, detail))
+            else:
+                rows.append((step_id, "SIMPLE", table, "index" if covering else "ALL",
+                             index or ("PRIMARY" if rowid else None), None, detail))
+        return rows, EXPLAIN_COLUMNS
+
+
+class StandinConnection(mimic_connection.Connection):
+    """Reports the last statement's affected rows and insert id in the OK packet, as MySQL does."""
+
+    def ok(self, **kwargs):
+        if not kwargs:
+            kwargs = {"affected_rows": self.session.affected_rows, "last_insert_id": self.session.last_insert_id}
+        return super().ok(**kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3307)
+    parser.add_argument("--path", default="wellness_bench.sqlite", help="SQLite database file")
+    parser.add_argument("--busy-timeout", type=float, default=10,
+                        help="seconds a writer waits for the database lock before a 1205 error")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    mimic_server.Connection = StandinConnection
+    server = MysqlServer(session_factory=lambda: SQLiteSession(args.path, args.busy_timeout))
+    print(f"SQLite stand-in for MySQL on {args.host}:{args.port}, database {args.path}", flush=True)
+    asyncio.run(server.serve_forever(host=args.host, port=args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# benchmarks/query_plans.py
+"""
+Query-plan regression check.
+
+Seeds a local MySQL database with millions of rows, then runs EXPLAIN on the
+per-user queries the tabs actually issue and fails (exit code 1) if any of
+them falls back to a full table or full index scan.
+
+    python -m benchmarks.query_plans --food-rows 2000000 --compliance-rows 1000000
+
+On benchmarks.mysql_standin the plans are SQLite's (see there): a pass
+means the indexes can serve the queries, not that MySQL will choose them.
+"""
+import argparse
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+from daily_summary_tab import FOOD_LOG_DAY_QUERY
+from migrations import migrate
+from progress_stats import BUCKET_QUERY, BUCKETS, DAILY_QUERY, SUMMARY_QUERY
+from benchmarks.local_db import add_db_arguments, connect_pool, insert_batches, table_rows
+
+FOODS = ["Rice", "Egg", "Oats", "Milk", "Banana", "Paneer", "Dal (Lentils)", "Chicken Breast"]
+START = date(2023, 1, 1)
+DAYS = 3 * 365
+
+
+def _user(i):
+    return f"user{i:06d}"
+
+
+def seed(conn, users, food_rows, compliance_rows, rng):
+    """Top the tables up to the requested sizes (existing rows are kept)."""
+    missing = food_rows - table_rows(conn, "food_logs")
+    if missing > 0:
+        print(f"Seeding {missing:,} food_logs rows ...")
+        insert_batches(conn, """INSERT INTO food_logs (username, food, qty, protein, carbs, fat, fiber, calories, date)
+                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                       ((_user(rng.randrange(users)), rng.choice(FOODS), "100Grams", 10.0, 20.0, 5.0, 2.0, 165,
+                         datetime.combine(START, datetime.min.time()) + timedelta(minutes=rng.randrange(DAYS * 1440)))
+                        for _ in range(missing)))
+
+    missing = compliance_rows - table_rows(conn, "compliance_data")
+    if missing > 0:
+        print(f"Seeding {missing:,} compliance_data rows ...")
+        insert_batches(conn, """INSERT IGNORE INTO compliance_data (username, date, water, diet, workout, sleep, total_score)
+                                VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                       ((_user(rng.randrange(users)), START + timedelta(days=rng.randrange(DAYS)),
+                         100, 0, 100, 0, 50.0)
+                        for _ in range(missing)))
+
+    c = conn.cursor(buffered=True)
+    for table in ("food_logs", "compliance_data", "water_history"):
+        c.execute(f"ANALYZE TABLE {table}")
+        c.fetchall()
+
+
+def explain(conn, sql, params):
+    c = conn.cursor(dictionary=True, buffered=True)
+    c.execute("EXPLAIN " + sql, params)
+    return c.fetchall()
+
+
+def full_scans(plan):
+    """Plan rows that read a base table without a usable index ('<derived2>' etc. are skipped)."""
+    return [row for row in plan
+            if row["table"] and not row["table"].startswith("<")
+            and (row["type"] in ("ALL", "index") or row["key"] is None)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_db_arguments(parser)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--food-rows", type=int, default=2_000_000)
+    parser.add_argument("--compliance-rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    pool = connect_pool(args, size=1)
+    with pool.connection() as conn:
+        migrate(conn)
+        seed(conn, args.users, args.food_rows, args.compliance_rows, rng)
+
+        user = _user(rng.randrange(args.users))
+        day = START + timedelta(days=rng.randrange(DAYS))
+        checks = [
+            ("daily summary food log", FOOD_LOG_DAY_QUERY, (user, day, day + timedelta(days=1))),
+            ("progress dashboard summary", SUMMARY_QUERY, (user, START)),
+            ("progress dashboard daily", DAILY_QUERY, (user, day - timedelta(days=29), day)),
+            ("progress dashboard weekly", BUCKET_QUERY.format(bucket=BUCKETS["Week"]), (user, START)),
+            ("progress dashboard monthly", BUCKET_QUERY.format(bucket=BUCKETS["Month"]), (user, START)),
+            ("check-in today's score",
+             "SELECT total_score FROM compliance_data WHERE username = %s AND date = %s",
+             (user, day)),
+            ("water tracker today", "SELECT consumed FROM water_history WHERE username = %s AND date = %s",
+             (user, day)),
+        ]
+
+        failed = False
+        for name, sql, params in checks:
+            plan = explain(conn, sql, params)
+            bad = full_scans(plan)
+            status = "FULL SCAN" if bad else "ok"
+            print(f"{status:9} {name}")
+            for row in plan:
+                print(f"          {str(row['table']):<16} type={str(row['type']):<7} key={row['key']} rows={row['rows']}")
+            failed = failed or bool(bad)
+    pool.dispose()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/startup.py
+"""
+Startup budget for app.py.
+
+Each run is a fresh interpreter started with `-X importtime`. It renders the
+app once through Streamlit's AppTest (the logged-out Home page, which is
+what every new session sees first) and reports:
+- time to first render, median over --runs
+- the slowest top-level imports
+- any heavy module that got imported anyway
+
+Exits 1 if the median render exceeds --budget-ms or a --forbid module was
+loaded, so a page module creeping back into app.py's imports fails the check.
+
+    python -m benchmarks.startup --runs 5 --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("pandas", "plotly", "scipy", "sklearn", "mysql.connector", "pyarrow")
+
+CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+at.secrets["METRICS"] = False
+t0 = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - t0
+print(json.dumps({"render_ms": elapsed * 1e3, "modules": sorted(sys.modules),
+                  "exception": [str(e.value) for e in at.exception]}))
+"""
+
+
+def cold_run():
+    """(result dict, [(cumulative us, self us, module)] for top-level imports) from one fresh interpreter."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        own, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if not line.split("|")[2].startswith("  "):  # nested imports are indented
+            imports.append((int(cumulative), int(own), name))
+    return json.loads(proc.stdout.strip().splitlines()[-1]), imports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="cold interpreters to start")
+    parser.add_argument("--budget-ms", type=float, default=1500, help="max median time to first render")
+    parser.add_argument("--forbid", nargs="*", default=list(HEAVY), help="modules Home must not import")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args(argv)
+
+    renders, result, imports = [], None, []
+    for _ in range(args.runs):
+        result, imports = cold_run()
+        renders.append(result["render_ms"])
+    median = statistics.median(renders)
+
+    print(f"time to first render: median {median:.0f} ms  (min {min(renders):.0f}, max {max(renders):.0f}, "
+          f"{args.runs} cold runs)")
+    print("slowest top-level imports (last run, cumulative):")
+    for cumulative, own, name in sorted(imports, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1e3:8.1f} ms  {name}")
+
+    loaded = [m for m in args.forbid if m in result["modules"]]
+    failed = False
+    if result["exception"]:
+        print(f"FAIL app raised: {result['exception']}")
+        failed = True
+    if loaded:
+        print(f"FAIL imported on Home: {', '.join(loaded)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL median render {median:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print(f"ok: within {args.budget_ms:.0f} ms, none of {', '.join(args.forbid)} imported")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# benchmarks/tabs.py
+"""
+Per-tab benchmark against a seeded local MySQL database.
+
+Seeds the schema (migrations.py) with synthetic users, food logs, check-ins
+and water history, then drives the real app.py through Streamlit's AppTest
+as a logged-in user with years of history: every tab is opened once (cold:
+lazy imports and first queries) and rerun --runs times. Statement and
+show_* timings come from the instrumentation layer (METRICS is switched on),
+and the data cache is disabled unless --data-cache is given, so every rerun
+exercises the tab's full data path.
+
+    python -m benchmarks.tabs --users 100000 --food-rows 50000000 --days 1825 \\
+        --output bench/tabs-$(git rev-parse --short HEAD).json
+    python -m benchmarks.tabs --skip-seed --compare bench/tabs-abc1234.json
+
+Seeding only tops tables up, so later runs against the same database start
+in seconds. Results are JSON (one object per run) so runs from different
+commits can be diffed with --compare. Without a MySQL server, point
+WELLNESS_BENCH_DB_PORT at benchmarks.mysql_standin; its numbers are SQLite's
+and only compare with other stand-in runs.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytz
+
+from migrations import migrate
+from nutrition_rollup import rebuild
+from user_profile import UserProfile
+from benchmarks.local_db import add_db_arguments, connect_pool, insert_batches, table_rows
+
+# AppTest resolves relative paths against the calling file, not the working directory
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+TABS = {
+    "show_daily_summary": "Daily Summary",
+    "show_analytics": "Progress Dashboard",
+    "show_water_tracker": "Water Tracker",
+    "show_check_in": "Daily Check-In",
+    "show_workout_recommendation": "Workout Recommendation",
+    "show_diet_plan": "Diet Plan",
+}
+BENCH_USER = "bench_heavy_user"
+BENCH_PROFILE = ("Bench User", 31, 78.0, 178.0, "Male", 3, "Combined", "Lose Weight", 2600)
+FOODS = [("Rice", "100Grams", 2.7, 28.0, 0.3, 0.4, 130), ("Egg", "100Grams", 13.0, 1.1, 11.0, 0.0, 155),
+         ("Oats", "100Grams", 17.0, 66.0, 7.0, 10.6, 389), ("Milk", "250ml", 8.0, 12.0, 8.2, 0.0, 155),
+         ("Banana", "100Grams", 1.1, 23.0, 0.3, 2.6, 89), ("Paneer", "100Grams", 18.0, 1.2, 20.0, 0.0, 265)]
+GOALS = ("Lose Weight", "Maintain Weight", "Gain Weight")
+DIETS = ("Pure Veg", "Non-Veg", "Combined")
+
+
+def _user(i):
+    return f"user{i:06d}"
+
+
+def _check_in(rng):
+    parts = [rng.choice((0, 100)) for _ in range(4)]
+    return (*parts, sum(parts) / 4.0)
+
+
+def seed(conn, args, today, rng, log=print):
+    """Top every table up to the requested volume; the bench user gets a row (or a few) for every day."""
+    start = today - timedelta(days=args.days - 1)
+    minutes = args.days * 1440
+
+    missing = args.users - table_rows(conn, "profiles")
+    if missing > 0:
+        log(f"Seeding {missing:,} users ...")
+        first = args.users - missing
+        insert_batches(conn, "INSERT IGNORE INTO accounts (username, password) VALUES (%s, %s)",
+                       ((_user(i), "bench") for i in range(first, args.users)))
+        insert_batches(conn, """INSERT IGNORE INTO profiles
+                                    (username, name, age, weight, height, gender, act_val, diet, goal, cal,
+                                     workout_level, workout_goal, workout_days, workout_vars)
+                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                       ((_user(i), "User", rng.randint(18, 70), rng.uniform(50, 110), rng.uniform(150, 195),
+                         rng.choice(("Male", "Female")), rng.randint(1, 5), rng.choice(DIETS), rng.choice(GOALS),
+                         rng.randint(1600, 3400), "Intermediate", "Fat Loss", 4, 4)
+                        for i in range(first, args.users)))
+
+    missing = args.food_rows - table_rows(conn, "food_logs")
+    if missing > 0:
+        log(f"Seeding {missing:,} food_logs rows ...")
+        midnight = datetime.combine(start, datetime.min.time())
+        insert_batches(conn, """INSERT INTO food_logs (username, food, qty, protein, carbs, fat, fiber, calories, date)
+                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                       ((_user(rng.randrange(args.users)), *rng.choice(FOODS),
+                         midnight + timedelta(minutes=rng.randrange(minutes)))
+                        for _ in range(missing)))
+
+    for table, rows, make in (
+            ("compliance_data", args.compliance_rows,
+             lambda: (_user(rng.randrange(args.users)), start + timedelta(days=rng.randrange(args.days)),
+                      *_check_in(rng))),
+            ("water_history", args.water_rows,
+             lambda: (_user(rng.randrange(args.users)), start + timedelta(days=rng.randrange(args.days)),
+                      rng.randrange(500, 4000, 250)))):
+        missing = rows - table_rows(conn, table)
+        if missing > 0:
+            log(f"Seeding {missing:,} {table} rows ...")
+            columns = ("username, date, water, diet, workout, sleep, total_score" if table == "compliance_data"
+                       else "username, date, consumed")
+            marks = ", ".join(["%s"] * len(columns.split(",")))
+            insert_batches(conn, f"INSERT IGNORE INTO {table} ({columns}) VALUES ({marks})",
+                           (make() for _ in range(missing)))
+
+    # The heavy user: a profile, a check-in and water for every day, and a few meals a day
+    c = conn.cursor(buffered=True)
+    c.execute("SELECT COUNT(*) FROM food_logs WHERE username = %s", (BENCH_USER,))
+    if c.fetchone()[0] == 0:
+        log(f"Seeding {args.days:,} days of history for {BENCH_USER} ...")
+        c.execute("INSERT IGNORE INTO accounts (username, password) VALUES (%s, 'bench')", (BENCH_USER,))
+        c.execute("""INSERT IGNORE INTO profiles (username, name, age, weight, height, gender, act_val, diet, goal, cal,
+                                                  workout_level, workout_goal, workout_days, workout_vars)
+                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 'Advanced', 'Muscle Build', 5, 5)""",
+                  (BENCH_USER, *BENCH_PROFILE))
+        conn.commit()
+        days = [start + timedelta(days=d) for d in range(args.days)]
+        insert_batches(conn, """INSERT IGNORE INTO compliance_data (username, date, water, diet, workout, sleep, total_score)
+                                VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                       ((BENCH_USER, day, *_check_in(rng)) for day in days))
+        insert_batches(conn, "INSERT IGNORE INTO water_history (username, date, consumed) VALUES (%s, %s, %s)",
+                       ((BENCH_USER, day, rng.randrange(500, 4000, 250)) for day in days))
+        insert_batches(conn, """INSERT INTO food_logs (username, food, qty, protein, carbs, fat, fiber, calories, date)
+                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                       ((BENCH_USER, *rng.choice(FOODS),
+                         datetime.combine(day, datetime.min.time()) + timedelta(minutes=rng.randrange(300, 1380)))
+                        for day in days for _ in range(args.meals_per_day)))
+        rebuild(conn, BENCH_USER, log=lambda msg: None)
+
+    for table in ("food_logs", "compliance_data", "water_history", "daily_nutrition_totals", "profiles"):
+        c.execute(f"ANALYZE TABLE {table}")
+        c.fetchall()
+
+
+def bench_app(args):
+    """An AppTest of app.py, logged in as the bench user, wired to the local database."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP, default_timeout=args.timeout)
+    at.secrets.update({
+        "DB_HOST": args.host, "DB_PORT": args.port, "DB_USER": args.user, "DB_PASS": args.password,
+        "DB_NAME": args.database, "METRICS": True, "WRITE_BEHIND": False,
+        "DATA_CACHE_MB": 64 if args.data_cache else 0,
+    })
+    at.session_state.logged_in = True
+    at.session_state.username = BENCH_USER
+    at.session_state.user = UserProfile(BENCH_USER, *BENCH_PROFILE)
+    at.run()
+    return at
+
+
+def time_tab(at, function, page, runs):
+    """Wall time of the first visit and of `runs` reruns, plus the statements the reruns issued."""
+    from instrumentation import QUERY_SECONDS, RENDER_SECONDS, get_metrics
+
+    at.sidebar.radio[0].set_value(page)
+    t0 = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - t0
+    if at.exception:
+        return {"page": page, "error": [str(e.value) for e in at.exception]}
+
+    metrics = get_metrics()  # created by the first run (METRICS is on in the AppTest secrets)
+    metrics.reset()
+    walls = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        at.run()
+        walls.append(time.perf_counter() - t0)
+    walls = np.array(walls) * 1e3
+    render = next((r for r in metrics.rows(RENDER_SECONDS) if r["label"] == function), None)
+    statements = metrics.rows(QUERY_SECONDS)
+    return {
+        "page": page,
+        "cold_ms": round(cold * 1e3, 2),
+        "p50_ms": round(float(np.percentile(walls, 50)), 2),
+        "p95_ms": round(float(np.percentile(walls, 95)), 2),
+        "render_p50_ms": render["p50_ms"] if render else None,
+        "queries_per_rerun": round(sum(s["count"] for s in statements) / runs, 2),
+        "db_ms_per_rerun": round(sum(s["total_s"] for s in statements) / runs * 1e3, 2),
+        "statements": statements,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline):
+    print(f"\nvs {baseline.get('commit') or 'baseline'} ({baseline['timestamp']}):", file=sys.stderr)
+    for function, now in current["tabs"].items():
+        then = baseline["tabs"].get(function)
+        if not then or "p50_ms" not in then or "p50_ms" not in now:
+            continue
+        delta = (now["p50_ms"] - then["p50_ms"]) / max(then["p50_ms"], 1e-9) * 100
+        print(f"  {function:<28} p50 {then['p50_ms']:9.2f} -> {now['p50_ms']:9.2f} ms ({delta:+.1f}%)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_db_arguments(parser)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--food-rows", type=int, default=1_000_000)
+    parser.add_argument("--compliance-rows", type=int, default=1_000_000)
+    parser.add_argument("--water-rows", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=3 * 365, help="history span, and the bench user's days")
+    parser.add_argument("--meals-per-day", type=int, default=6, help="bench user's food logs per day")
+    parser.add_argument("--runs", type=int, default=20, help="reruns per tab after the first visit")
+    parser.add_argument("--tabs", nargs="*", default=list(TABS), choices=list(TABS))
+    parser.add_argument("--data-cache", action="store_true", help="keep the per-user data cache on")
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--timeout", type=float, default=120, help="AppTest timeout per run, seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON result here (default: stdout)")
+    parser.add_argument("--compare", help="earlier JSON result to diff against")
+    args = parser.parse_args(argv)
+
+    today = datetime.now(pytz.timezone('Asia/Kolkata')).date()
+    pool = connect_pool(args, size=1)
+    with pool.connection() as conn:
+        migrate(conn, log=lambda msg: None)
+        if not args.skip_seed:
+            seed(conn, args, today, random.Random(args.seed), log=lambda msg: print(msg, file=sys.stderr))
+        volumes = {table: table_rows(conn, table) for table in
+                   ("profiles", "food_logs", "compliance_data", "water_history", "daily_nutrition_totals")}
+    pool.dispose()
+
+    at = bench_app(args)
+    result = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "params": {"runs": args.runs, "data_cache": args.data_cache, "days": args.days,
+                   "meals_per_day": args.meals_per_day},
+        "volumes": volumes,
+        "tabs": {},
+    }
+    for function in args.tabs:
+        result["tabs"][function] = row = time_tab(at, function, TABS[function], args.runs)
+        summary = (f"cold {row['cold_ms']:9.1f} ms  p50 {row['p50_ms']:8.1f} ms  p95 {row['p95_ms']:8.1f} ms  "
+                   f"{row['queries_per_rerun']:5.1f} queries, {row['db_ms_per_rerun']:7.1f} ms in the database"
+                   if "error" not in row else f"FAILED {row['error']}")
+        print(f"{function:<28} {summary}", file=sys.stderr)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+    sys.exit(1 if any("error" in row for row in result["tabs"].values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
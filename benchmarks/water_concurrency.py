@@ -0,0 +1,115 @@
+# benchmarks/water_concurrency.py
+"""
+Concurrency check for water logging against a local MySQL database.
+
+Fires thousands of increments from many threads at a handful of users and
+then compares each stored total with the exact sum that was sent. Runs the
+atomic upsert directly, through the coalescer, and (with --legacy) the old
+read-modify-write path to show the lost updates it used to cause. Exits 1 if
+an atomic mode loses or duplicates a single millilitre.
+
+    python -m benchmarks.water_concurrency --increments 5000 --threads 32
+"""
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from migrations import migrate
+from water_log import WaterCoalescer, add_water, add_water_many, read_water
+from benchmarks.local_db import add_db_arguments, connect_pool
+
+DAY = date(2030, 1, 1)
+
+
+def _reset(pool, users):
+    with pool.connection() as conn:
+        c = conn.cursor()
+        c.executemany("DELETE FROM water_history WHERE username = %s AND date = %s", [(u, DAY) for u in users])
+        conn.commit()
+
+
+def _totals(pool, users):
+    with pool.connection() as conn:
+        c = conn.cursor(buffered=True)
+        return {u: read_water(c, u, DAY) for u in users}
+
+
+def run(mode, pool, jobs, threads, window):
+    users = sorted({u for u, _ in jobs})
+    _reset(pool, users)
+    expected = Counter()
+    for user, amount in jobs:
+        expected[user] += amount
+
+    def write(increments):
+        with pool.connection() as conn:
+            add_water_many(conn.cursor(), increments)
+            conn.commit()
+
+    coalescer = WaterCoalescer(write, window)
+
+    def one(job):
+        user, amount = job
+        if mode == "coalesced":
+            coalescer.add(user, DAY, amount)
+            return
+        with pool.connection() as conn:
+            c = conn.cursor(buffered=True)
+            if mode == "atomic":
+                add_water(c, user, DAY, amount)
+            else:  # legacy: read, add in Python, write the absolute value back
+                c.execute("INSERT IGNORE INTO water_history (username, date, consumed) VALUES (%s, %s, 0)",
+                          (user, DAY))
+                current = read_water(c, user, DAY)
+                c.execute("UPDATE water_history SET consumed = %s WHERE username = %s AND date = %s",
+                          (current + amount, user, DAY))
+            conn.commit()
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool_exec:
+        list(pool_exec.map(one, jobs))
+    coalescer.flush()
+    elapsed = time.perf_counter() - t0
+
+    got = _totals(pool, users)
+    lost = sum(expected[u] - got[u] for u in users)
+    wrong = [u for u in users if got[u] != expected[u]]
+    writes = coalescer.writes if mode == "coalesced" else len(jobs)
+    print(f"{mode:>10}: {len(jobs):,} increments in {elapsed:.2f}s ({len(jobs) / elapsed:,.0f}/s), "
+          f"{writes:,} DB writes, {len(wrong)}/{len(users)} users wrong, {lost:,} ml lost")
+    return not wrong
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_db_arguments(parser)
+    parser.add_argument("--increments", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--users", type=int, default=8, help="fewer users = more contention per row")
+    parser.add_argument("--window", type=float, default=0.05, help="coalescing window in seconds")
+    parser.add_argument("--legacy", action="store_true", help="also run the old read-modify-write path")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    pool = connect_pool(args, size=args.threads)
+    with pool.connection() as conn:
+        migrate(conn)
+
+    rng = random.Random(args.seed)
+    jobs = [(f"water_bench_{rng.randrange(args.users)}", rng.choice((150, 200, 500, 250)))
+            for _ in range(args.increments)]
+    ok = run("atomic", pool, jobs, args.threads, args.window)
+    ok &= run("coalesced", pool, jobs, args.threads, args.window)
+    if args.legacy:
+        run("legacy", pool, jobs, args.threads, args.window)
+    pool.dispose()
+    if not ok:
+        sys.exit("water totals do not match the increments sent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# benchmarks/workout_plans.py
+"""
+Microbenchmark for the workout plan engine: import-time precomputation,
+building a plan (and its frame) from scratch, and the precomputed lookup the
+page actually does.
+
+    python -m benchmarks.workout_plans --number 20000
+"""
+import argparse
+import importlib
+import sys
+import time
+import timeit
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20_000, help="calls per measurement")
+    args = parser.parse_args(argv)
+
+    import pandas  # noqa: F401 -- pandas' own import cost isn't the engine's
+    sys.modules.pop("workout_plans", None)
+    t0 = time.perf_counter()
+    wp = importlib.import_module("workout_plans")
+    print(f"import + precompute {len(wp.PLANS)} plans: {(time.perf_counter() - t0) * 1e3:.1f} ms")
+
+    key = ("Intermediate", "Fat Loss", 5, 4)
+    for label, stmt in (("build_plan", lambda: wp.build_plan(*key)),
+                        ("build_plan + plan_frame", lambda: wp.plan_frame(wp.build_plan(*key))),
+                        ("get_plan (precomputed)", lambda: wp.get_plan(*key))):
+        number = args.number if "frame" not in label else max(1, args.number // 100)
+        per_call = min(timeit.repeat(stmt, number=number, repeat=5)) / number
+        print(f"{label:>24}: {per_call * 1e6:9.2f} µs/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/write_behind.py
+"""
+Button-press latency with and without the write-behind queue.
+
+Replays a mix of activity writes (food logs, water taps, check-ins, workout
+preferences) from several concurrent "sessions" against a local MySQL
+database, timing only what the script thread waits for: the synchronous
+write + commit, or the journaled submit(). Reports p50/p95/p99 for each mode
+and how long the worker took to drain the queue afterwards.
+
+    python -m benchmarks.write_behind --presses 5000 --sessions 16 [--fsync]
+
+Without --fsync a submit() only reaches the page cache, so compare the
+--fsync run when the journal has to survive a power cut. On
+benchmarks.mysql_standin the synchronous tail is SQLite's database-wide
+write lock, which overstates what MySQL's row locks cost.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from migrations import migrate
+from write_behind import KINDS, Journal, WriteBehindQueue
+from benchmarks.local_db import add_db_arguments, connect_pool, table_rows
+
+FOODS = [("Rice", "100Grams", 2.7, 28.0, 0.3, 0.4, 130), ("Egg", "100Grams", 13.0, 1.1, 11.0, 0.0, 155),
+         ("Milk", "250ml", 8.0, 12.0, 8.2, 0.0, 155)]
+
+
+def presses(count, users, rng):
+    """(kind, username, params) in a realistic mix: mostly water taps and food logs."""
+    out = []
+    for i in range(count):
+        user = f"wb_bench_{rng.randrange(users)}"
+        day = f"2030-01-{1 + rng.randrange(28):02d}"
+        roll = rng.random()
+        if roll < 0.45:
+            out.append(("water", user, (user, day, rng.choice((150, 200, 500)))))
+        elif roll < 0.85:
+            food = rng.choice(FOODS)
+            out.append(("food_log", user, (user, *food, f"{day} 12:{i % 60:02d}:00")))
+        elif roll < 0.95:
+            out.append(("check_in", user, (user, day, 100, 0, 100, 0, 50.0)))
+        else:
+            out.append(("workout_prefs", user, ("Beginner", "Fat Loss", 4, 4, user)))
+    return out
+
+
+def timed(fn, jobs, sessions):
+    def one(job):
+        t0 = time.perf_counter()
+        fn(*job)
+        return time.perf_counter() - t0
+
+    with ThreadPoolExecutor(sessions) as ex:
+        lat = np.array(list(ex.map(one, jobs))) * 1e3
+    return lat
+
+
+def report(label, lat):
+    print(f"{label:>12}: p50 {np.percentile(lat, 50):7.2f} ms  p95 {np.percentile(lat, 95):7.2f} ms  "
+          f"p99 {np.percentile(lat, 99):7.2f} ms  max {lat.max():7.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_db_arguments(parser)
+    parser.add_argument("--presses", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=16, help="concurrent script threads")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--interval-ms", type=float, default=500)
+    parser.add_argument("--fsync", action="store_true", help="fsync every journal append")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    pool = connect_pool(args, size=args.sessions + 1)
+    with pool.connection() as conn:
+        migrate(conn)
+        c = conn.cursor()
+        c.execute("INSERT IGNORE INTO profiles (username, name) VALUES " +
+                  ", ".join(f"('wb_bench_{i}', 'bench')" for i in range(args.users)))
+        conn.commit()
+    jobs = presses(args.presses, args.users, random.Random(args.seed))
+
+    def sync(kind, username, params):
+        with pool.connection() as conn:
+            KINDS[kind](conn.cursor(), [params])
+            conn.commit()
+
+    report("synchronous", timed(sync, jobs, args.sessions))
+
+    with pool.connection() as conn:
+        before = table_rows(conn, "food_logs")
+    journal = Journal(os.path.join(tempfile.mkdtemp(prefix="write_behind_"), "journal.log"), fsync=args.fsync)
+    queue = WriteBehindQueue(pool.connection, journal, batch_size=args.batch, interval=args.interval_ms / 1000)
+    report("write-behind", timed(queue.submit, jobs, args.sessions))
+
+    t0 = time.perf_counter()
+    while queue.stats()["queued"] or queue.stats()["inflight"]:
+        time.sleep(0.01)
+    drain = time.perf_counter() - t0
+    queue.stop()
+    with pool.connection() as conn:
+        landed = table_rows(conn, "food_logs") - before
+    expected = sum(1 for kind, _, _ in jobs if kind == "food_log")
+    print(f"drained in {drain:.2f}s after the last press; {queue.stats()['flushed']:,} entries flushed, "
+          f"{queue.stats()['failures']} failed batch(es); food_logs +{landed:,} (expected {expected:,})")
+    pool.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@
 import streamlit as st
 from datetime import datetime
 import pytz
-from database_manager import get_db_connection # Removed sqlite3
+from database_manager import db_connection # Pooled MySQL connections
+from checkins import record_check_in
+from data_cache import bump_version
+from write_behind import get_write_behind
 
 def show_check_in():
     st.title("✅ Daily Compliance Check-In")
@@ -14,61 +17,61 @@ def show_check_in():
     IST = pytz.timezone('Asia/Kolkata')
     today_ist = datetime.now(IST).strftime('%Y-%m-%d')
     username = st.session_state.username
+    queue = get_write_behind()  # None unless WRITE_BEHIND is enabled
     
-    # Using your centralized MySQL connection helper
-    conn = get_db_connection()
-    if conn is None:
-        st.error("Database connection failed.")
-        return
-        
-    c = conn.cursor()
+    # Borrowed from the shared pool and always handed back, so no more 'too many connections'
+    with db_connection() as conn:
+        if conn is None:
+            st.error("Database connection failed.")
+            return
 
-    # We still check for an entry just to show the user their current status
-    # MySQL uses %s as the placeholder instead of ?
-    c.execute("SELECT total_score FROM compliance_data WHERE username = %s AND date = %s ORDER BY id DESC LIMIT 1", (username, today_ist))
-    row = c.fetchone()
+        c = conn.cursor(buffered=True)
 
-    if row:
-        st.info(f"Current recorded score for today: {row[0]}%. You can update it below.")
+        # We still check for an entry just to show the user their current status
+        # One row per (username, date), so this is a unique-key lookup
+        c.execute("SELECT total_score FROM compliance_data WHERE username = %s AND date = %s", (username, today_ist))
+        row = c.fetchone()
+        # A submission still in the write-behind queue is the newest score
+        queued = [q for q in queue.pending(username, "check_in") if q[1] == today_ist] if queue else []
+        if queued:
+            row = (queued[-1][6],)
 
-    with st.form("check_in_form"):
-        st.subheader(f"Update Goals for {today_ist}")
+        if row:
+            st.info(f"Current recorded score for today: {row[0]}%. You can update it below.")
+
+        with st.form("check_in_form"):
+            st.subheader(f"Update Goals for {today_ist}")
         
-        f_water = st.radio("Water Goal Met?", ["Yes", "No"], index=1)
-        f_diet = st.radio("Diet Followed?", ["Yes", "No"], index=1)
-        f_work = st.radio("Workout Done?", ["Yes", "No"], index=1)
-        f_sleep = st.radio("Sleep Goal Met?", ["Yes", "No"], index=1)
+            f_water = st.radio("Water Goal Met?", ["Yes", "No"], index=1)
+            f_diet = st.radio("Diet Followed?", ["Yes", "No"], index=1)
+            f_work = st.radio("Workout Done?", ["Yes", "No"], index=1)
+            f_sleep = st.radio("Sleep Goal Met?", ["Yes", "No"], index=1)
         
-        if st.form_submit_button("Submit & Update Progress"):
-            score_count = 0.0
-            if f_water == "Yes": score_count += 1.0
-            if f_diet == "Yes": score_count += 1.0
-            if f_work == "Yes": score_count += 1.0
-            if f_sleep == "Yes": score_count += 1.0
+            if st.form_submit_button("Submit & Update Progress"):
+                score_count = 0.0
+                if f_water == "Yes": score_count += 1.0
+                if f_diet == "Yes": score_count += 1.0
+                if f_work == "Yes": score_count += 1.0
+                if f_sleep == "Yes": score_count += 1.0
             
-            # (X / 4) * 100. Example: 1 Yes = 25%.
-            final_score = (score_count / 4.0) * 100.0
+                # (X / 4) * 100. Example: 1 Yes = 25%.
+                final_score = (score_count / 4.0) * 100.0
             
-            try:
-                # INSERT logic preserved to allow 'n' submissions
-                # Placeholders updated to %s for MySQL compatibility
-                c.execute('''INSERT INTO compliance_data 
-                             (username, date, water, diet, workout, sleep, total_score) 
-                             VALUES (%s, %s, %s, %s, %s, %s, %s)''', 
-                          (username, today_ist, 
-                           100 if f_water=="Yes" else 0, 
-                           100 if f_diet=="Yes" else 0, 
-                           100 if f_work=="Yes" else 0, 
-                           100 if f_sleep=="Yes" else 0, 
-                           final_score))
-                conn.commit()
-                st.success(f"Progress Updated! Latest Score: {final_score}%")
-                st.rerun()
-            except Exception as e:
-                st.error(f"Error: {e}")
-            finally:
-                conn.close() # Vital to close connection to prevent MySQL 'too many connections' error
-    
-    # Final safety close if the form wasn't submitted
-    if conn.is_connected():
-        conn.close()
\ No newline at end of file
+                try:
+                    # 'n' submissions allowed: each one overwrites today's row (and is kept in the history table)
+                    check_in = (username, today_ist, 
+                                100 if f_water=="Yes" else 0, 
+                                100 if f_diet=="Yes" else 0, 
+                                100 if f_work=="Yes" else 0, 
+                                100 if f_sleep=="Yes" else 0, 
+                                final_score)
+                    if queue:
+                        queue.submit("check_in", username, check_in)
+                    else:
+                        record_check_in(c, *check_in)
+                        conn.commit()
+                        bump_version(username)
+                    st.success(f"Progress Updated! Latest Score: {final_score}%")
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Error: {e}")
@@ -0,0 +1,101 @@
+# checkins.py
+"""
+Daily compliance check-ins: one `compliance_data` row per (username, date).
+
+Resubmitting on the same day overwrites that row with an atomic upsert, and
+each submission is also appended to `compliance_history` when
+CHECKIN_HISTORY is enabled (the default).
+
+Older deployments appended a row per submit; collapse those duplicates with
+
+    python checkins.py --compact [--batch 200] [--no-history]
+
+It walks users in small batches, each in its own short transaction, so the
+table is never locked for long. Migration 6 runs the same job before it adds
+the unique key.
+"""
+import argparse
+
+import streamlit as st
+
+from database_manager import get_pool
+
+UPSERT_CHECKIN = """INSERT INTO compliance_data
+                        (username, date, water, diet, workout, sleep, total_score)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        water = VALUES(water),
+                        diet = VALUES(diet),
+                        workout = VALUES(workout),
+                        sleep = VALUES(sleep),
+                        total_score = VALUES(total_score)"""
+
+APPEND_HISTORY = """INSERT INTO compliance_history
+                        (username, date, water, diet, workout, sleep, total_score)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)"""
+
+# source_id is unique, so a compaction run that was interrupted can simply be rerun
+COPY_TO_HISTORY = """INSERT IGNORE INTO compliance_history
+                         (source_id, username, date, water, diet, workout, sleep, total_score)
+                     SELECT id, username, date, water, diet, workout, sleep, total_score
+                     FROM compliance_data WHERE username IN ({users})"""
+
+SUPERSEDED_IDS = """SELECT c.id FROM compliance_data c
+                    JOIN (SELECT username, date, MAX(id) AS keep_id FROM compliance_data
+                          WHERE username IN ({users})
+                          GROUP BY username, date HAVING COUNT(*) > 1) d
+                      ON c.username = d.username AND c.date = d.date AND c.id < d.keep_id"""
+
+
+def history_enabled():
+    return bool(st.secrets.get("CHECKIN_HISTORY", True))
+
+
+def record_check_in(cursor, username, day, water, diet, workout, sleep, total_score):
+    """Write today's check-in (overwriting earlier ones) and audit it. Caller commits."""
+    row = (username, day, water, diet, workout, sleep, total_score)
+    cursor.execute(UPSERT_CHECKIN, row)
+    if history_enabled():
+        cursor.execute(APPEND_HISTORY, row)
+
+
+def compact(conn, batch=200, keep_history=True, log=print):
+    """Collapse duplicate (username, date) rows down to the latest submission."""
+    c = conn.cursor(buffered=True)
+    last_user, removed = "", 0
+    while True:
+        c.execute("SELECT DISTINCT username FROM compliance_data WHERE username > %s "
+                  "ORDER BY username LIMIT %s", (last_user, batch))
+        users = [row[0] for row in c.fetchall()]
+        if not users:
+            break
+        marks = ", ".join(["%s"] * len(users))
+        if keep_history:
+            c.execute(COPY_TO_HISTORY.format(users=marks), users)
+        c.execute(SUPERSEDED_IDS.format(users=marks), users)
+        ids = [row[0] for row in c.fetchall()]
+        if ids:
+            c.execute(f"DELETE FROM compliance_data WHERE id IN ({', '.join(['%s'] * len(ids))})", ids)
+        conn.commit()
+        removed += len(ids)
+        last_user = users[-1]
+        log(f"Compacted up to {last_user!r}: {removed} duplicate row(s) removed so far")
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collapse duplicate daily check-ins.")
+    parser.add_argument("--compact", action="store_true", help="remove superseded same-day submissions")
+    parser.add_argument("--batch", type=int, default=200, help="users per transaction")
+    parser.add_argument("--no-history", action="store_true", help="don't copy rows into compliance_history")
+    args = parser.parse_args(argv)
+    if not args.compact:
+        parser.error("nothing to do (pass --compact)")
+
+    with get_pool().connection() as conn:
+        removed = compact(conn, batch=args.batch, keep_history=not args.no_history)
+    print(f"✅ Removed {removed} duplicate check-in row(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,18 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
-from database_manager import get_db_connection # Removed sqlite3
+from database_manager import get_pool # Pooled MySQL connections
+from data_cache import cached_read
+from nutrition_rollup import load_day_totals
+from write_behind import get_write_behind
+
+# Half-open range on the raw column so idx_food_logs_user_date (username, date) is usable;
+# wrapping the column as date(date) = %s forced a scan of every row of the user.
+FOOD_LOG_DAY_QUERY = """SELECT food, qty, protein, carbs, fat, fiber, calories, date 
+                        FROM food_logs 
+                        WHERE username = %s AND date >= %s AND date < %s"""
 
 def show_daily_summary():
     st.title("📊 Consumption Dashboard")
@@ -16,53 +25,42 @@ def show_daily_summary():
     # --- IST TIMEZONE FIX: Ensuring strict Hyderabad local time ---
     # This logic is critical for the 12:00 AM reset in Hyderabad
     IST = pytz.timezone('Asia/Kolkata')
-    today_ist = datetime.now(IST).strftime('%Y-%m-%d')
+    today = datetime.now(IST).date()
+    today_ist = today.strftime('%Y-%m-%d')
     
-    # Using your centralized MySQL connection
-    conn = get_db_connection()
-    if conn is None:
-        st.error("Database connection failed.")
-        return
-        
     username = st.session_state.username
     
-    # MYSQL UPDATED QUERY: 
-    # 1. Changed placeholders from ? to %s
-    # 2. MySQL date() function used to filter the IST date string
-    query = """SELECT food, qty, protein, carbs, fat, fiber, calories, date 
-               FROM food_logs 
-               WHERE username = %s AND date(date) = %s"""
-    
+    def load_totals():
+        # Borrowed from the shared pool only on a cache miss; the chart needs just the rollup row
+        with get_pool().connection() as conn:
+            return load_day_totals(conn, username, today)
+
     try:
-        # Passes the calculated IST date directly into the MySQL filter
-        df = pd.read_sql_query(query, conn, params=(username, today_ist))
+        # Reused across reruns until this user's next write bumps their data version
+        day = cached_read(username, f"nutrition_totals:{today}", load_totals)
     except Exception as e:
         st.error(f"Database Error: {e}")
-        df = pd.DataFrame()
-    finally:
-        # Crucial to close MySQL connection to prevent server lockout
-        if conn.is_connected():
-            conn.close()
+        return
+
+    # Food logs still in the write-behind queue are added on top of the committed totals
+    queue = get_write_behind()
+    queued = [r for r in queue.pending(username, "food_log") if str(r[8])[:10] == today_ist] if queue else []
+    if queued:
+        day = dict(day or {"protein": 0, "carbs": 0, "fat": 0, "fiber": 0, "calories": 0, "item_count": 0})
+        for key, i in (("protein", 3), ("carbs", 4), ("fat", 5), ("fiber", 6), ("calories", 7)):
+            day[key] += sum(r[i] for r in queued)
+        day['item_count'] += len(queued)
 
     # Dashboard logic preserved for the Feb 12 reset
-    if df.empty:
+    if not day or not day['item_count']:
         st.warning(f"Dashboard Reset: No food logged yet for today ({today_ist}).")
         return
 
-    # Pie chart and Table logic fully preserved
-    df.columns = ['Food', 'Quantity', 'Protein', 'Carbs', 'Fat', 'Fiber', 'Calories', 'Date']
-    
-    # Ensuring numeric types for Plotly calculations
-    df['Protein'] = pd.to_numeric(df['Protein']).fillna(0)
-    df['Carbs'] = pd.to_numeric(df['Carbs']).fillna(0)
-    df['Fat'] = pd.to_numeric(df['Fat']).fillna(0)
-    df['Fiber'] = pd.to_numeric(df['Fiber']).fillna(0)
-    
     totals = {
-        "Protein": df['Protein'].sum(), 
-        "Carbs": df['Carbs'].sum(), 
-        "Fats": df['Fat'].sum(), 
-        "Fiber": df['Fiber'].sum()
+        "Protein": day['protein'], 
+        "Carbs": day['carbs'], 
+        "Fats": day['fat'], 
+        "Fiber": day['fiber']
     }
 
     if sum(totals.values()) > 0:
@@ -81,6 +79,41 @@ def show_daily_summary():
         
         st.plotly_chart(fig, use_container_width=True)
 
+    # Full history (hot rows plus the Parquet archive) is only read when asked for
+    with st.expander("📦 Export food history"):
+        if st.button("Prepare CSV"):
+            from food_archive import food_history
+            try:
+                with get_pool().connection() as conn:
+                    history = food_history(conn, username)
+            except Exception as e:
+                st.error(f"Database Error: {e}")
+            else:
+                st.caption(f"{len(history)} item(s) logged")
+                st.download_button("⬇️ Download food history", history.drop(columns="id").to_csv(index=False),
+                                   file_name=f"food_history_{username}.csv", mime="text/csv")
+
     # Detailed data view for Osmania University project report
     st.subheader(f"📋 Consumed Food Details ({today_ist})")
-    st.dataframe(df, use_container_width=True)
\ No newline at end of file
+    st.caption(f"{day['item_count']} item(s) · {day['calories']} kcal")
+
+    # Raw rows are only fetched when the user asks for them
+    if not st.toggle("Show consumed food details"):
+        return
+
+    def load_details():
+        with get_pool().connection() as conn:
+            # IST midnight-to-midnight window passed straight into the MySQL range filter
+            df = pd.read_sql_query(FOOD_LOG_DAY_QUERY, conn, params=(username, today, today + timedelta(days=1)))
+        df.columns = ['Food', 'Quantity', 'Protein', 'Carbs', 'Fat', 'Fiber', 'Calories', 'Date']
+        return df
+
+    try:
+        df = cached_read(username, f"food_logs:{today}", load_details)
+    except Exception as e:
+        st.error(f"Database Error: {e}")
+        return
+
+    if queued:
+        df = pd.concat([df, pd.DataFrame([r[1:] for r in queued], columns=df.columns)], ignore_index=True)
+    st.dataframe(df, use_container_width=True)
@@ -0,0 +1,125 @@
+# data_cache.py
+"""
+Versioned read-through cache for per-user dashboard reads.
+
+Entries are keyed by (username, name, data version). Every write path
+(Food Calculator, check-in, water tracker) calls bump_version(username),
+so the next read misses and reloads; nothing relies on a TTL. Memory is
+bounded by DATA_CACHE_MB (default 64) with least-recently-used eviction.
+
+Versions live in this server process, which matches Streamlit's single
+process deployment. Writes made by another process are only seen once this
+process bumps the user or evicts the entry.
+
+Cached values are shared between sessions: treat them as read-only.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+
+def _size_of(value):
+    """Rough in-memory size of a cached value in bytes."""
+    if hasattr(value, "memory_usage"):  # pandas DataFrame / Series
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class UserDataCache:
+    """LRU over (username, name, version) keys with a byte budget and hit/miss counters."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._by_user = {}  # username -> set of keys, so a bump can free them right away
+        self._versions = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def version(self, username):
+        with self._lock:
+            return self._versions.get(username, 0)
+
+    def bump(self, username):
+        """Invalidate everything cached for `username`."""
+        with self._lock:
+            self._versions[username] = self._versions.get(username, 0) + 1
+            for key in self._by_user.pop(username, ()):
+                self._drop(key)
+
+    def get_or_load(self, username, name, loader, cache_none=True):
+        with self._lock:
+            version = self._versions.get(username, 0)
+            key = (username, name, version)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = loader()  # DB round trip happens outside the lock
+        size = _size_of(value)
+        with self._lock:
+            # A write landed while we were loading: serve the value but don't keep it
+            if self._versions.get(username, 0) != version or size > self.max_bytes:
+                return value
+            if value is None and not cache_none:
+                return value
+            if key not in self._entries:
+                self._entries[key] = (value, size)
+                self._by_user.setdefault(username, set()).add(key)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    oldest = next(iter(self._entries))
+                    self._by_user.get(oldest[0], set()).discard(oldest)
+                    self._drop(oldest)
+                    self.evictions += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    def _drop(self, key):
+        _, size = self._entries.pop(key, (None, 0))
+        self._bytes -= size
+
+
+@st.cache_resource(show_spinner=False)
+def get_cache():
+    """One cache per server process."""
+    return UserDataCache(int(float(st.secrets.get("DATA_CACHE_MB", 64)) * 1024 * 1024))
+
+
+def cached_read(username, name, loader, cache_none=True):
+    """
+    Return `loader()`'s result for this user, reusing it until the user's next write.
+    With cache_none=False a None result (nothing there yet) is reloaded on every call.
+    """
+    return get_cache().get_or_load(username, name, loader, cache_none)
+
+
+def bump_version(username):
+    """Call after every committed write that changes what the user's pages show."""
+    get_cache().bump(username)
+
+
+def cache_stats():
+    return get_cache().stats()
@@ -54,5 +54,15 @@ MACRO_SOURCES = {
     "Fiber": ["Chia Seeds", "Chickpeas", "Broccoli", "Dal (Lentils)", "Spinach", "Carrot", "Apples"]
 }
 
+# Logged in ml rather than grams (becomes the catalog's `unit` column)
+LIQUID_ITEMS = ["Milk", "Curd (Dahi)", "Whey Protein", "Olive Oil", "Orange Juice", "Apple Juice", "Sugarcane Juice"]
 
 
+# Exercises per muscle group, in the order plans pick them (index 0 = main compound lift)
+EXERCISE_DB = {
+    "Chest": ["Bench Press", "Incline DB Press", "Chest Flys", "Push-ups", "Dips"],
+    "Back": ["Deadlifts", "Lat Pulldowns", "Bent Over Rows", "Pull-ups", "Cable Rows"],
+    "Shoulders": ["Overhead Press", "Lateral Raises", "Front Raises", "Face Pulls", "Reverse Flys"],
+    "Arms": ["Barbell Curls", "Hammer Curls", "Tricep Pushdowns", "Skull Crushers", "Preacher Curls"],
+    "Legs": ["Squats", "Leg Press", "Leg Extensions", "Hamstring Curls", "Calf Raises"]
+}
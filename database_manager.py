@@ -1,36 +1,231 @@
 # database_manager.py
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import mysql.connector
 import streamlit as st
 
-def get_db_connection():
+from instrumentation import get_metrics, instrument_connection
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection is handed back to the pool before the checkout timeout."""
+
+
+class PooledConnection:
+    """
+    Wrapper around a raw MySQL connection borrowed from the pool.
+    close() hands the connection back instead of tearing down the socket,
+    so existing `conn.close()` / `conn.is_connected()` call sites keep working.
+    """
+
+    def __init__(self, pool, raw, born):
+        self._pool = pool
+        self._raw = raw
+        self._born = born
+
+    def close(self):
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw, self._born)
+
+    def is_connected(self):
+        return self._raw is not None
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise RuntimeError("Connection has already been returned to the pool.")
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
     """
-    Connects to your permanent MySQL Cloud Database.
+    Fixed-size, thread-safe pool shared by every Streamlit session in the process.
+    Connections are validated on borrow (age + ping) and rolled back on return.
+    """
+
+    def __init__(self, connect, size=5, timeout=10.0, recycle=3600.0):
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle
+        self._idle = deque()  # (raw, born) pairs, most recently used on the right
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._waiting = 0
+        self._created = 0
+        self._recycled = 0
+        self._timeouts = 0
+
+    def acquire(self, timeout=None):
+        """Borrow a connection, waiting up to `timeout` seconds for one to free up."""
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        with self._cond:
+            while True:
+                if self._idle:
+                    raw, born = self._idle.pop()
+                    break
+                if self._in_use < self.size:
+                    raw, born = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"No database connection available after {self.timeout}s "
+                                      f"({self.size} in use).")
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._in_use += 1
+
+        # Network work happens outside the lock so one slow handshake doesn't stall everyone
+        try:
+            if raw is not None and not self._is_alive(raw, born):
+                self._discard(raw)
+                with self._cond:
+                    self._recycled += 1
+                raw = None
+            if raw is None:
+                raw = self._connect()
+                born = time.monotonic()
+                with self._cond:
+                    self._created += 1
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw, born)
+
+    def release(self, raw, born):
+        """Return a borrowed connection, discarding it if it can't be reset cleanly."""
+        keep = True
+        try:
+            # Never leak a half-finished transaction to the next borrower
+            if raw.in_transaction:
+                raw.rollback()
+        except Exception:
+            keep = False
+            self._discard(raw)
+        with self._cond:
+            self._in_use -= 1
+            if keep:
+                self._idle.append((raw, born))
+            else:
+                self._recycled += 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a connection for the duration of a `with` block."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def stats(self):
+        """Snapshot of pool counters."""
+        with self._cond:
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "created": self._created,
+                "recycled": self._recycled,
+                "timeouts": self._timeouts,
+            }
+
+    def dispose(self):
+        """Close every idle connection (borrowed ones are closed when returned)."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+        for raw, _ in idle:
+            self._discard(raw)
+
+    def _is_alive(self, raw, born):
+        if time.monotonic() - born > self.recycle:
+            return False
+        try:
+            return raw.is_connected()  # issues a COM_PING
+        except Exception:
+            return False
+
+    @staticmethod
+    def _discard(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+
+def _connect_args():
+    """Connection settings from Streamlit Secrets."""
+    args = dict(
+        host=st.secrets["DB_HOST"],
+        user=st.secrets["DB_USER"],
+        password=st.secrets["DB_PASS"],
+        database=st.secrets["DB_NAME"],
+        port=st.secrets.get("DB_PORT", 3306),
+    )
+    if st.secrets.get("DB_SSL_CA"):
+        args.update(ssl_ca=st.secrets["DB_SSL_CA"], ssl_verify_cert=True)
+    return args
+
+
+@st.cache_resource(show_spinner=False)
+def get_pool():
+    """One pool per server process, sized through DB_POOL_* secrets."""
+    args = _connect_args()
+    metrics = get_metrics()  # None unless METRICS is on, in which case every statement is timed
+    return ConnectionPool(
+        lambda: instrument_connection(mysql.connector.connect(**args), metrics),
+        size=int(st.secrets.get("DB_POOL_SIZE", 5)),
+        timeout=float(st.secrets.get("DB_POOL_TIMEOUT", 10)),
+        recycle=float(st.secrets.get("DB_POOL_RECYCLE", 3600)),
+    )
+
+
+def get_db_connection(timeout=None):
+    """
+    Borrows a connection to your permanent MySQL Cloud Database from the shared pool.
     Credentials are stored safely in Streamlit Secrets.
+    Call close() (or use db_connection()) to hand it back.
     """
     try:
-        return mysql.connector.connect(
-            host=st.secrets["DB_HOST"],
-            user=st.secrets["DB_USER"],
-            password=st.secrets["DB_PASS"],
-            database=st.secrets["DB_NAME"],
-            port=st.secrets.get("DB_PORT", 3306)
-        )
+        return get_pool().acquire(timeout)
     except Exception as e:
         st.error(f"Failed to connect to MySQL: {e}")
         return None
 
-def init_db():
-    """Initializes tables using MySQL syntax (AUTO_INCREMENT)."""
-    conn = get_db_connection()
-    if conn:
-        c = conn.cursor()
-        # MySQL uses VARCHAR and AUTO_INCREMENT
-        c.execute('''CREATE TABLE IF NOT EXISTS accounts 
-                     (username VARCHAR(255) PRIMARY KEY, password VARCHAR(255))''')
-        
-        c.execute('''CREATE TABLE IF NOT EXISTS compliance_data 
-                     (id INT AUTO_INCREMENT PRIMARY KEY, username VARCHAR(255), 
-                      date DATE, water INT, diet INT, workout INT, 
-                      sleep INT, total_score FLOAT)''')
-        conn.commit()
-        conn.close()
\ No newline at end of file
+
+@contextmanager
+def db_connection(timeout=None):
+    """
+    `with db_connection() as conn:` always hands the connection back to the pool,
+    including when the block ends in st.rerun() or an exception.
+    Yields None if no connection could be obtained.
+    """
+    conn = get_db_connection(timeout)
+    try:
+        yield conn
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def pool_stats():
+    """In use / waiting / created / recycled counters for the process-wide pool."""
+    return get_pool().stats()
+
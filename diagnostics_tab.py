@@ -0,0 +1,77 @@
+# diagnostics_tab.py
+import streamlit as st
+import pandas as pd
+import os
+from datetime import datetime
+from instrumentation import PAGE_SECONDS, QUERY_SECONDS, RENDER_SECONDS, get_metrics, process_gauges
+from page_registry import is_admin
+from session_profiler import recent_profiles
+
+def show_diagnostics():
+    st.title("🩺 Diagnostics")
+
+    # Listed only for admins in the sidebar; checked again in case the page is reached another way
+    if not is_admin(st.session_state.get('username')):
+        st.error("This page is only available to administrators.")
+        return
+
+    # --- SESSION PROFILES ---
+    st.subheader("🔬 Session profiles")
+    st.caption("A link with `?profile=<PROFILE_TOKEN>` samples the page it opens once; add `&profile_mode=session` "
+               "to sample every rerun until `?profile=off`.")
+    profiling = st.session_state.get('profiling')
+    every = st.checkbox("Profile every rerun of my session", value=profiling == "session")
+    if every:
+        st.session_state.profiling = "session"
+    elif profiling == "session":
+        st.session_state.profiling = False
+    if st.button("Profile my next rerun", disabled=every):
+        st.session_state.profiling = "once"
+    profiles = recent_profiles(st.secrets.get("PROFILE_DIR", ".profiles"))
+    if not profiles:
+        st.write("No profiles saved yet.")
+    for i, (path, meta) in enumerate(profiles):
+        tables = ", ".join(f"{t} {n:,}" if isinstance(n, int) else f"{t}: {n}" for t, n in meta['tables'].items())
+        p1, p2 = st.columns([4, 1])
+        p1.write(f"**{meta['page']}** · user {meta['user']} · {meta['started']} · {meta['wall_ms']} ms, "
+                 f"{meta['samples']} samples · {tables or 'no table counts'}")
+        if os.path.exists(path):
+            with open(path) as f:
+                p2.download_button("⬇ Stacks", f.read(), file_name=os.path.basename(path), key=f"profile_{i}")
+
+    st.divider()
+    metrics = get_metrics()
+    if metrics is None:
+        st.info("Instrumentation is off. Set `METRICS = true` in Streamlit Secrets and restart the app.")
+        return
+
+    since = datetime.fromtimestamp(metrics.started).strftime('%Y-%m-%d %H:%M:%S')
+    st.caption(f"Collected by this server process since {since}. Percentiles are estimated from histogram buckets.")
+
+    # --- PROCESS COUNTERS ---
+    gauges = process_gauges()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Pool in use", f"{gauges['wellness_db_pool_in_use']}/{gauges['wellness_db_pool_size']}")
+    c2.metric("Pool waits / timeouts", f"{gauges['wellness_db_pool_waiting']} / {gauges['wellness_db_pool_timeouts']}")
+    c3.metric("Data cache hit ratio", f"{gauges['wellness_data_cache_hit_ratio']:.0%}")
+    c4.metric("Write-behind queued", gauges.get('wellness_write_behind_queued', "off"))
+
+    for title, metric, label in (("📄 Pages", PAGE_SECONDS, "Page"),
+                                 ("🧩 Page functions", RENDER_SECONDS, "Function"),
+                                 ("🗄 Database statements", QUERY_SECONDS, "Statement")):
+        st.subheader(title)
+        rows = metrics.rows(metric)
+        if not rows:
+            st.write("Nothing recorded yet.")
+            continue
+        df = pd.DataFrame(rows).rename(columns={
+            "label": label, "count": "Calls", "mean_ms": "Mean (ms)", "p50_ms": "p50 (ms)",
+            "p95_ms": "p95 (ms)", "p99_ms": "p99 (ms)", "total_s": "Total (s)"})
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+    st.divider()
+    b1, b2 = st.columns(2)
+    b1.download_button("⬇ Prometheus metrics", metrics.prometheus_text(gauges),
+                       file_name="wellness_metrics.prom", mime="text/plain")
+    if b2.button("♻ Reset histograms"):
+        metrics.reset(); st.rerun()
@@ -0,0 +1,177 @@
+# diet_planner.py
+"""
+Diet plan optimizer behind the Diet Plan page.
+
+Each meal template (foods per diet preference) is solved as a bounded least
+squares problem over the catalog's food x nutrient matrix: pick grams of
+every food so the meal lands on its share of the day's calorie, protein,
+carb, fat and fiber targets, with each food kept inside a sensible portion
+range. Each residual is the miss as a fraction of its target times WEIGHTS
+(calories 10, protein 1.5, the rest 1), so the fit trades a 1% calorie miss
+against a 10% carb, fat or fiber miss. Portion ranges are sized
+for a PORTION_KCAL day; larger targets stretch the upper limits in
+proportion, so big eaters aren't capped short of their target.
+
+Plans depend only on (target kcal, goal, diet preference), so DietPlanner
+memoizes them. plan_each() loops over a list of keys through that memo, so
+each distinct key is solved once (one small solve per meal); there is no
+stacked batch solve.
+
+    python diet_planner.py --all-profiles      # plan every stored profile, report plans/sec
+"""
+import argparse
+import time
+from functools import lru_cache
+
+import numpy as np
+from scipy.optimize import lsq_linear
+
+from food_catalog import CAL, CARB, FAT, FIB, PRO
+from user_profile import MACRO_SPLIT, MEAL_SPLIT, daily_target, macro_grams  # noqa: F401 -- re-exported
+
+MEAL_TEMPLATES = {
+    "Pure Veg": {  # 100% Vegetarian options for all meals
+        "🥣 Breakfast (Oats & Milk)": ["Oats", "Milk", "Banana", "Almonds"],
+        "🍛 Lunch (Rice & Soya)": ["Rice", "Soya Chunks", "Spinach", "Carrot"],
+        "🍠 Snacks (Energy Focus)": ["Sweet Potato", "Banana"],
+        "🍽 Dinner (Roti & Paneer)": ["Paneer", "Rice", "Dal (Lentils)", "Cucumber"],
+    },
+    "Non-Veg": {  # Focused on Non-Veg protein sources
+        "🥣 Breakfast (Eggs & Milk)": ["Egg", "Milk", "Banana", "Almonds"],
+        "🍛 Lunch (Chicken & Rice)": ["Rice", "Chicken Breast", "Spinach", "Carrot"],
+        "🍠 Snacks (Protein Focus)": ["Egg", "Banana"],
+        "🍽 Dinner (Fish & Veggies)": ["Fish (Tilapia)", "Rice", "Dal (Lentils)", "Cucumber"],
+    },
+    "Combined": {  # Lunch is Non-Veg, Dinner is Veg
+        "🥣 Breakfast (Eggs & Oats)": ["Egg", "Oats", "Milk", "Almonds"],
+        "🍛 Lunch (Non-Veg Focus)": ["Rice", "Chicken Breast", "Spinach", "Carrot"],
+        "🍠 Snacks (Fruit & Nuts)": ["Banana", "Almonds"],
+        "🍽 Dinner (Veggie Focus)": ["Paneer", "Rice", "Dal (Lentils)", "Cucumber"],
+    },
+}
+
+# Relative weight of each target in the fit, in SOLVED order below
+SOLVED = (CAL, PRO, CARB, FAT, FIB)
+WEIGHTS = np.array([10.0, 1.5, 1.0, 1.0, 1.0])
+
+# Portion limits in g/ml: calorie-dense foods (nuts, oils, powders) get small portions
+PORTION = (20.0, 250.0)
+DENSE_PORTION = (5.0, 50.0)
+LIQUID_PORTION = (50.0, 400.0)
+DENSE_KCAL_PER_100G = 350.0
+PORTION_KCAL = 2000.0  # daily target the limits above are sized for
+ROUND_TO = 5
+
+
+def macro_targets(target, goal):
+    """Daily grams in SOLVED order: (kcal, protein, carbs, fat, fiber)."""
+    return np.array(macro_grams(target, goal))
+
+
+class DietPlanner:
+    """
+    Memoized meal-plan solver over a FoodCatalog. Plans are shared between
+    callers, so their arrays are read-only.
+    """
+
+    def __init__(self, catalog, cache_size=4096):
+        self.catalog = catalog
+        self.solves = 0
+        self._meals = {diet: [self._prepare(name, foods) for name, foods in meals.items()]
+                       for diet, meals in MEAL_TEMPLATES.items()}
+        self._cached = lru_cache(maxsize=cache_size)(self._solve)
+
+    def _prepare(self, name, foods):
+        """Per-template constants: rows, nutrient matrix (per gram) and portion bounds."""
+        foods = [f for f in foods if f in self.catalog]
+        rows = self.catalog.rows(foods)
+        nutrients = np.asarray(self.catalog.nutrients, dtype=np.float64)[rows]
+        A = nutrients[:, SOLVED].T / 100.0
+        lo = np.where(nutrients[:, CAL] >= DENSE_KCAL_PER_100G, DENSE_PORTION[0], PORTION[0])
+        hi = np.where(nutrients[:, CAL] >= DENSE_KCAL_PER_100G, DENSE_PORTION[1], PORTION[1])
+        liquid = np.asarray(self.catalog.liquid)[rows]
+        lo, hi = np.where(liquid, LIQUID_PORTION[0], lo), np.where(liquid, LIQUID_PORTION[1], hi)
+        return name, foods, rows, A, lo, hi
+
+    def plan(self, target, goal, diet):
+        """Plan for one (target kcal, goal, diet preference)."""
+        return self._cached(int(round(target)), goal, diet if diet in MEAL_TEMPLATES else "Combined")
+
+    def plan_each(self, keys):
+        """plan() for each (target kcal, goal, diet) key in turn, aligned with the input."""
+        return [self.plan(*key) for key in keys]
+
+    def cache_info(self):
+        return self._cached.cache_info()
+
+    def _solve(self, target, goal, diet):
+        self.solves += 1
+        daily = macro_targets(target, goal)
+        stretch = max(1.0, target / PORTION_KCAL)
+        meals = []
+        for share, (name, foods, rows, A, lo, hi) in zip(MEAL_SPLIT, self._meals[diet]):
+            hi = hi * stretch
+            b = daily * share
+            scale = WEIGHTS / np.maximum(b, 1e-9)
+            qty = lsq_linear(A * scale[:, None], b * scale, bounds=(lo, hi), method="bvls").x
+            qty = np.clip(np.round(qty / ROUND_TO) * ROUND_TO, lo, hi).astype(int)
+            values = self.catalog.compute(rows, qty)
+            for arr in (qty, values):
+                arr.setflags(write=False)
+            meals.append({"meal": name, "foods": foods, "qty": qty, "values": values})
+        totals = sum(m["values"].sum(axis=0) for m in meals)
+        totals.setflags(write=False)
+        return {"target": target, "goal": goal, "diet": diet, "targets": daily, "meals": meals, "totals": totals}
+
+
+def plan_to_dict(plan):
+    """JSON-safe copy of a plan (for user_plans.diet_plan)."""
+    return {"target": plan["target"], "goal": plan["goal"], "diet": plan["diet"],
+            "targets": np.round(plan["targets"], 2).tolist(), "totals": np.round(plan["totals"], 2).tolist(),
+            "meals": [{"meal": m["meal"], "foods": m["foods"], "qty": m["qty"].tolist(),
+                       "values": np.round(m["values"], 2).tolist()} for m in plan["meals"]]}
+
+
+def plan_from_dict(data):
+    """Inverse of plan_to_dict: the same shape DietPlanner.plan() returns."""
+    meals = [dict(m, qty=np.array(m["qty"], dtype=int), values=np.array(m["values"])) for m in data["meals"]]
+    return dict(data, targets=np.array(data["targets"]), totals=np.array(data["totals"]), meals=meals)
+
+
+def plan_all_profiles(conn, planner, batch=5000):
+    """{username: plan} for every profile with a predicted calorie target."""
+    c = conn.cursor(buffered=True)
+    last, plans = "", {}
+    while True:
+        c.execute("""SELECT username, cal, goal, diet FROM profiles
+                     WHERE username > %s AND cal IS NOT NULL ORDER BY username LIMIT %s""", (last, batch))
+        rows = c.fetchall()
+        if not rows:
+            return plans
+        keys = [(daily_target(cal, goal), goal, diet) for _, cal, goal, diet in rows]
+        plans.update(zip((r[0] for r in rows), planner.plan_each(keys)))
+        last = rows[-1][0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all-profiles", action="store_true", help="plan every stored profile")
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args(argv)
+    if not args.all_profiles:
+        parser.error("nothing to do (pass --all-profiles)")
+
+    from database_manager import get_pool
+    from food_catalog import get_catalog
+
+    planner = DietPlanner(get_catalog())
+    t0 = time.perf_counter()
+    with get_pool().connection() as conn:
+        plans = plan_all_profiles(conn, planner, args.batch)
+    elapsed = time.perf_counter() - t0
+    print(f"✅ {len(plans):,} plan(s) in {elapsed:.2f}s ({len(plans) / max(elapsed, 1e-9):,.0f} plans/s, "
+          f"{planner.solves:,} distinct solves)")
+
+
+if __name__ == "__main__":
+    main()
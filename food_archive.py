@@ -0,0 +1,249 @@
+# food_archive.py
+"""
+Hot food_logs table plus a monthly Parquet archive of cold history.
+
+food_logs keeps only recent months: the current one and the one before it
+by default (FOOD_HOT_MONTHS), which is everything the daily pages, the
+meal repeat and the write paths touch. This job moves each closed month
+older than that into Parquet:
+
+    <FOOD_ARCHIVE_DIR>/<YYYY-MM>/part-<n>.parquet
+
+Files are zstd-compressed and sorted by (username, date), so a per-user
+read skips every row group whose username range can't match. Each file is
+written under a temporary name and renamed. Its row count is checked, then
+it is registered in food_log_archives with the highest food_logs id it
+covers, and only then are the ids it holds (read back from the file)
+deleted from food_logs in small batches. A run that stops halfway is
+finished by the next run, without duplicating or losing rows. Rows that
+land in an archived month later become the next part, including a row
+whose id is below the part's max_id because its transaction committed
+after the month was read.
+
+daily_nutrition_totals is not archived: the Daily Summary and the rollup
+rebuild keep working off the hot table and the rollup. The rebuild sums
+late days of archived months through food_history().
+
+food_history() is the read path for history views and exports. It unions
+the user's hot rows with their archived rows for a date range.
+
+    python food_archive.py [--keep-months 2] [--dry-run]
+"""
+import argparse
+import os
+import time
+from datetime import date, datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+COLUMNS = ("id", "username", "food", "qty", "protein", "carbs", "fat", "fiber", "calories", "date")
+SCHEMA = pa.schema([
+    ("id", pa.int64()), ("username", pa.string()), ("food", pa.string()), ("qty", pa.string()),
+    ("protein", pa.float32()), ("carbs", pa.float32()), ("fat", pa.float32()), ("fiber", pa.float32()),
+    ("calories", pa.int32()), ("date", pa.timestamp("s")),
+])
+ROW_GROUP = 100_000
+FETCH = 20_000
+FAR_FUTURE = datetime(9999, 1, 1)
+
+OLDEST_HOT_ROW = "SELECT MIN(date) FROM food_logs"
+MONTH_ROWS = f"""SELECT {', '.join(COLUMNS)} FROM food_logs
+                 WHERE date >= %s AND date < %s AND id <= %s
+                 ORDER BY username, date, id"""
+MONTH_MAX_ID = "SELECT MAX(id), COUNT(*) FROM food_logs WHERE date >= %s AND date < %s"
+COVERED_LEFT = "SELECT 1 FROM food_logs WHERE date >= %s AND date < %s AND id <= %s LIMIT 1"
+DELETE_IDS = "DELETE FROM food_logs WHERE id IN ({ids})"
+ARCHIVED_PARTS = "SELECT part, path, max_id FROM food_log_archives WHERE month = %s ORDER BY part"
+REGISTER_PART = """INSERT INTO food_log_archives (month, part, path, row_count, calories, max_id)
+                   VALUES (%s, %s, %s, %s, %s, %s)"""
+PARTS_IN_RANGE = """SELECT path FROM food_log_archives
+                    WHERE month >= %s AND month < %s
+                    ORDER BY month, part"""
+LATEST_ARCHIVED = "SELECT MAX(month) FROM food_log_archives"
+HOT_HISTORY = f"""SELECT {', '.join(COLUMNS)} FROM food_logs
+                  WHERE username = %s AND date >= %s AND date < %s
+                  ORDER BY date"""
+
+
+def month_start(d):
+    return date(d.year, d.month, 1)
+
+
+def add_months(d, n):
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def cutoff(today, keep_months):
+    """First day of the oldest month that stays hot."""
+    return add_months(month_start(today), -(keep_months - 1))
+
+
+# --- archive job ---
+def part_ids(path):
+    """The food_logs ids stored in one Parquet part."""
+    return pq.read_table(path, columns=["id"]).column("id").to_pylist()
+
+
+def _finish_deletes(conn, month, end, max_id, path, batch, log):
+    """
+    Delete the hot rows an archived part holds (a no-op unless a run stopped halfway).
+    Only ids read back from the part are deleted: a row with id <= max_id whose
+    transaction committed after the month was read is not in the part, and stays.
+    """
+    c = conn.cursor(buffered=True)
+    c.execute(COVERED_LEFT, (month, end, max_id))
+    if c.fetchone() is None:
+        return 0
+    ids = part_ids(path)
+    deleted = 0
+    for start in range(0, len(ids), batch):
+        chunk = ids[start:start + batch]
+        c.execute(DELETE_IDS.format(ids=", ".join(["%s"] * len(chunk))), chunk)
+        conn.commit()
+        deleted += c.rowcount
+    if deleted:
+        log(f"{month:%Y-%m}: removed {deleted:,} archived rows from food_logs")
+    return deleted
+
+
+def write_part(rows_iter, path):
+    """Stream row tuples (COLUMNS order) into one Parquet file. Returns (rows, total calories)."""
+    tmp = path + ".tmp"
+    rows = calories = 0
+    with pq.ParquetWriter(tmp, SCHEMA, compression="zstd") as writer:
+        for chunk in rows_iter:
+            table = pa.Table.from_pylist([dict(zip(COLUMNS, r)) for r in chunk], schema=SCHEMA)
+            writer.write_table(table, row_group_size=ROW_GROUP)
+            rows += len(chunk)
+            calories += sum(r[8] or 0 for r in chunk)
+    if pq.read_metadata(tmp).num_rows != rows:
+        os.remove(tmp)
+        raise IOError(f"{path}: row count mismatch after write")
+    os.replace(tmp, path)
+    return rows, calories
+
+
+def archive_month(read_conn, write_conn, month, root, batch=10_000, dry_run=False, log=print):
+    """Move one closed month of food_logs into a new Parquet part. Returns rows archived."""
+    end = add_months(month, 1)
+    c = write_conn.cursor(buffered=True)
+    c.execute(ARCHIVED_PARTS, (month,))
+    parts = c.fetchall()
+    for _, path, max_id in parts:
+        if not dry_run:
+            _finish_deletes(write_conn, month, end, max_id, os.path.join(root, path), batch, log)
+
+    c.execute(MONTH_MAX_ID, (month, end))
+    max_id, count = c.fetchone()
+    if not count:
+        return 0
+    part = len(parts)
+    rel = os.path.join(f"{month:%Y-%m}", f"part-{part}.parquet")
+    if dry_run:
+        log(f"{month:%Y-%m}: would archive {count:,} rows to {rel}")
+        return count
+
+    os.makedirs(os.path.join(root, f"{month:%Y-%m}"), exist_ok=True)
+    cursor = read_conn.cursor()  # unbuffered: a month can be millions of rows
+    cursor.execute(MONTH_ROWS, (month, end, max_id))
+
+    def chunks():
+        while True:
+            rows = cursor.fetchmany(FETCH)
+            if not rows:
+                return
+            yield rows
+
+    t0 = time.perf_counter()
+    rows, calories = write_part(chunks(), os.path.join(root, rel))
+    c.execute(REGISTER_PART, (month, part, rel, rows, calories, max_id))
+    write_conn.commit()
+    _finish_deletes(write_conn, month, end, max_id, os.path.join(root, rel), batch, log=lambda msg: None)
+    log(f"{month:%Y-%m}: archived {rows:,} rows to {rel} in {time.perf_counter() - t0:.1f}s")
+    return rows
+
+
+def run(pool, root, keep_months=2, today=None, batch=10_000, dry_run=False, log=print):
+    """Archive every month older than the hot window. Returns rows archived."""
+    today = today or date.today()
+    first_hot = cutoff(today, keep_months)
+    with pool.connection() as read_conn, pool.connection() as write_conn:
+        c = write_conn.cursor(buffered=True)
+        c.execute(OLDEST_HOT_ROW)
+        oldest = c.fetchone()[0]
+        month = month_start(oldest) if oldest else first_hot
+        total = 0
+        while month < first_hot:
+            total += archive_month(read_conn, write_conn, month, root, batch, dry_run, log)
+            month = add_months(month, 1)
+    return total
+
+
+def archived_until(conn):
+    """First day not covered by the archive (None when nothing is archived); food_logs is complete from here on."""
+    c = conn.cursor(buffered=True)
+    c.execute(LATEST_ARCHIVED)
+    latest = c.fetchone()[0]
+    return add_months(latest, 1) if latest else None
+
+
+# --- read path ---
+def read_parts(root, paths, username, start, end):
+    """The user's archived rows in [start, end) from the given parts, as one frame."""
+    columns = [col for col in COLUMNS if col != "username"]
+    filters = [("username", "=", username), ("date", ">=", pd.Timestamp(start)), ("date", "<", pd.Timestamp(end))]
+    tables = [pq.read_table(os.path.join(root, p), columns=columns, filters=filters) for p in paths
+              if os.path.exists(os.path.join(root, p))]
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    return pa.concat_tables(tables).to_pandas()
+
+
+def food_history(conn, username, start=None, end=None, root=None):
+    """
+    The user's food logs in [start, end) from the hot table and the archive, oldest first.
+    Columns are COLUMNS without username. Rows caught between archive and delete appear once.
+    """
+    root = root or archive_root()
+    start = pd.Timestamp(start or date(1970, 1, 1)).to_pydatetime()
+    end = pd.Timestamp(end or FAR_FUTURE).to_pydatetime()
+    hot = pd.read_sql_query(HOT_HISTORY, conn, params=(username, start, end)).drop(columns="username")
+    c = conn.cursor(buffered=True)
+    c.execute(PARTS_IN_RANGE, (month_start(start), end))
+    cold = read_parts(root, [row[0] for row in c.fetchall()], username, start, end)
+    frames = [df for df in (cold, hot) if not df.empty]
+    if not frames:
+        return hot
+    df = pd.concat(frames, ignore_index=True).drop_duplicates("id", keep="last")
+    return df.sort_values(["date", "id"]).reset_index(drop=True)
+
+
+def archive_root():
+    import streamlit as st
+    return st.secrets.get("FOOD_ARCHIVE_DIR", ".food_archive")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep-months", type=int, default=None,
+                        help="months kept in food_logs, this one included (default: FOOD_HOT_MONTHS or 2)")
+    parser.add_argument("--batch", type=int, default=10_000, help="rows per DELETE")
+    parser.add_argument("--dry-run", action="store_true", help="report what would move, change nothing")
+    args = parser.parse_args(argv)
+
+    import pytz
+    import streamlit as st
+    from database_manager import get_pool
+
+    keep = args.keep_months or int(st.secrets.get("FOOD_HOT_MONTHS", 2))
+    today = datetime.now(pytz.timezone('Asia/Kolkata')).date()  # food_logs.date holds IST wall-clock time
+    total = run(get_pool(), archive_root(), keep, today, args.batch, args.dry_run)
+    print(f"✅ {total:,} food_logs row(s) {'would be ' if args.dry_run else ''}archived "
+          f"(keeping {keep} month(s) hot).")
+
+
+if __name__ == "__main__":
+    main()
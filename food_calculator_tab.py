@@ -0,0 +1,90 @@
+# food_calculator_tab.py
+import streamlit as st
+import pandas as pd
+import pytz
+from datetime import datetime, timedelta
+from database_manager import db_connection # Pooled MySQL connections
+from data_cache import bump_version
+from food_catalog import CAL, PRO, get_catalog # Columnar food catalog
+from food_search import get_search_index
+from meal_log import MEAL_WINDOWS, basket_rows, log_basket, repeat_meal
+from write_behind import get_write_behind
+
+def show_food_calculator():
+    st.title("🍏 Food Macro Checker & Logger")
+    catalog = get_catalog()
+    # Only the top matches go to the browser, never the whole catalog
+    query = st.text_input("Search Food", placeholder="e.g. chapati, paneer, brocoli")
+    options = [name for name, _ in get_search_index().search(query, k=20)] if query.strip() else catalog.names[:50]
+    if not options:
+        st.warning(f"No foods match '{query}'."); st.stop()
+    f_choice = st.selectbox("Select Item", options)
+    unit = catalog.unit(f_choice)
+    quantity = st.number_input(f"Enter Quantity ({unit})", 10, 2000, 100)
+    f_data = catalog.macros(f_choice, quantity)  # already scaled to the quantity
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("Calories", f"{int(f_data['cal'])} kcal")
+    c2.metric("Protein", f"{round(f_data['pro'], 1)}g")
+    c3.metric("Carbs", f"{round(f_data['carb'], 1)}g")
+    c4.metric("Fats", f"{round(f_data['fat'], 1)}g")
+    c5.metric("Fiber", f"{round(f_data['fib'], 1)}g")
+    b1, b2 = st.columns(2)
+    add_now, add_basket = b1.button("➕ Add to Daily History"), b2.button("🧺 Add to Meal Basket")
+    if add_basket:
+        st.session_state.basket.append((f_choice, quantity))
+
+    IST = pytz.timezone('Asia/Kolkata')
+    now_ist = datetime.now(IST).replace(tzinfo=None)  # food_logs.date holds IST wall-clock time
+
+    # --- MEAL BASKET ---
+    basket = st.session_state.basket
+    if basket:
+        st.subheader(f"🧺 Meal Basket ({len(basket)} items)")
+        values = catalog.compute(catalog.rows([f for f, _ in basket]), [q for _, q in basket])
+        st.table(pd.DataFrame({
+            "Food Item": [f for f, _ in basket],
+            "Quantity": [f"{q}{catalog.unit(f)}" for f, q in basket],
+            "Calories": [f"{int(v)} kcal" for v in values[:, CAL]],
+            "Protein (g)": [f"{round(v, 1)}g" for v in values[:, PRO]],
+        }))
+        st.caption(f"Basket total: {int(values[:, CAL].sum())} kcal, {round(values[:, PRO].sum(), 1)}g protein")
+        k1, k2 = st.columns(2)
+        log_all = k1.button("✅ Log Whole Meal")
+        if k2.button("🗑 Clear Basket"):
+            st.session_state.basket = []; st.rerun()
+    else:
+        log_all = False
+
+    if add_now or log_all:
+        lines = basket if log_all else [(f_choice, quantity)]
+        queue = get_write_behind()
+        if queue:
+            # Journaled and written by the background worker; Daily Summary overlays it until then
+            rows = basket_rows(catalog, st.session_state.username, lines, now_ist.strftime('%Y-%m-%d %H:%M:%S'))
+            queue.submit_many("food_log", st.session_state.username, rows); count = len(rows)
+        else:
+            with db_connection() as conn:
+                if conn is None: st.stop()
+                c = conn.cursor()
+                # One batched INSERT plus the rollup update, committed (or rolled back) together
+                count = log_basket(c, catalog, st.session_state.username, lines, now_ist)
+                conn.commit(); bump_version(st.session_state.username)
+        if log_all:
+            st.session_state.basket = []
+            st.success(f"Logged {count} items to history!")
+        else:
+            st.success(f"Added {f_choice} to history!")
+
+    # --- REPEAT A MEAL ---
+    with st.expander("🔁 Repeat yesterday's meal"):
+        meal = st.selectbox("Meal", list(MEAL_WINDOWS))
+        if st.button(f"Repeat yesterday's {meal.lower()}"):
+            with db_connection() as conn:
+                if conn is None: st.stop()
+                c = conn.cursor()
+                copied = repeat_meal(c, st.session_state.username, meal, now_ist.date() - timedelta(days=1), now_ist)
+                conn.commit()
+            if copied:
+                bump_version(st.session_state.username); st.success(f"Copied {copied} items from yesterday's {meal.lower()}!")
+            else:
+                st.info(f"Nothing was logged for yesterday's {meal.lower()}.")
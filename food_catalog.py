@@ -0,0 +1,162 @@
+# food_catalog.py
+"""
+Columnar food catalog.
+
+Foods live in NumPy columns instead of a dict of dicts: a float64
+(n_foods x 5) nutrient matrix per 100 g/ml in NUTRIENTS order, a category
+code, a liquid flag and aliases. Macros for many (food, quantity) pairs are
+one vectorized multiply.
+
+Sources: the built-in FOOD_DB in database.py, or a CSV/Parquet file named by
+the FOOD_CATALOG_PATH secret with columns
+
+    name, cal, pro, carb, fat, fib [, category] [, unit (g|ml)] [, aliases ("a|b|c")]
+
+Parsed files are cached as .npy columns under FOOD_CATALOG_CACHE (default
+.food_cache/), keyed by the file's path, size and mtime, and memory-mapped on
+the next cold start instead of being re-parsed. Each cache directory is
+written under a temporary name and renamed into place, so it is either
+complete or absent.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from database import FOOD_DB, LIQUID_ITEMS, MACRO_SOURCES
+
+NUTRIENTS = ("cal", "pro", "carb", "fat", "fib")
+CAL, PRO, CARB, FAT, FIB = range(len(NUTRIENTS))
+CATEGORIES = ("", "Protein", "Carbs", "Fats", "Fiber")  # code 0 = uncategorised
+CACHE_FORMAT = 2  # part of the cache key; bump when the on-disk layout changes
+
+
+def _pack(strings):
+    """List of str -> (int64 end offsets, UTF-8 uint8 blob), so any string survives saving without pickle."""
+    encoded = [s.encode("utf-8") for s in strings]
+    ends = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    return ends, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _unpack(ends, blob):
+    data = bytes(blob)
+    starts = [0, *ends[:-1].tolist()] if len(ends) else []
+    return [data[a:b].decode("utf-8") for a, b in zip(starts, ends.tolist())]
+
+
+class FoodCatalog:
+    """Column store over foods; row order is the catalog's index."""
+
+    def __init__(self, names, nutrients, category, liquid, aliases):
+        self.names = list(names)
+        self.nutrients = nutrients
+        self.category = category
+        self.liquid = liquid
+        self.aliases = [list(a) for a in aliases]
+        self.index = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    # --- construction ---
+    @classmethod
+    def from_frame(cls, df):
+        df = df.reset_index(drop=True)
+        nutrients = df[list(NUTRIENTS)].apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(np.float64)
+        category = (df["category"].map({c: i for i, c in enumerate(CATEGORIES)}).fillna(0).astype(np.int8).to_numpy()
+                    if "category" in df else np.zeros(len(df), dtype=np.int8))
+        liquid = (df["unit"].astype(str).str.lower().eq("ml").to_numpy()
+                  if "unit" in df else np.zeros(len(df), dtype=bool))
+        aliases = ([[a for a in str(v).split("|") if a] if isinstance(v, str) else [] for v in df["aliases"]]
+                   if "aliases" in df else [[] for _ in range(len(df))])
+        return cls(df["name"].astype(str).tolist(), nutrients, category, liquid, aliases)
+
+    @classmethod
+    def builtin(cls):
+        """The hand-written FOOD_DB, with MACRO_SOURCES and LIQUID_ITEMS folded in as columns."""
+        category_of = {food: cat for cat, foods in MACRO_SOURCES.items() for food in foods}
+        df = pd.DataFrame([dict(name=name, **macros) for name, macros in FOOD_DB.items()])
+        df["category"] = df["name"].map(category_of).fillna("")
+        df["unit"] = np.where(df["name"].isin(LIQUID_ITEMS), "ml", "g")
+        return cls.from_frame(df)
+
+    @classmethod
+    def from_file(cls, path):
+        df = pd.read_parquet(path) if path.endswith((".parquet", ".pq")) else pd.read_csv(path)
+        return cls.from_frame(df)
+
+    # --- binary cache ---
+    def save(self, directory):
+        """Write the columns to a sibling temp directory, then rename it to `directory`."""
+        parent = os.path.dirname(os.path.abspath(directory))
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+        names_ends, names = _pack(self.names)
+        aliases_ends, aliases = _pack(["|".join(a) for a in self.aliases])
+        try:
+            for name, arr in (("names", names), ("names_ends", names_ends), ("aliases", aliases),
+                              ("aliases_ends", aliases_ends), ("category", self.category),
+                              ("liquid", self.liquid), ("nutrients", self.nutrients)):
+                np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(arr))
+            os.replace(tmp, directory)
+        except OSError:
+            # Another process finished the same cache first; theirs is just as good
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(directory):
+                raise
+
+    @classmethod
+    def load(cls, directory):
+        arr = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+               for name in ("nutrients", "category", "liquid", "names", "names_ends", "aliases", "aliases_ends")}
+        aliases = [a.split("|") if a else [] for a in _unpack(arr["aliases_ends"], arr["aliases"])]
+        return cls(_unpack(arr["names_ends"], arr["names"]), arr["nutrients"], arr["category"], arr["liquid"],
+                   aliases)
+
+    # --- lookups ---
+    def rows(self, names):
+        """Row numbers for food names (KeyError on unknown foods)."""
+        return np.fromiter((self.index[n] for n in names), dtype=np.int64, count=len(names))
+
+    def unit(self, name):
+        return "ml" if self.liquid[self.index[name]] else "Grams"
+
+    def foods_in(self, category):
+        code = CATEGORIES.index(category)
+        return [self.names[i] for i in np.flatnonzero(np.asarray(self.category) == code)]
+
+    def compute(self, rows, quantities):
+        """Nutrients for many (food row, quantity) pairs at once -> (len(rows) x 5) array."""
+        factor = np.asarray(quantities, dtype=np.float64) / 100.0
+        return np.asarray(self.nutrients)[np.asarray(rows)] * factor[:, None]
+
+    def macros(self, name, quantity):
+        """Single-item convenience in the old FOOD_DB key names."""
+        return dict(zip(NUTRIENTS, self.compute([self.index[name]], [quantity])[0].tolist()))
+
+
+def load_catalog(path=None, cache_root=".food_cache"):
+    """Built-in catalog, or `path` through its memory-mapped binary cache."""
+    if not path:
+        return FoodCatalog.builtin()
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}:{CACHE_FORMAT}"
+    cache_dir = os.path.join(cache_root, hashlib.sha1(key.encode()).hexdigest()[:16])
+    if os.path.isdir(cache_dir):
+        return FoodCatalog.load(cache_dir)
+    catalog = FoodCatalog.from_file(path)
+    catalog.save(cache_dir)
+    return catalog
+
+
+@st.cache_resource(show_spinner=False)
+def get_catalog():
+    """One catalog per server process."""
+    return load_catalog(st.secrets.get("FOOD_CATALOG_PATH"), st.secrets.get("FOOD_CATALOG_CACHE", ".food_cache"))
@@ -0,0 +1,151 @@
+# food_search.py
+"""
+Search index over food names and aliases for the Food Calculator.
+
+Two structures, both built once per process from the food catalog:
+
+* Prefix index: every normalized name, alias and word in one sorted list.
+  A bisect finds the first key with the prefix and the matches are the
+  contiguous run after it. This is the flattened form of a prefix trie and
+  costs one list slot per key instead of one dict per character.
+* Trigram index: padded character trigrams of each name and alias, packed
+  into integer codes and stored CSR-style as one int32 postings array plus
+  offsets. A query's
+  trigram postings are counted with np.bincount and ranked by Dice
+  similarity, which tolerates typos ("chapatti", "brocoli").
+
+Ranking: exact name/alias > name prefix > word/alias prefix > fuzzy.
+"""
+import re
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+import streamlit as st
+
+from food_catalog import get_catalog
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+_PARENS = re.compile(r"\(([^)]*)\)")
+
+EXACT, NAME_PREFIX, WORD_PREFIX, FUZZY = 100.0, 90.0, 80.0, 60.0
+MIN_DICE = 0.3
+
+# normalize() leaves only [a-z0-9 ], so a trigram packs into one int below 37**3
+_BASE = 37
+_TRIGRAMS = _BASE ** 3
+_CODES = np.zeros(256, dtype=np.uint8)
+_CODES[ord("a"):ord("z") + 1] = np.arange(1, 27)
+_CODES[ord("0"):ord("9") + 1] = np.arange(27, 37)
+
+
+def normalize(text):
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def _trigram_codes(text):
+    """Distinct trigram codes of a normalized string, padded so word starts weigh more."""
+    codes = _CODES[np.frombuffer(f"  {text} ".encode("ascii"), dtype=np.uint8)].astype(np.int64)
+    return np.unique(codes[:-2] * _BASE * _BASE + codes[1:-1] * _BASE + codes[2:])
+
+
+def _aliases(name, extra):
+    """Search aliases for a food: catalog aliases plus anything in parentheses ('Roti (Chapati)')."""
+    found = [normalize(a) for a in extra]
+    found += [normalize(p) for p in _PARENS.findall(name)]
+    bare = normalize(_PARENS.sub(" ", name))
+    if bare:
+        found.append(bare)
+    return [a for a in dict.fromkeys(found) if a]
+
+
+class FoodSearchIndex:
+    """Ranked top-k food lookup; see the module docstring for the layout."""
+
+    def __init__(self, names, aliases):
+        self.names = list(names)
+        keys = []   # (key, food_row, score for a prefix hit)
+        docs = []   # (text, food_row) fed to the trigram index
+        for row, (name, extra) in enumerate(zip(self.names, aliases)):
+            full = normalize(name)
+            keys.append((full, row, NAME_PREFIX))
+            docs.append((full, row))
+            for alias in _aliases(name, extra):
+                keys.append((alias, row, WORD_PREFIX))
+                docs.append((alias, row))
+            for word in full.split()[1:]:
+                keys.append((word, row, WORD_PREFIX))
+        keys.sort()
+        self._keys = [k for k, _, _ in keys]
+        self._key_rows = np.array([r for _, r, _ in keys], dtype=np.int32)
+        # Prefix-hit score; shorter keys (closer to what was typed) rank a little higher
+        self._key_scores = np.array([s - len(k) / 1000.0 for k, _, s in keys], dtype=np.float32)
+        self._exact = {}
+        for text, row in docs:
+            self._exact.setdefault(text, row)
+        self._doc_rows = np.array([r for _, r in docs], dtype=np.int32)
+        self._build_trigrams([text for text, _ in docs])
+
+    def _build_trigrams(self, texts):
+        """CSR postings (trigram code -> doc ids), built with array ops over one joined byte buffer."""
+        padded = [f"  {t} " for t in texts]
+        codes = _CODES[np.frombuffer("".join(padded).encode("ascii"), dtype=np.uint8)].astype(np.int64)
+        lengths = np.fromiter((len(p) for p in padded), dtype=np.int64, count=len(padded))
+        doc = np.repeat(np.arange(len(padded), dtype=np.int64), lengths)
+        tri = codes[:-2] * _BASE * _BASE + codes[1:-1] * _BASE + codes[2:]
+        same_doc = doc[:-2] == doc[2:]
+        # One sort of (trigram, doc) keys both groups postings by trigram and exposes duplicates
+        pairs = np.sort(tri[same_doc] * len(padded) + doc[:-2][same_doc])
+        pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])]
+        pair_tri, pair_doc = pairs // len(padded), pairs % len(padded)
+        self._postings = pair_doc.astype(np.int32)
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(pair_tri, minlength=_TRIGRAMS))])
+        self._doc_len = np.bincount(pair_doc, minlength=len(padded)).astype(np.float32)
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        return cls(catalog.names, catalog.aliases)
+
+    def search(self, query, k=10):
+        """Top-k (food name, score) pairs for a partial or misspelt query."""
+        q = normalize(query)
+        if not q:
+            return []
+        best = {}
+
+        def offer(rows, scores):
+            for row, score in zip(rows.tolist(), scores.tolist()):
+                if score > best.get(row, 0.0):
+                    best[row] = score
+
+        if q in self._exact:
+            best[self._exact[q]] = EXACT
+
+        # Every key starting with q is one contiguous run of the sorted list
+        start, stop = bisect_left(self._keys, q), bisect_left(self._keys, q + "\x7f")
+        if stop > start:
+            scores = self._key_scores[start:stop]
+            top = np.argsort(-scores, kind="stable")[:k * 4]
+            offer(self._key_rows[start:stop][top], scores[top])
+
+        # Typo-tolerant trigram match, only needed when prefixes didn't fill the page
+        if len(best) < k:
+            grams = _trigram_codes(q)
+            hits = np.concatenate([self._postings[self._offsets[g]:self._offsets[g + 1]] for g in grams])
+            if len(hits):
+                shared = np.bincount(hits, minlength=len(self._doc_len))
+                dice = 2.0 * shared / (len(grams) + self._doc_len)
+                top = np.flatnonzero(dice >= MIN_DICE)
+                top = top[np.argsort(-dice[top], kind="stable")[:k * 4]]
+                offer(self._doc_rows[top], FUZZY * dice[top])
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1], len(self.names[item[0]]), self.names[item[0]]))
+        return [(self.names[row], round(score, 3)) for row, score in ranked[:k]]
+
+
+@st.cache_resource(show_spinner=False)
+def get_search_index():
+    """Built once per server process from the shared catalog."""
+    return FoodSearchIndex.from_catalog(get_catalog())
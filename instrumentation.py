@@ -0,0 +1,279 @@
+# instrumentation.py
+"""
+Latency histograms for database statements and page renders.
+
+Off unless the METRICS secret is set. When it is off, get_metrics() returns
+None, the pool hands out plain connections and page_timer() is a no-op, so
+the only cost is one cached lookup per rerun. When it is on:
+
+- every connection the pool opens is wrapped (instrument_connection), and
+  each execute / executemany / commit is timed into a histogram labelled by
+  the statement's fingerprint (literals and parameters replaced by ?, IN
+  lists and multi-row VALUES collapsed)
+- app.py times each page dispatch and page_registry times each show_*
+  function
+- the Diagnostics page (admins only) shows the numbers, and
+  prometheus_text() renders them in the Prometheus text format; with
+  METRICS_FILE set they are also written there every METRICS_FILE_INTERVAL
+  seconds for node_exporter's textfile collector
+
+Histograms use fixed buckets, so recording is a bisect and three additions
+under a lock, and memory grows only with the number of distinct statements.
+"""
+import functools
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+
+import streamlit as st
+
+log = logging.getLogger(__name__)
+
+# Upper bounds in seconds (Prometheus' default buckets, plus sub-millisecond ones for cache-hot statements)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+QUERY_SECONDS = "wellness_db_query_seconds"
+PAGE_SECONDS = "wellness_page_seconds"
+RENDER_SECONDS = "wellness_render_seconds"
+HELP = {
+    QUERY_SECONDS: ("statement", "Database statement latency by fingerprint."),
+    PAGE_SECONDS: ("page", "Full page dispatch in app.py, including lazy imports."),
+    RENDER_SECONDS: ("function", "Time inside each page's show_* function."),
+}
+
+_COMMENT = re.compile(r"/\*.*?\*/|--[^\n]*", re.S)
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_PARAM = re.compile(r"%\(\w+\)s|%s")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+")
+
+
+@functools.lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """Statement shape: `WHERE id IN (1, 2, 3)` and `WHERE id IN (%s)` both become `WHERE id IN (?+)`."""
+    sql = _COMMENT.sub(" ", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _SPACE.sub(" ", sql).strip()
+    sql = _LIST.sub("(?+)", sql)
+    return _ROWS.sub("(?+)", sql)
+
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimated q-quantile in seconds (linear within the bucket, like histogram_quantile)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lo = BUCKETS[i - 1] if i else 0.0
+                hi = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+class Metrics:
+    """Histograms keyed by (metric name, label value); safe to share between sessions."""
+
+    def __init__(self):
+        self._series = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def observe(self, metric, label, seconds):
+        key = (metric, label)
+        with self._lock:
+            hist = self._series.get(key)
+            if hist is None:
+                hist = self._series[key] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, metric, label):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Also recorded when the block ends in st.rerun() / st.stop()
+            self.observe(metric, label, time.perf_counter() - t0)
+
+    def rows(self, metric):
+        """[{label, count, mean_ms, p50_ms, p95_ms, p99_ms, total_s}] for one metric, slowest total first."""
+        with self._lock:
+            series = [(label, hist.count, hist.total, [hist.quantile(q) for q in (0.5, 0.95, 0.99)])
+                      for (name, label), hist in self._series.items() if name == metric]
+        out = [{"label": label, "count": count, "mean_ms": round(total / count * 1e3, 3),
+                "p50_ms": round(p50 * 1e3, 3), "p95_ms": round(p95 * 1e3, 3), "p99_ms": round(p99 * 1e3, 3),
+                "total_s": round(total, 3)}
+               for label, count, total, (p50, p95, p99) in series]
+        return sorted(out, key=lambda r: r["total_s"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self.started = time.time()
+
+    def prometheus_text(self, gauges=None):
+        """Every histogram (and any extra {name: value} gauges) in the Prometheus text exposition format."""
+        with self._lock:
+            snapshot = {key: (list(h.counts), h.total, h.count) for key, h in self._series.items()}
+        lines = []
+        for metric, (label_name, help_text) in HELP.items():
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+            for (name, label), (counts, total, count) in sorted(snapshot.items()):
+                if name != metric:
+                    continue
+                value = _escape(label)
+                cumulative = 0
+                for bound, n in zip(BUCKETS + ("+Inf",), counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{{label_name}="{value}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{{label_name}="{value}"}} {total:.6f}')
+                lines.append(f'{metric}_count{{{label_name}="{value}"}} {count}')
+        for name, value in (gauges or {}).items():
+            lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+# --- DB-API wrappers ---
+class InstrumentedCursor:
+    """Times execute / executemany; everything else goes straight to the driver's cursor."""
+
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+
+    def execute(self, operation, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, *args, **kwargs)
+        finally:
+            self._metrics.observe(QUERY_SECONDS, fingerprint(operation), time.perf_counter() - t0)
+
+    def executemany(self, operation, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, *args, **kwargs)
+        finally:
+            self._metrics.observe(QUERY_SECONDS, fingerprint(operation), time.perf_counter() - t0)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """Hands out InstrumentedCursors and times commits; the pool uses it like the raw connection."""
+
+    def __init__(self, conn, metrics):
+        self._conn = conn
+        self._metrics = metrics
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._metrics)
+
+    def commit(self):
+        with self._metrics.timer(QUERY_SECONDS, "COMMIT"):
+            return self._conn.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def instrument_connection(conn, metrics):
+    """`conn` wrapped for timing, or `conn` itself when metrics (get_metrics()) are off."""
+    return InstrumentedConnection(conn, metrics) if metrics else conn
+
+
+# --- process-wide registry ---
+def _export_loop(metrics, path, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            # Written beside the target and renamed, so the collector never reads half a file
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                f.write(metrics.prometheus_text(process_gauges()))
+            os.replace(tmp, path)
+        except Exception:
+            log.exception("Writing metrics to %s failed", path)
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics():
+    """The process's Metrics, or None unless the METRICS secret is enabled."""
+    if not st.secrets.get("METRICS", False):
+        return None
+    metrics = Metrics()
+    path = st.secrets.get("METRICS_FILE")
+    if path:
+        interval = float(st.secrets.get("METRICS_FILE_INTERVAL", 15))
+        threading.Thread(target=_export_loop, args=(metrics, path, interval), name="metrics-export",
+                         daemon=True).start()
+    return metrics
+
+
+def process_gauges():
+    """Pool, data cache and write-behind counters as flat gauge names."""
+    from data_cache import cache_stats
+    from database_manager import pool_stats
+    from write_behind import get_write_behind
+
+    gauges = {f"wellness_db_pool_{k}": v for k, v in pool_stats().items()}
+    gauges.update({f"wellness_data_cache_{k}": v for k, v in cache_stats().items()})
+    queue = get_write_behind()
+    if queue:
+        gauges.update({f"wellness_write_behind_{k}": v for k, v in queue.stats().items()})
+    return gauges
+
+
+def page_timer(page):
+    """Context manager timing one page dispatch (a no-op when metrics are off)."""
+    metrics = get_metrics()
+    return metrics.timer(PAGE_SECONDS, page) if metrics else nullcontext()
+
+
+def timed_render(fn):
+    """`fn` recording its own duration under its name, or `fn` itself when metrics are off."""
+    metrics = get_metrics()
+    if not metrics:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with metrics.timer(RENDER_SECONDS, fn.__name__):
+            return fn(*args, **kwargs)
+    return wrapper
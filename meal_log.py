@@ -0,0 +1,93 @@
+# meal_log.py
+"""
+Multi-item food logging for the Food Calculator.
+
+A meal basket is a list of (food, quantity) lines staged in session state.
+log_basket() computes the macros for every line in one vectorized catalog
+call, writes all food_logs rows with a single batched INSERT and adds the
+basket to the day's rollup in the same transaction.
+
+repeat_meal() copies an earlier meal (e.g. yesterday's breakfast) entirely
+server-side with INSERT ... SELECT, and updates the rollup the same way, so
+the rows never round-trip through Python.
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+
+from food_catalog import CAL, CARB, FAT, FIB, PRO
+from nutrition_rollup import add_to_totals, add_window_to_totals
+
+INSERT_FOOD_LOG = """INSERT INTO food_logs (username, food, qty, protein, carbs, fat, fiber, calories, date)
+                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+
+COPY_FOOD_LOGS = """INSERT INTO food_logs (username, food, qty, protein, carbs, fat, fiber, calories, date)
+                    SELECT username, food, qty, protein, carbs, fat, fiber, calories, %s
+                    FROM food_logs
+                    WHERE username = %s AND date >= %s AND date < %s
+                    ORDER BY id"""
+
+# Meals by IST wall-clock time of the log row, half-open [start, end)
+MEAL_WINDOWS = {
+    "Breakfast": (time(4), time(11)),
+    "Lunch": (time(11), time(16)),
+    "Snacks": (time(16), time(19)),
+    "Dinner": (time(19), None),  # until midnight
+}
+
+
+def basket_rows(catalog, username, lines, timestamp):
+    """
+    food_logs rows for basket `lines` [(food, quantity)], macros rounded the way
+    single-item logging always stored them.
+    """
+    foods = [food for food, _ in lines]
+    qty = np.array([q for _, q in lines], dtype=np.float64)
+    values = catalog.compute(catalog.rows(foods), qty)
+    macros = np.column_stack([values[:, [PRO, CARB, FAT, FIB]].round(1), values[:, CAL].astype(int)])
+    return [(username, food, f"{int(q)}{catalog.unit(food)}", *row[:4].tolist(), int(row[4]), timestamp)
+            for food, q, row in zip(foods, qty, macros)]
+
+
+def apply_food_logs(cursor, rows):
+    """
+    Insert food_logs `rows` (as built by basket_rows) with one batched INSERT and
+    add them to each (user, day)'s totals. Caller commits.
+    """
+    # mysql.connector rewrites an INSERT ... VALUES executemany into one multi-row statement
+    cursor.executemany(INSERT_FOOD_LOG, rows)
+    days = {}
+    for row in rows:
+        key = (row[0], str(row[8])[:10])  # IST calendar day of the timestamp
+        days[key] = days.get(key, np.zeros(6)) + np.array([*row[3:8], 1], dtype=np.float64)  # macros + count
+    for (username, day), totals in days.items():
+        add_to_totals(cursor, username, day, *[round(float(v), 1) for v in totals[:4]], int(totals[4]),
+                      items=int(totals[5]))
+
+
+def log_basket(cursor, catalog, username, lines, now):
+    """Insert every basket line and add them to `now`'s daily totals. Caller commits. Returns the row count."""
+    if not lines:
+        return 0
+    rows = basket_rows(catalog, username, lines, now.strftime('%Y-%m-%d %H:%M:%S'))
+    apply_food_logs(cursor, rows)
+    return len(rows)
+
+
+def meal_window(meal, day):
+    """[start, end) datetimes of `meal` on `day`."""
+    start, end = MEAL_WINDOWS[meal]
+    return (datetime.combine(day, start),
+            datetime.combine(day, end) if end else datetime.combine(day + timedelta(days=1), time(0)))
+
+
+def repeat_meal(cursor, username, meal, from_day, now):
+    """
+    Copy the user's `meal` rows from `from_day` to `now`, rollup included. Caller
+    commits. Returns the number of rows copied (0 if there was nothing to repeat).
+    """
+    start, end = meal_window(meal, from_day)
+    # Totals first: the source window is unchanged by the copy, which lands on `now`
+    add_window_to_totals(cursor, username, now.date(), start, end)
+    cursor.execute(COPY_FOOD_LOGS, (now.strftime('%Y-%m-%d %H:%M:%S'), username, start, end))
+    return cursor.rowcount
@@ -0,0 +1,270 @@
+# migrations.py
+"""
+Versioned schema migrations for the Smart Wellness MySQL database.
+
+Each migration has a number, a description and a list of steps (SQL strings
+or callables taking the connection). Applied versions are recorded in the
+`schema_version` table, so running this again is a no-op.
+
+Run once per server process via run_migrations_once() (app.py does this at
+startup), or from the command line:
+
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # list applied / pending versions
+"""
+import argparse
+
+import streamlit as st
+
+from checkins import compact as compact_check_ins
+from database_manager import get_pool
+
+# Advisory lock so two server processes starting together don't race each other
+LOCK_NAME = "smart_wellness_schema_migrations"
+LOCK_TIMEOUT = 60
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute("""SELECT 1 FROM information_schema.COLUMNS
+                      WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s""",
+                   (table, column))
+    return cursor.fetchone() is not None
+
+
+def add_column(table, column, definition):
+    """Step that adds a column unless an older deployment already created it by hand."""
+    def step(conn):
+        c = conn.cursor(buffered=True)
+        if not _column_exists(c, table, column):
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+
+def rename_column(table, old, new, definition):
+    """Step that renames a column if the old name is still present."""
+    def step(conn):
+        c = conn.cursor(buffered=True)
+        if _column_exists(c, table, old) and not _column_exists(c, table, new):
+            c.execute(f"ALTER TABLE {table} CHANGE COLUMN {old} {new} {definition}")
+    return step
+
+
+def _index_exists(cursor, table, name):
+    cursor.execute("""SELECT 1 FROM information_schema.STATISTICS
+                      WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s""",
+                   (table, name))
+    return cursor.fetchone() is not None
+
+
+def add_index(table, name, columns, unique=False):
+    """Step that creates a secondary index unless it already exists."""
+    def step(conn):
+        c = conn.cursor(buffered=True)
+        if not _index_exists(c, table, name):
+            c.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({columns})")
+    return step
+
+
+def drop_index(table, name):
+    """Step that drops an index if it is still there."""
+    def step(conn):
+        c = conn.cursor(buffered=True)
+        if _index_exists(c, table, name):
+            c.execute(f"DROP INDEX {name} ON {table}")
+    return step
+
+
+def _compact_check_ins(conn):
+    compact_check_ins(conn, log=lambda msg: None)
+
+
+MIGRATIONS = [
+    (1, "Baseline tables (accounts, profiles, food_logs, compliance_data, water_history)", [
+        '''CREATE TABLE IF NOT EXISTS accounts
+           (username VARCHAR(255) PRIMARY KEY,
+            password VARCHAR(255))''',
+        '''CREATE TABLE IF NOT EXISTS profiles
+           (username VARCHAR(255) PRIMARY KEY,
+            name VARCHAR(255),
+            age INT,
+            weight FLOAT,
+            height FLOAT,
+            gender VARCHAR(50),
+            act_val INT,
+            diet VARCHAR(100),
+            goal VARCHAR(100),
+            cal INT)''',
+        '''CREATE TABLE IF NOT EXISTS food_logs
+           (id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(255),
+            food VARCHAR(255),
+            qty VARCHAR(100),
+            protein FLOAT,
+            carbs FLOAT,
+            fat FLOAT,
+            fiber FLOAT,
+            calories INT,
+            date DATETIME DEFAULT CURRENT_TIMESTAMP)''',
+        '''CREATE TABLE IF NOT EXISTS compliance_data
+           (id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(255),
+            date DATE,
+            water INT,
+            diet INT,
+            workout INT,
+            sleep INT,
+            total_score FLOAT)''',
+        '''CREATE TABLE IF NOT EXISTS water_history
+           (username VARCHAR(255),
+            date DATE,
+            consumed INT,
+            PRIMARY KEY(username, date))''',
+    ]),
+    (2, "profiles.act_val (database_setup.py used to call it `activity`)", [
+        rename_column("profiles", "activity", "act_val", "INT"),
+    ]),
+    (3, "Workout preference columns on profiles", [
+        add_column("profiles", "workout_level", "VARCHAR(100)"),
+        add_column("profiles", "workout_goal", "VARCHAR(100)"),
+        add_column("profiles", "workout_days", "INT"),
+        add_column("profiles", "workout_vars", "INT"),
+    ]),
+    # water_history is already covered by its (username, date) primary key
+    (4, "Per-user date indexes on food_logs and compliance_data", [
+        add_index("food_logs", "idx_food_logs_user_date", "username, date"),
+        add_index("compliance_data", "idx_compliance_user_date", "username, date, id"),
+    ]),
+    # Backfill existing logs afterwards with `python nutrition_rollup.py --rebuild`
+    (5, "daily_nutrition_totals rollup", [
+        '''CREATE TABLE IF NOT EXISTS daily_nutrition_totals
+           (username VARCHAR(255),
+            local_date DATE,
+            protein DOUBLE NOT NULL DEFAULT 0,
+            carbs DOUBLE NOT NULL DEFAULT 0,
+            fat DOUBLE NOT NULL DEFAULT 0,
+            fiber DOUBLE NOT NULL DEFAULT 0,
+            calories INT NOT NULL DEFAULT 0,
+            item_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY(username, local_date))''',
+    ]),
+    # Run `python checkins.py --compact` ahead of deploying to keep this step short
+    (6, "One compliance_data row per user per day, submissions audited in compliance_history", [
+        '''CREATE TABLE IF NOT EXISTS compliance_history
+           (id INT AUTO_INCREMENT PRIMARY KEY,
+            source_id INT NULL,
+            username VARCHAR(255),
+            date DATE,
+            water INT,
+            diet INT,
+            workout INT,
+            sleep INT,
+            total_score FLOAT,
+            submitted_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_history_source (source_id),
+            KEY idx_history_user_date (username, date))''',
+        _compact_check_ins,
+        add_index("compliance_data", "uq_compliance_user_date", "username, date", unique=True),
+        drop_index("compliance_data", "idx_compliance_user_date"),
+    ]),
+    # Filled nightly by `python plan_batch.py`; pages fall back to computing live when a row is missing
+    (7, "profiles.profile_version and the precomputed user_plans table", [
+        add_column("profiles", "profile_version", "INT NOT NULL DEFAULT 1"),
+        '''CREATE TABLE IF NOT EXISTS user_plans
+           (username VARCHAR(255),
+            profile_version INT,
+            target_kcal INT,
+            water_goal_ml INT,
+            diet_plan MEDIUMTEXT,
+            workout_plan TEXT,
+            computed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY(username, profile_version))''',
+    ]),
+    # Filled by `python food_archive.py`; path is relative to FOOD_ARCHIVE_DIR
+    (8, "food_log_archives registry and a date index for archiving closed months", [
+        '''CREATE TABLE IF NOT EXISTS food_log_archives
+           (month DATE,
+            part INT,
+            path VARCHAR(1024) NOT NULL,
+            row_count INT NOT NULL,
+            calories BIGINT NOT NULL,
+            max_id INT NOT NULL,
+            archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY(month, part))''',
+        add_index("food_logs", "idx_food_logs_date", "date"),
+    ]),
+    # Ids of write-behind entries already applied, written in the same transaction; pruned by write_behind.py
+    (9, "write_behind_applied idempotency keys for write-behind replay", [
+        '''CREATE TABLE IF NOT EXISTS write_behind_applied
+           (entry_id CHAR(32) PRIMARY KEY,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            KEY idx_applied_at (applied_at))''',
+    ]),
+]
+
+
+def _ensure_version_table(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS schema_version
+                      (version INT PRIMARY KEY,
+                       description VARCHAR(255),
+                       applied_at DATETIME DEFAULT CURRENT_TIMESTAMP)''')
+
+
+def applied_versions(conn):
+    c = conn.cursor(buffered=True)
+    _ensure_version_table(c)
+    c.execute("SELECT version FROM schema_version")
+    return {row[0] for row in c.fetchall()}
+
+
+def migrate(conn, log=print):
+    """Apply every pending migration in order. Returns the versions applied."""
+    c = conn.cursor(buffered=True)
+    c.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+    if c.fetchone()[0] != 1:
+        raise RuntimeError("Timed out waiting for another process to finish migrating.")
+    try:
+        done = applied_versions(conn)
+        applied = []
+        for version, description, steps in MIGRATIONS:
+            if version in done:
+                continue
+            log(f"Applying migration {version}: {description}")
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    c.execute(step)
+            c.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                      (version, description[:255]))
+            conn.commit()
+            applied.append(version)
+        return applied
+    finally:
+        c.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        c.fetchall()
+
+
+@st.cache_resource(show_spinner=False)
+def run_migrations_once():
+    """Bring the schema up to date once per server process; reruns never touch DDL."""
+    with get_pool().connection() as conn:
+        return migrate(conn, log=lambda msg: None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply Smart Wellness schema migrations.")
+    parser.add_argument("--status", action="store_true", help="show applied and pending versions only")
+    args = parser.parse_args(argv)
+
+    with get_pool().connection() as conn:
+        if args.status:
+            done = applied_versions(conn)
+            for version, description, _ in MIGRATIONS:
+                print(f"[{'x' if version in done else ' '}] {version:03d} {description}")
+            return
+        applied = migrate(conn)
+    print(f"✅ Schema up to date ({len(applied)} migration(s) applied).")
+
+
+if __name__ == "__main__":
+    main()
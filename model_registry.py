@@ -0,0 +1,85 @@
+# model_registry.py
+"""
+Versioned calorie-model artifacts.
+
+    models/
+      LATEST                      <- name of the newest version
+      20261018-153000/
+        model.pkl                 <- full sklearn forest (retraining, audits)
+        model.forest/             <- compact export served by the app (tree_ensemble.py)
+        metadata.json             <- feature order, sizes, training time, holdout error
+
+app.load_ml pins a version through the MODEL_VERSION secret, or follows LATEST.
+"""
+import json
+import os
+import pickle
+from datetime import datetime
+
+from tree_ensemble import export_forest, load_forest
+
+REGISTRY_DIR = "models"
+
+
+def save_artifact(model, metadata, registry=REGISTRY_DIR, check_rows=None):
+    """Write a new version and point LATEST at it. Returns the version name."""
+    version = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(registry, version)
+    suffix = 1
+    while os.path.exists(path):  # two runs within the same second
+        path = os.path.join(registry, f"{version}-{suffix}")
+        suffix += 1
+    version = os.path.basename(path)
+    os.makedirs(path)
+
+    with open(os.path.join(path, "model.pkl"), "wb") as f:
+        pickle.dump(model, f)
+    forest_meta = export_forest(model, os.path.join(path, "model.forest"), check_rows=check_rows)
+    metadata = dict(metadata, version=version, forest=forest_meta)
+    with open(os.path.join(path, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    # Atomic swap so a process starting mid-write never reads a half-written pointer
+    tmp = os.path.join(registry, "LATEST.tmp")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(registry, "LATEST"))
+    return version
+
+
+def list_versions(registry=REGISTRY_DIR):
+    if not os.path.isdir(registry):
+        return []
+    return sorted(name for name in os.listdir(registry)
+                  if os.path.isfile(os.path.join(registry, name, "metadata.json")))
+
+
+def resolve(version="latest", registry=REGISTRY_DIR):
+    """Directory of `version` ("latest" follows the LATEST pointer), or None."""
+    if version == "latest":
+        try:
+            with open(os.path.join(registry, "LATEST")) as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+    path = os.path.join(registry, version)
+    return path if os.path.isdir(path) else None
+
+
+def load_metadata(version="latest", registry=REGISTRY_DIR):
+    path = resolve(version, registry)
+    if path is None:
+        return None
+    with open(os.path.join(path, "metadata.json")) as f:
+        return json.load(f)
+
+
+def load_model(version="latest", registry=REGISTRY_DIR, compact=True):
+    """The compact forest (or the full sklearn model with compact=False); None if missing."""
+    path = resolve(version, registry)
+    if path is None:
+        return None
+    if compact and os.path.isdir(os.path.join(path, "model.forest")):
+        return load_forest(os.path.join(path, "model.forest"))
+    with open(os.path.join(path, "model.pkl"), "rb") as f:
+        return pickle.load(f)
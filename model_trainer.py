@@ -1,23 +1,135 @@
-import pandas as pd
+# model_trainer.py
+"""
+Trains the calorie RandomForestRegressor and publishes it to the model registry.
+
+    python model_trainer.py                                # 5,000 synthetic rows -> models/<version>/
+    python model_trainer.py --source profiles              # retrain on real profiles rows
+    python model_trainer.py --sweep 1000,5000,20000,50000  # time/accuracy table, nothing saved
+
+Runs are reproducible for a given --seed, and the forest is fit on all cores
+(--n-jobs). Each saved version records feature order, training time and
+holdout error in its metadata.json, and gets a precomputed calorie grid
+(calorie_grid.py) unless --no-grid is passed.
+"""
+import argparse
+import os
+import platform
+import time
+from datetime import datetime
+
 import numpy as np
+import pandas as pd
+import sklearn
 from sklearn.ensemble import RandomForestRegressor
-import pickle
-
-# Generate metabolic data for training
-np.random.seed(42)
-data = {
-    'age': np.random.randint(15, 80, 5000),
-    'weight': np.random.randint(40, 150, 5000),
-    'height': np.random.randint(140, 200, 5000),
-    'gender': np.random.randint(0, 2, 5000), # 0: Female, 1: Male
-    'activity': np.random.randint(1, 6, 5000)
-}
-df = pd.DataFrame(data)
-df['target'] = (10 * df['weight']) + (6.25 * df['height']) - (5 * df['age']) + (df['gender'] * 5) + (df['activity'] * 250)
-
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(df.drop('target', axis=1), df['target'])
-
-with open('wellness_model.pkl', 'wb') as f:
-    pickle.dump(model, f)
-print("✅ ML Model wellness_model.pkl created!")
\ No newline at end of file
+
+from calorie_grid import build_grid, save_grid
+from model_registry import REGISTRY_DIR, save_artifact
+
+# Column order the app passes to predict(): [[age, w, h, gender_val, act_val]]
+FEATURES = ["age", "weight", "height", "gender", "activity"]
+
+PROFILE_QUERY = """SELECT age, weight, height, gender, act_val, cal FROM profiles
+                   WHERE age IS NOT NULL AND weight IS NOT NULL AND height IS NOT NULL
+                     AND gender IS NOT NULL AND act_val IS NOT NULL AND cal IS NOT NULL"""
+
+
+def synthesize(rows, seed=42):
+    """Generate metabolic data for training (vectorized; seed 42 reproduces the original set)."""
+    rng = np.random.RandomState(seed)
+    X = np.column_stack([
+        rng.randint(15, 80, rows),    # age
+        rng.randint(40, 150, rows),   # weight
+        rng.randint(140, 200, rows),  # height
+        rng.randint(0, 2, rows),      # gender: 0 Female, 1 Male
+        rng.randint(1, 6, rows),      # activity
+    ]).astype(np.float32)
+    y = (10 * X[:, 1]) + (6.25 * X[:, 2]) - (5 * X[:, 0]) + (X[:, 3] * 5) + (X[:, 4] * 250)
+    return X, y.astype(np.float64)
+
+
+def load_profiles(chunk_size=10_000):
+    """Real profiles rows, streamed from the database in chunks straight into float32 arrays."""
+    from database_manager import get_pool
+
+    parts_X, parts_y = [], []
+    with get_pool().connection() as conn:
+        for chunk in pd.read_sql_query(PROFILE_QUERY, conn, chunksize=chunk_size):
+            gender = (chunk["gender"] == "Male").astype(np.float32)
+            parts_X.append(np.column_stack([chunk["age"], chunk["weight"], chunk["height"],
+                                            gender, chunk["act_val"]]).astype(np.float32))
+            parts_y.append(chunk["cal"].to_numpy(dtype=np.float64))
+    if not parts_X:
+        raise SystemExit("No complete profiles rows to train on.")
+    return np.concatenate(parts_X), np.concatenate(parts_y)
+
+
+def split(X, y, holdout, seed):
+    """Deterministic shuffled train/holdout split."""
+    order = np.random.RandomState(seed).permutation(len(X))
+    cut = len(X) - int(len(X) * holdout)
+    return X[order[:cut]], y[order[:cut]], X[order[cut:]], y[order[cut:]]
+
+
+def train(X, y, trees=100, n_jobs=-1, holdout=0.2, seed=42):
+    """Fit on the training split, score on the holdout. Returns (model, metrics)."""
+    X_train, y_train, X_test, y_test = split(X, y, holdout, seed)
+    model = RandomForestRegressor(n_estimators=trees, random_state=seed, n_jobs=n_jobs)
+    t0 = time.perf_counter()
+    model.fit(X_train, y_train)
+    train_seconds = time.perf_counter() - t0
+    metrics = {"rows": int(len(X)), "train_rows": int(len(X_train)), "holdout_rows": int(len(X_test)),
+               "train_seconds": round(train_seconds, 3)}
+    if len(X_test):
+        err = model.predict(X_test) - y_test
+        metrics["holdout_mae"] = round(float(np.mean(np.abs(err))), 3)
+        metrics["holdout_rmse"] = round(float(np.sqrt(np.mean(err ** 2))), 3)
+    return model, metrics
+
+
+def sweep(sizes, args):
+    """Training time vs. holdout error across dataset sizes, to pick a point on the curve."""
+    print(f"{'rows':>10} {'train s':>9} {'MAE kcal':>9} {'RMSE kcal':>10}")
+    for rows in sizes:
+        X, y = synthesize(rows, args.seed)
+        _, m = train(X, y, args.trees, args.n_jobs, args.holdout, args.seed)
+        print(f"{rows:>10,} {m['train_seconds']:>9.2f} {m.get('holdout_mae', float('nan')):>9.2f} "
+              f"{m.get('holdout_rmse', float('nan')):>10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", choices=["synthetic", "profiles"], default="synthetic")
+    parser.add_argument("--rows", type=int, default=5000, help="synthetic rows to generate")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="profiles rows per fetch")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="cores to fit on (-1 = all)")
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction held out for scoring")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    parser.add_argument("--no-grid", action="store_true", help="skip precomputing the calorie grid")
+    parser.add_argument("--sweep", help="comma-separated synthetic sizes to benchmark instead of saving")
+    args = parser.parse_args(argv)
+
+    if args.sweep:
+        sweep([int(s) for s in args.sweep.split(",")], args)
+        return
+
+    X, y = synthesize(args.rows, args.seed) if args.source == "synthetic" else load_profiles(args.chunk_size)
+    model, metrics = train(X, y, args.trees, args.n_jobs, args.holdout, args.seed)
+    metadata = dict(metrics, source=args.source, feature_order=FEATURES, trees=args.trees, seed=args.seed,
+                    n_jobs=args.n_jobs, sklearn_version=sklearn.__version__, python=platform.python_version(),
+                    trained_at=datetime.now().isoformat(timespec="seconds"))
+    version = save_artifact(model, metadata, registry=args.registry, check_rows=X[:5000])
+    print(f"✅ Model {version} saved to {args.registry}/ "
+          f"(train {metrics['train_seconds']}s, holdout MAE {metrics.get('holdout_mae')} kcal)")
+
+    if not args.no_grid:
+        t0 = time.perf_counter()
+        grid = build_grid(model)
+        meta = save_grid(grid, os.path.join(args.registry, version), model=model)
+        print(f"✅ Calorie grid {grid.shape} precomputed in {time.perf_counter() - t0:.1f}s "
+              f"(max error {meta['verified_max_abs_error']:.4f} kcal)")
+
+
+if __name__ == "__main__":
+    main()
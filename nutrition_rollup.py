@@ -0,0 +1,175 @@
+# nutrition_rollup.py
+"""
+Per-user, per-day nutrition totals kept in `daily_nutrition_totals`.
+
+Every Food Calculator insert adds its macros to the day's row in the same
+transaction, so the Daily Summary chart is a single primary-key read.
+Backfill (or repair) the table from the raw logs with:
+
+    python nutrition_rollup.py --rebuild [--user USERNAME]
+
+Days already moved to the Parquet archive (food_archive.py) keep their
+totals, except days of archived months that have rows in food_logs again
+(late writes, or a run stopped before its deletes): those are recomputed
+from the archive and the hot rows together.
+"""
+import argparse
+from datetime import date
+
+from database_manager import get_pool
+
+# local_date is the IST calendar day: food_logs.date is stored as IST wall-clock time
+ADD_TO_TOTALS = """INSERT INTO daily_nutrition_totals
+                       (username, local_date, protein, carbs, fat, fiber, calories, item_count)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                   ON DUPLICATE KEY UPDATE
+                       protein = protein + VALUES(protein),
+                       carbs = carbs + VALUES(carbs),
+                       fat = fat + VALUES(fat),
+                       fiber = fiber + VALUES(fiber),
+                       calories = calories + VALUES(calories),
+                       item_count = item_count + VALUES(item_count)"""
+
+# Server-side variant for rows copied with INSERT ... SELECT: sums a food_logs time window into a day's totals
+ADD_WINDOW_TO_TOTALS = """INSERT INTO daily_nutrition_totals
+                              (username, local_date, protein, carbs, fat, fiber, calories, item_count)
+                          SELECT %s, %s, COALESCE(SUM(protein), 0), COALESCE(SUM(carbs), 0), COALESCE(SUM(fat), 0),
+                                 COALESCE(SUM(fiber), 0), COALESCE(SUM(calories), 0), COUNT(*)
+                          FROM food_logs
+                          WHERE username = %s AND date >= %s AND date < %s
+                          HAVING COUNT(*) > 0
+                          ON DUPLICATE KEY UPDATE
+                              protein = protein + VALUES(protein),
+                              carbs = carbs + VALUES(carbs),
+                              fat = fat + VALUES(fat),
+                              fiber = fiber + VALUES(fiber),
+                              calories = calories + VALUES(calories),
+                              item_count = item_count + VALUES(item_count)"""
+
+DAY_TOTALS_QUERY = """SELECT protein, carbs, fat, fiber, calories, item_count
+                      FROM daily_nutrition_totals
+                      WHERE username = %s AND local_date = %s"""
+
+REBUILD_USERS = """INSERT INTO daily_nutrition_totals
+                       (username, local_date, protein, carbs, fat, fiber, calories, item_count)
+                   SELECT username, DATE(date), COALESCE(SUM(protein), 0), COALESCE(SUM(carbs), 0),
+                          COALESCE(SUM(fat), 0), COALESCE(SUM(fiber), 0), COALESCE(SUM(calories), 0), COUNT(*)
+                   FROM food_logs
+                   WHERE username IN ({users}) AND date >= %s
+                   GROUP BY username, DATE(date)"""
+
+# Days of archived months that have hot rows again, per user
+LATE_DAYS = """SELECT DISTINCT username, DATE(date) FROM food_logs
+               WHERE username IN ({users}) AND date < %s"""
+
+SET_TOTALS = """INSERT INTO daily_nutrition_totals
+                    (username, local_date, protein, carbs, fat, fiber, calories, item_count)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    protein = VALUES(protein),
+                    carbs = VALUES(carbs),
+                    fat = VALUES(fat),
+                    fiber = VALUES(fiber),
+                    calories = VALUES(calories),
+                    item_count = VALUES(item_count)"""
+
+MACROS = ["protein", "carbs", "fat", "fiber"]
+EPOCH = date(1970, 1, 1)
+
+
+def add_to_totals(cursor, username, local_date, protein, carbs, fat, fiber, calories, items=1):
+    """Add one logged item (or a basket of `items`) to the day's totals. Caller commits."""
+    cursor.execute(ADD_TO_TOTALS, (username, local_date, protein, carbs, fat, fiber, calories, items))
+
+
+def add_window_to_totals(cursor, username, local_date, start, end):
+    """Add the user's food_logs rows in [start, end) to `local_date`'s totals without fetching them. Caller commits."""
+    cursor.execute(ADD_WINDOW_TO_TOTALS, (username, local_date, username, start, end))
+
+
+def load_day_totals(conn, username, local_date):
+    """The day's totals as a dict, or None if nothing has been logged."""
+    c = conn.cursor(dictionary=True, buffered=True)
+    c.execute(DAY_TOTALS_QUERY, (username, local_date))
+    return c.fetchone()
+
+
+def late_totals(conn, users, until, root=None):
+    """
+    [(username, day, protein, carbs, fat, fiber, calories, items)] for the days
+    before `until` (the end of the archive) on which `users` have food_logs
+    rows, summed over the archived and hot rows together, each id once.
+    """
+    from food_archive import food_history
+
+    c = conn.cursor(buffered=True)
+    c.execute(LATE_DAYS.format(users=", ".join(["%s"] * len(users))), list(users) + [until])
+    late = {}
+    for user, day in c.fetchall():
+        late.setdefault(user, set()).add(day)
+    out = []
+    for user, days in late.items():
+        df = food_history(conn, user, min(days), until, root)
+        df = df[df["date"].dt.date.isin(list(days))].astype({col: float for col in MACROS} | {"calories": int})
+        sums = df.groupby(df["date"].dt.date).agg(**{col: (col, "sum") for col in MACROS + ["calories"]},
+                                                 items=("id", "size"))
+        out += [(user, day, *(float(row[col]) for col in MACROS), int(row["calories"]), int(row["items"]))
+                for day, row in sums.iterrows()]
+    return out
+
+
+def rebuild(conn, username=None, batch=500, since=None, root=None, log=print):
+    """
+    Recompute totals from food_logs, `batch` users per transaction so no single
+    statement holds locks on the whole table. Days from `since` on are rebuilt
+    from food_logs; it defaults to the end of the food_archive history. Days
+    before that are only touched where food_logs has rows for them, and are then
+    summed from the archive (under `root`) plus those rows (late_totals()).
+    """
+    from food_archive import archived_until
+
+    archived = archived_until(conn)
+    since = since or archived or EPOCH
+    late_until = min(since, archived) if archived else None
+    c = conn.cursor(buffered=True)
+    if username:
+        users = [username]
+    else:
+        c.execute("SELECT DISTINCT username FROM food_logs ORDER BY username")
+        users = [row[0] for row in c.fetchall()]
+        # NOT EXISTS, not NOT IN: a single NULL food_logs.username would make NOT IN match no row at all
+        c.execute("""DELETE FROM daily_nutrition_totals
+                     WHERE local_date >= %s
+                       AND NOT EXISTS (SELECT 1 FROM food_logs f WHERE f.username = daily_nutrition_totals.username)""",
+                  (since,))
+        conn.commit()
+
+    for start in range(0, len(users), batch):
+        chunk = users[start:start + batch]
+        marks = ", ".join(["%s"] * len(chunk))
+        c.execute(f"DELETE FROM daily_nutrition_totals WHERE username IN ({marks}) AND local_date >= %s",
+                  chunk + [since])
+        c.execute(REBUILD_USERS.format(users=marks), chunk + [since])
+        late = late_totals(conn, chunk, late_until, root) if late_until else []
+        if late:
+            c.executemany(SET_TOTALS, late)
+        conn.commit()
+        log(f"Rebuilt totals for {min(start + batch, len(users))}/{len(users)} users")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the daily_nutrition_totals rollup.")
+    parser.add_argument("--rebuild", action="store_true", help="recompute totals from food_logs")
+    parser.add_argument("--user", help="only rebuild this username")
+    parser.add_argument("--batch", type=int, default=500, help="users per transaction")
+    args = parser.parse_args(argv)
+    if not args.rebuild:
+        parser.error("nothing to do (pass --rebuild)")
+
+    with get_pool().connection() as conn:
+        rebuild(conn, username=args.user, batch=args.batch)
+    print("✅ daily_nutrition_totals rebuilt.")
+
+
+if __name__ == "__main__":
+    main()
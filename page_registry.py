@@ -0,0 +1,55 @@
+# page_registry.py
+"""
+Sidebar page name -> loader for the page's render function.
+
+Every page lives in its own module, imported by importlib on the first
+navigation to it (and served from sys.modules after that). Home and Login
+are drawn by app.py itself, so a visitor who never logs in never imports
+pandas, plotly, scipy, the MySQL connector or the calorie model.
+"""
+import importlib
+
+from instrumentation import timed_render
+
+
+def _lazy(module, function):
+    def load():
+        return getattr(importlib.import_module(module), function)
+    return load
+
+
+PAGES = {
+    "Enter Details": _lazy("profile_tab", "show_profile"),
+    "Food Calculator": _lazy("food_calculator_tab", "show_food_calculator"),
+    "Daily Summary": _lazy("daily_summary_tab", "show_daily_summary"),
+    "Diet Plan": _lazy("diet_plan_tab", "show_diet_plan"),
+    "Workout Recommendation": _lazy("workout_engine", "show_workout_recommendation"),
+    "Water Tracker": _lazy("water_tab", "show_water_tracker"),
+    "Daily Check-In": _lazy("check_in_tab", "show_check_in"),
+    "Progress Dashboard": _lazy("analytics_dashboard", "show_analytics"),
+}
+
+# Only listed for usernames in the ADMIN_USERS secret
+ADMIN_PAGES = {
+    "Diagnostics": _lazy("diagnostics_tab", "show_diagnostics"),
+}
+
+
+def is_admin(username):
+    """ADMIN_USERS may be a TOML list or a comma-separated string."""
+    import streamlit as st
+    admins = st.secrets.get("ADMIN_USERS", [])
+    if isinstance(admins, str):
+        admins = [a.strip() for a in admins.split(",")]
+    return bool(username) and username in admins
+
+
+def pages_for(username):
+    """Page names to offer a logged-in user, in sidebar order."""
+    return [*PAGES, *(ADMIN_PAGES if is_admin(username) else ())]
+
+
+def load_page(name):
+    """The (timed, when metrics are on) render function for `name`; KeyError for pages app.py draws itself."""
+    loader = PAGES.get(name) or ADMIN_PAGES[name]
+    return timed_render(loader())
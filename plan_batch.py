@@ -0,0 +1,171 @@
+# plan_batch.py
+"""
+Nightly precomputation of every user's derived plans into `user_plans`.
+
+For each profile the job stores the day's calorie target, the water goal,
+the full diet plan and the workout plan for the saved preferences, keyed by
+(username, profile_version). Every profile or workout-preference save bumps
+profiles.profile_version, so a stored row is only used while it matches;
+the Diet Plan and Workout pages read it with one primary-key lookup
+(get_user_plan) and fall back to computing live when it is missing. Targets
+come from the same UserProfile derivation the app does at login.
+
+    python plan_batch.py [--jobs 4] [--chunk 1000] [--full]
+
+Profiles are streamed with an unbuffered (server-side) cursor, derived in a
+process pool and upserted in chunks, each in its own transaction. Only
+profiles without a row for their current version are selected, so an
+interrupted run simply resumes where it stopped, and a nightly rerun only
+touches profiles that changed. --full recomputes everything.
+"""
+import argparse
+import json
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from data_cache import cached_read
+from database_manager import get_pool
+from diet_planner import DietPlanner, plan_from_dict as diet_from_dict, plan_to_dict as diet_to_dict
+from user_profile import COLUMNS, UserProfile
+from workout_plans import get_plan, plan_from_dict as workout_from_dict, plan_to_dict as workout_to_dict
+
+# username, profile_version, the UserProfile columns, then the workout preferences
+SOURCE_QUERY = """SELECT p.username, p.profile_version, """ + ", ".join(f"p.{col}" for col in COLUMNS) + """,
+                         p.workout_level, p.workout_goal, p.workout_days, p.workout_vars
+                  FROM profiles p
+                  {stale_join}
+                  WHERE p.cal IS NOT NULL AND p.weight IS NOT NULL {stale_filter}
+                  ORDER BY p.username"""
+STALE_JOIN = "LEFT JOIN user_plans u ON u.username = p.username AND u.profile_version = p.profile_version"
+STALE_FILTER = "AND u.username IS NULL"
+
+UPSERT_PLAN = """INSERT INTO user_plans
+                     (username, profile_version, target_kcal, water_goal_ml, diet_plan, workout_plan)
+                 VALUES (%s, %s, %s, %s, %s, %s)
+                 ON DUPLICATE KEY UPDATE
+                     target_kcal = VALUES(target_kcal),
+                     water_goal_ml = VALUES(water_goal_ml),
+                     diet_plan = VALUES(diet_plan),
+                     workout_plan = VALUES(workout_plan),
+                     computed_at = CURRENT_TIMESTAMP"""
+
+# Rows for superseded profile versions of the users just written
+DELETE_STALE = """DELETE u FROM user_plans u JOIN profiles p ON p.username = u.username
+                  WHERE u.username IN ({users}) AND u.profile_version <> p.profile_version"""
+
+USER_PLAN_QUERY = """SELECT u.target_kcal, u.water_goal_ml, u.diet_plan, u.workout_plan
+                     FROM user_plans u JOIN profiles p
+                       ON p.username = u.username AND p.profile_version = u.profile_version
+                     WHERE u.username = %s"""
+
+
+# --- derivation (runs in the worker processes) ---
+_planner = None
+
+
+def _init_worker(catalog_path, cache_root):
+    global _planner
+    from food_catalog import load_catalog
+    _planner = DietPlanner(load_catalog(catalog_path, cache_root))
+
+
+def derive(row, planner):
+    """One profiles row -> one user_plans row."""
+    username, version = row[:2]
+    w_level, w_goal, w_days, w_vars = row[-4:]
+    # Same derivation the app does at login, with defaults for fields older rows left empty
+    name, age, weight, height, gender, act_val, diet, goal, cal = row[2:-4]
+    u = UserProfile(username, name, age or 0, weight, height or 0, gender, act_val or 0, diet, goal, cal)
+    diet_plan = planner.plan(u.target_kcal, u.goal, u.diet)
+    workout = None
+    if w_level:
+        plan, _ = get_plan(w_level, w_goal, w_days or 4, w_vars or 4)
+        workout = json.dumps(workout_to_dict(plan))
+    return (username, version, u.target_kcal, u.water_ml,
+            json.dumps(diet_to_dict(diet_plan), ensure_ascii=False), workout)
+
+
+def _derive_chunk(rows):
+    return [derive(row, _planner) for row in rows]
+
+
+# --- batch job ---
+def write_chunk(conn, plans):
+    c = conn.cursor()
+    c.executemany(UPSERT_PLAN, plans)
+    c.execute(DELETE_STALE.format(users=", ".join(["%s"] * len(plans))), [p[0] for p in plans])
+    conn.commit()
+
+
+def run(pool, jobs=4, chunk=1000, full=False, catalog_path=None, cache_root=".food_cache", log=print):
+    """Derive and store plans for every stale (or, with full, every) profile. Returns rows written."""
+    sql = SOURCE_QUERY.format(stale_join="" if full else STALE_JOIN, stale_filter="" if full else STALE_FILTER)
+    written, t0 = 0, time.perf_counter()
+    # Two connections: the streaming read must stay open while chunks are written
+    with pool.connection() as read_conn, pool.connection() as write_conn, \
+            ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(catalog_path, cache_root)) as ex:
+        cursor = read_conn.cursor()  # unbuffered: rows arrive as the server sends them
+        cursor.execute(sql)
+        inflight = deque()
+
+        def drain_one():
+            nonlocal written
+            plans = inflight.popleft().result()
+            write_chunk(write_conn, plans)
+            written += len(plans)
+            elapsed = time.perf_counter() - t0
+            log(f"{written:,} plan rows written ({written / elapsed:,.0f} rows/s)")
+
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                break
+            inflight.append(ex.submit(_derive_chunk, rows))
+            if len(inflight) >= jobs * 2:  # bounded, so memory stays flat however many profiles exist
+                drain_one()
+        while inflight:
+            drain_one()
+    return written
+
+
+def get_user_plan(username):
+    """
+    The user's precomputed plans for their current profile version, or None.
+    Cached until the user's next write (profile saves bump the data version).
+    A miss is not cached, so a row the nightly job writes later is picked up
+    on the next rerun.
+    """
+    def load():
+        with get_pool().connection() as conn:
+            c = conn.cursor(buffered=True)
+            c.execute(USER_PLAN_QUERY, (username,))
+            row = c.fetchone()
+        if row is None:
+            return None
+        target, water_goal, diet_json, workout_json = row
+        return {"target_kcal": target, "water_goal_ml": water_goal,
+                "diet": diet_from_dict(json.loads(diet_json)),
+                "workout": workout_from_dict(json.loads(workout_json)) if workout_json else None}
+
+    return cached_read(username, "user_plan", load, cache_none=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=4, help="worker processes")
+    parser.add_argument("--chunk", type=int, default=1000, help="profiles per worker task and per transaction")
+    parser.add_argument("--full", action="store_true", help="recompute every profile, not just stale ones")
+    args = parser.parse_args(argv)
+
+    import streamlit as st
+
+    t0 = time.perf_counter()
+    written = run(get_pool(), args.jobs, args.chunk, args.full,
+                  st.secrets.get("FOOD_CATALOG_PATH"), st.secrets.get("FOOD_CATALOG_CACHE", ".food_cache"))
+    elapsed = time.perf_counter() - t0
+    print(f"✅ {written:,} user plan(s) in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# profile_tab.py
+import streamlit as st
+import pickle
+import os
+from database_manager import db_connection # Pooled MySQL connections
+from data_cache import bump_version
+from tree_ensemble import load_forest
+from calorie_grid import CaloriePredictor, load_predictor
+from user_profile import COLUMNS, UserProfile
+
+@st.cache_resource
+def load_ml():
+    # Registry version pinned by MODEL_VERSION, else the newest one trained by model_trainer.py
+    # served from its precomputed calorie grid with the live forest as fallback
+    try:
+        registered = load_predictor(st.secrets.get("MODEL_VERSION", "latest"))
+        if registered is not None:
+            return registered
+    except Exception:
+        pass
+    # Older deployments: prefer the memory-mapped compact export, then the plain pickle
+    if os.path.isdir('wellness_model.forest'):
+        try:
+            return CaloriePredictor(load_forest('wellness_model.forest'))
+        except Exception:
+            pass
+    if os.path.exists('wellness_model.pkl'):
+        try:
+            with open('wellness_model.pkl', 'rb') as f:
+                return CaloriePredictor(pickle.load(f))
+        except Exception:
+            return None
+    return None
+
+def show_profile():
+    model = load_ml()  # loaded on the first visit to this page, then cached per process
+    st.title("🧑‍⚕️ User Profile")
+    if model is None: st.error("No trained model found! Run `python model_trainer.py` first.")
+    u = st.session_state.user
+    curr = {field: getattr(u, field) for field in COLUMNS} if u else {}
+    with st.form("ml_form"):
+        name = st.text_input("Full Name", value=curr.get("name", ""))
+        age = st.number_input("Age", 15, 90, value=int(curr.get("age", 25)))
+        w = st.number_input("Weight (kg)", 30.0, 200.0, value=float(curr.get("weight", 70.0)))
+        h = st.number_input("Height (cm)", 120.0, 220.0, value=float(curr.get("height", 175.0)))
+        genders = ["Male", "Female"]
+        gen = st.selectbox("Gender", genders, index=genders.index(curr.get("gender", "Male")))
+        acts = ["1: Sedentary", "2: Lightly Active", "3: Moderately Active", "4: Very Active", "5: Extra Active"]
+        act_label = st.selectbox("Activity Level", acts, index=next((i for i, s in enumerate(acts) if s.startswith(str(curr.get("act_val", 3)))), 2))
+        diets = ["Pure Veg", "Non-Veg", "Combined"]
+        diet_pref = st.selectbox("Dietary Preference", diets, index=diets.index(curr.get("diet", "Combined")))
+        goals = ["Maintain Weight", "Lose Weight", "Gain Weight"]
+        goal = st.selectbox("Your Goal", goals, index=goals.index(curr.get("goal", "Maintain Weight")))
+        if st.form_submit_button("Save & Predict"):
+            act_val = int(act_label.split(":")[0])
+            gender_val = 1 if gen == "Male" else 0
+            if model:
+                pred = int(model.predict_one(age, w, h, gender_val, act_val))
+                # Targets (kcal, per-meal kcal, macros, water) are derived once, here, for every page
+                profile = UserProfile(st.session_state.username, name, age, w, h, gen, act_val, diet_pref, goal, pred)
+                with db_connection() as conn:
+                    if conn is None: st.stop()
+                    c = conn.cursor()
+                    # Upsert instead of REPLACE: keeps the saved workout_* columns, and bumps
+                    # profile_version so precomputed user_plans rows for the old profile stop matching
+                    c.execute('''INSERT INTO profiles (username, name, age, weight, height, gender, act_val, diet, goal, cal) 
+                                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                                 ON DUPLICATE KEY UPDATE name = VALUES(name), age = VALUES(age), weight = VALUES(weight),
+                                     height = VALUES(height), gender = VALUES(gender), act_val = VALUES(act_val),
+                                     diet = VALUES(diet), goal = VALUES(goal), cal = VALUES(cal),
+                                     profile_version = profile_version + 1''', (st.session_state.username, name, age, w, h, gen, act_val, diet_pref, goal, pred))
+                    conn.commit(); bump_version(st.session_state.username)
+                st.session_state.user = profile; st.success(f"Profile saved for {name}!")
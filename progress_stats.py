@@ -0,0 +1,156 @@
+# progress_stats.py
+"""
+Progress Dashboard aggregates, computed in MySQL.
+
+The dashboard never loads a user's raw check-in history. It asks for:
+- summary(): row count, date span and per-component averages for the range
+- series(): the score at a resolution chosen for the range. Days come with
+  rolling 7- and 30-day means (window functions, MySQL 8); weeks and months
+  come as bucket means.
+
+Check-ins still in the write-behind queue are laid over a day series with
+apply_check_ins(), which recomputes the rolling means with the same windows
+from the series plus the 29 days before it (lead_in()).
+
+All of these read the (username, date) unique key. Whatever comes back is
+capped at MAX_POINTS with largest-triangle-three-buckets (lttb), which keeps
+the peaks and dips a plain stride would drop.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+RESOLUTIONS = ("Day", "Week", "Month")
+MAX_POINTS = 1500   # per trace sent to the browser
+WEBGL_POINTS = 500  # above this the chart uses Scattergl
+EPOCH = date(1970, 1, 1)  # "all time" lower bound
+
+SUMMARY_QUERY = """SELECT COUNT(*), MIN(date), MAX(date), AVG(total_score),
+                          AVG(water), AVG(diet), AVG(workout), AVG(sleep)
+                   FROM compliance_data
+                   WHERE username = %s AND date >= %s"""
+
+# The inner query starts 29 days early so the first visible day has a full 30-day window
+DAILY_QUERY = """SELECT date, total_score, rolling_7, rolling_30 FROM (
+                     SELECT date, total_score,
+                            AVG(total_score) OVER (ORDER BY date RANGE BETWEEN INTERVAL 6 DAY PRECEDING AND CURRENT ROW) AS rolling_7,
+                            AVG(total_score) OVER (ORDER BY date RANGE BETWEEN INTERVAL 29 DAY PRECEDING AND CURRENT ROW) AS rolling_30
+                     FROM compliance_data
+                     WHERE username = %s AND date >= %s
+                 ) d
+                 WHERE date >= %s
+                 ORDER BY date"""
+
+# Buckets are labelled by their first day (Monday / the 1st)
+BUCKETS = {
+    "Week": "DATE_SUB(date, INTERVAL WEEKDAY(date) DAY)",
+    "Month": "DATE_SUB(date, INTERVAL DAYOFMONTH(date) - 1 DAY)",
+}
+BUCKET_QUERY = """SELECT {bucket} AS bucket, AVG(total_score), COUNT(*)
+                  FROM compliance_data
+                  WHERE username = %s AND date >= %s
+                  GROUP BY bucket
+                  ORDER BY bucket"""
+
+LEAD_IN_QUERY = """SELECT date, total_score FROM compliance_data
+                   WHERE username = %s AND date >= %s AND date < %s
+                   ORDER BY date"""
+
+SERIES_COLUMNS = ["Date", "Score", "7-day mean", "30-day mean", "Check-ins"]
+MEANS = (("7-day mean", 7), ("30-day mean", 30))  # same windows as DAILY_QUERY
+
+
+def resolution_for(span_days):
+    """Finest bucket that keeps the range to a few hundred points."""
+    if span_days <= 180:
+        return "Day"
+    if span_days <= 3 * 365:
+        return "Week"
+    return "Month"
+
+
+def summary(conn, username, start=EPOCH):
+    """{'count', 'first', 'last', 'score', 'water', 'diet', 'workout', 'sleep'}; averages are None without rows."""
+    c = conn.cursor(buffered=True)
+    c.execute(SUMMARY_QUERY, (username, start))
+    count, first, last, score, water, diet, workout, sleep = c.fetchone()
+    to_float = lambda v: None if v is None else float(v)
+    return {"count": count, "first": first, "last": last, "score": to_float(score), "water": to_float(water),
+            "diet": to_float(diet), "workout": to_float(workout), "sleep": to_float(sleep)}
+
+
+def series(conn, username, resolution, start=EPOCH):
+    """SERIES_COLUMNS frame at `resolution`; the rolling means are only filled in for "Day"."""
+    c = conn.cursor(buffered=True)
+    if resolution == "Day":
+        c.execute(DAILY_QUERY, (username, max(EPOCH, start - timedelta(days=29)), start))
+        rows = [(d, score, r7, r30, 1) for d, score, r7, r30 in c.fetchall()]
+    else:
+        c.execute(BUCKET_QUERY.format(bucket=BUCKETS[resolution]), (username, start))
+        rows = [(d, score, None, None, n) for d, score, n in c.fetchall()]
+    df = pd.DataFrame(rows, columns=SERIES_COLUMNS)
+    for col in SERIES_COLUMNS[1:4]:
+        df[col] = df[col].astype(float)  # DECIMAL averages arrive as Decimal
+    df["Date"] = pd.to_datetime(df["Date"])
+    return df
+
+
+def lead_in(conn, username, start):
+    """Scores of the 29 days before `start` (a Series by date), the rest of the first rows' 30-day windows."""
+    c = conn.cursor(buffered=True)
+    c.execute(LEAD_IN_QUERY, (username, max(EPOCH, start - timedelta(days=29)), start))
+    rows = c.fetchall()
+    return pd.Series([float(score) for _, score in rows], index=pd.to_datetime([d for d, _ in rows]), dtype=float)
+
+
+def apply_check_ins(df, queued, lead):
+    """
+    Day series with queued {Timestamp: score} check-ins replacing (or adding)
+    their day's score, and both rolling means recomputed over `lead` (lead_in())
+    plus the series. Returns a new frame; `df` may be a shared cached one.
+    """
+    scores = df.set_index("Date")["Score"].astype(float)
+    for day, score in queued.items():
+        scores.loc[day] = score
+    scores = scores.sort_index()
+    history = pd.concat([lead, scores]).sort_index()
+    out = pd.DataFrame({"Date": scores.index, "Score": scores.to_numpy()})
+    for col, days in MEANS:
+        out[col] = history.rolling(f"{days}D").mean().loc[scores.index].to_numpy()
+    out["Check-ins"] = 1
+    return out[SERIES_COLUMNS]
+
+
+def lttb(x, y, threshold):
+    """
+    Indices of the `threshold` points of (x, y) picked by largest-triangle-three-buckets.
+    The first and last points are always kept; series already within the budget are returned whole.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Interior points split into threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Third vertex: the mean of the next bucket (the last point for the final bucket)
+        nlo, nhi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(df, max_points=MAX_POINTS):
+    """At most max_points rows of a series frame, chosen by lttb on the score."""
+    if len(df) <= max_points:
+        return df
+    x = df["Date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    return df.iloc[lttb(x, df["Score"].to_numpy(), max_points)].reset_index(drop=True)
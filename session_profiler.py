@@ -0,0 +1,174 @@
+# session_profiler.py
+"""
+Opt-in sampling profiler for one user's session.
+
+Send the user a link ending in `?profile=<PROFILE_TOKEN>` (or use the
+Diagnostics page for your own session) and the next rerun of that session,
+i.e. the page the link opens, is sampled once. Add `&profile_mode=session`
+to sample every rerun instead, until `?profile=off` or logout. Each
+profiled rerun writes two files to PROFILE_DIR (default .profiles/):
+
+- <stamp>-<page>-<user hash>.collapsed: folded stacks ("a;b;c 12" per
+  line), readable by flamegraph.pl, speedscope and most flamegraph tools
+- the same name with .json: page, username hash, wall time, sample count,
+  and the user's row count in each per-user table, i.e. the data shape that
+  made the page slow (counted on the session's first profiled rerun only)
+
+Sampling runs in a separate thread that reads the script thread's frame
+every PROFILE_INTERVAL_MS (default 2), so the profiled rerun runs at close
+to normal speed. When a session isn't flagged, profile_rerun() returns a
+nullcontext after one session_state lookup; no thread, hook or import is
+involved.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+import streamlit as st
+
+log = logging.getLogger(__name__)
+
+# Per-user tables whose size shapes the pages' queries
+USER_TABLES = ("food_logs", "daily_nutrition_totals", "compliance_data", "water_history", "user_plans")
+MAX_DEPTH = 200
+# st.session_state.profiling: "once" samples the next rerun and clears itself, "session" keeps sampling
+PROFILE_MODES = ("once", "session")
+
+
+class SamplingProfiler:
+    """Folded stacks of one thread, sampled from another thread every `interval` seconds."""
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def user_hash(username):
+    """Stable, non-reversible id for file names and metadata."""
+    return hashlib.sha256((username or "anonymous").encode()).hexdigest()[:12]
+
+
+def table_rows(username):
+    """{table: this user's row count}; errors are recorded, never raised."""
+    from database_manager import get_pool
+
+    counts = {}
+    try:
+        with get_pool().connection() as conn:
+            c = conn.cursor(buffered=True)
+            for table in USER_TABLES:
+                c.execute(f"SELECT COUNT(*) FROM {table} WHERE username = %s", (username,))
+                counts[table] = c.fetchone()[0]
+    except Exception as e:
+        counts["error"] = str(e)
+    return counts
+
+
+def save(profiler, page, username, started, elapsed, directory, tables=None):
+    """Write the .collapsed and .json pair; returns the .collapsed path. `tables` skips table_rows()."""
+    os.makedirs(directory, exist_ok=True)
+    uid = user_hash(username)
+    slug = re.sub(r"[^a-z0-9]+", "-", page.lower()).strip("-")
+    stem = os.path.join(directory, f"{started:%Y%m%d-%H%M%S-%f}-{slug}-{uid}")
+    with open(stem + ".collapsed", "w") as f:
+        f.write(profiler.collapsed())
+    meta = {"page": page, "user": uid, "started": started.isoformat(timespec="seconds"),
+            "wall_ms": round(elapsed * 1e3, 1), "samples": profiler.samples,
+            "interval_ms": profiler.interval * 1e3, "tables": tables if tables is not None else table_rows(username) if username else {}}
+    with open(stem + ".json", "w") as f:
+        json.dump(meta, f, indent=2)
+    return stem + ".collapsed"
+
+
+def toggle_from_query():
+    """Honour ?profile=<PROFILE_TOKEN>[&profile_mode=session] / ?profile=off, then drop them from the URL."""
+    value = st.query_params.get("profile")
+    mode = st.query_params.get("profile_mode", "once")
+    token = st.secrets.get("PROFILE_TOKEN")
+    if value == "off":
+        st.session_state.profiling = False
+    elif token and value and hmac.compare_digest(value, token):
+        st.session_state.profiling = mode if mode in PROFILE_MODES else "once"
+    del st.query_params["profile"]
+    if "profile_mode" in st.query_params:
+        del st.query_params["profile_mode"]
+
+
+def profile_rerun(page):
+    """Context manager sampling this rerun when the session is flagged, otherwise a no-op."""
+    mode = st.session_state.get("profiling")
+    if not mode:
+        return nullcontext()
+    if mode == "once":
+        st.session_state.profiling = False  # before the page runs, so a failing or st.rerun() page still clears it
+    return _profiled(page)
+
+
+@contextmanager
+def _profiled(page):
+    profiler = SamplingProfiler(threading.get_ident(),
+                                float(st.secrets.get("PROFILE_INTERVAL_MS", 2)) / 1000).start()
+    started, t0 = datetime.now(), time.perf_counter()
+    try:
+        yield
+    finally:
+        # Also reached when the rerun ends in st.rerun() / st.stop()
+        elapsed = time.perf_counter() - t0
+        profiler.stop()
+        try:
+            username = st.session_state.get("username")
+            # The row counts describe the user, not the rerun: count once per session and user
+            counted = st.session_state.get("profile_tables")
+            if not counted or counted[0] != username:
+                counted = st.session_state.profile_tables = (username, table_rows(username) if username else {})
+            save(profiler, page, username, started, elapsed, st.secrets.get("PROFILE_DIR", ".profiles"), counted[1])
+        except Exception:
+            log.exception("Saving the profile for %s failed", page)
+
+
+def recent_profiles(directory, limit=20):
+    """[(collapsed path, metadata dict)] newest first."""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted((n for n in os.listdir(directory) if n.endswith(".json")), reverse=True)[:limit]
+    out = []
+    for name in names:
+        with open(os.path.join(directory, name)) as f:
+            out.append((os.path.join(directory, name[:-len(".json")] + ".collapsed"), json.load(f)))
+    return out
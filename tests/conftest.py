@@ -0,0 +1,97 @@
+# tests/conftest.py
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from datetime import date
+
+import pytest
+
+# The app's modules live at the repository root, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}$")
+
+
+class SQLiteCursor:
+    """MySQL paramstyle over sqlite3; DATE()/MAX() results come back as dates."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, sql, params=()):
+        self.cursor.execute(sql.replace("%s", "?"), params)
+
+    def executemany(self, sql, seq):
+        self.cursor.executemany(sql.replace("%s", "?"), seq)
+
+    def _row(self, row):
+        return row and tuple(date.fromisoformat(v) if isinstance(v, str) and ISO_DATE.match(v) else v for v in row)
+
+    def fetchone(self):
+        return self._row(self.cursor.fetchone())
+
+    def fetchmany(self, size):
+        return [self._row(r) for r in self.cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(r) for r in self.cursor.fetchall()]
+
+    def close(self):
+        self.cursor.close()
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+
+class SQLiteConnection:
+    """An in-memory sqlite3 database behind the slice of the mysql.connector API the modules use."""
+
+    def __init__(self, schema):
+        self.db = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
+        self.db.executescript(schema)
+
+    def cursor(self, **kwargs):
+        return SQLiteCursor(self.db.cursor())
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+
+@pytest.fixture
+def sqlite_db():
+    """Factory: sqlite_db(schema DDL) -> SQLiteConnection."""
+    return SQLiteConnection
+
+
+@pytest.fixture(scope="session")
+def mysql_pool():
+    """
+    Pool onto the local MySQL the benchmarks use (WELLNESS_BENCH_DB_* settings); skips when none is reachable.
+    benchmarks.mysql_standin also connects, but it serializes every writer, so lost updates can't happen there.
+    """
+    import mysql.connector
+
+    from benchmarks.local_db import add_db_arguments, connect_pool
+    from migrations import migrate
+
+    parser = argparse.ArgumentParser()
+    add_db_arguments(parser)
+    args = parser.parse_args([])
+    try:
+        pool = connect_pool(args, size=32)
+        with pool.connection() as conn:
+            migrate(conn, log=lambda msg: None)
+    except mysql.connector.Error as e:
+        pytest.skip(f"no MySQL server at {args.host}:{args.port} ({e})")
+    yield pool
+    pool.dispose()
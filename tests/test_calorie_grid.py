@@ -0,0 +1,41 @@
+# tests/test_calorie_grid.py
+"""recompute_profiles against the stale-plan join plan_batch and get_user_plan use (SQLite, conftest.py)."""
+import numpy as np
+
+from calorie_grid import recompute_profiles
+from plan_batch import SOURCE_QUERY, STALE_FILTER, STALE_JOIN, USER_PLAN_QUERY
+
+SCHEMA = """
+    CREATE TABLE profiles (username TEXT PRIMARY KEY, name TEXT, age INT, weight REAL, height REAL, gender TEXT,
+                           act_val INT, diet TEXT, goal TEXT, cal INT, workout_level TEXT, workout_goal TEXT,
+                           workout_days INT, workout_vars INT, profile_version INT NOT NULL DEFAULT 1);
+    CREATE TABLE user_plans (username TEXT, profile_version INT, target_kcal INT, water_goal_ml INT,
+                             diet_plan TEXT, workout_plan TEXT, PRIMARY KEY (username, profile_version));
+    INSERT INTO profiles (username, name, age, weight, height, gender, act_val, diet, goal, cal)
+        VALUES ('ana', 'Ana', 31, 60.0, 165.0, 'Female', 3, 'Combined', 'Maintain Weight', 2000);
+    INSERT INTO user_plans VALUES ('ana', 1, 2000, 2100, '{}', NULL);
+"""
+STALE = SOURCE_QUERY.format(stale_join=STALE_JOIN, stale_filter=STALE_FILTER)
+
+
+class FixedModel:
+    def predict(self, X):
+        return np.full(len(X), 2400.0)
+
+
+def test_recompute_makes_the_stored_plan_stale(sqlite_db):
+    conn = sqlite_db(SCHEMA)
+    c = conn.cursor()
+    c.execute(STALE)
+    assert c.fetchall() == []
+    c.execute(USER_PLAN_QUERY, ("ana",))
+    assert c.fetchone() is not None
+
+    assert recompute_profiles(conn, FixedModel(), log=lambda msg: None) == 1
+
+    c.execute("SELECT cal, profile_version FROM profiles WHERE username = 'ana'")
+    assert c.fetchone() == (2400, 2)
+    c.execute(USER_PLAN_QUERY, ("ana",))
+    assert c.fetchone() is None  # the plan built for 2000 kcal is no longer served
+    c.execute(STALE)
+    assert [row[0] for row in c.fetchall()] == ["ana"]  # and the next plan_batch run rebuilds it
@@ -0,0 +1,41 @@
+# tests/test_data_cache.py
+from data_cache import UserDataCache
+
+
+def _counting(value):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return value
+    return load, calls
+
+
+def test_entries_are_reused_until_bump():
+    cache = UserDataCache(1 << 20)
+    load, calls = _counting({"kcal": 2000})
+    assert cache.get_or_load("ana", "plan", load) == {"kcal": 2000}
+    cache.get_or_load("ana", "plan", load)
+    assert len(calls) == 1
+    cache.bump("ana")
+    cache.get_or_load("ana", "plan", load)
+    assert len(calls) == 2
+
+
+def test_misses_are_not_kept_when_cache_none_is_off():
+    cache = UserDataCache(1 << 20)
+    missing, calls = _counting(None)
+    cache.get_or_load("ana", "plan", missing, cache_none=False)
+    cache.get_or_load("ana", "plan", missing, cache_none=False)
+    assert len(calls) == 2
+    # A row written later (e.g. by the nightly job) is seen without waiting for the user's next write
+    found, _ = _counting({"kcal": 2000})
+    assert cache.get_or_load("ana", "plan", found, cache_none=False) == {"kcal": 2000}
+
+
+def test_misses_are_kept_by_default():
+    cache = UserDataCache(1 << 20)
+    missing, calls = _counting(None)
+    cache.get_or_load("ana", "plan", missing)
+    cache.get_or_load("ana", "plan", missing)
+    assert len(calls) == 1
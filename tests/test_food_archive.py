@@ -0,0 +1,112 @@
+# tests/test_food_archive.py
+"""archive_month, food_history and the rollup's late-day totals against SQLite (conftest.py) and real Parquet files."""
+from datetime import date, datetime
+
+import pytest
+
+import food_archive
+from food_archive import archive_month, food_history
+from nutrition_rollup import late_totals
+
+JAN, FEB = date(2030, 1, 1), date(2030, 2, 1)
+INSERT = """INSERT INTO food_logs (id, username, food, qty, protein, carbs, fat, fiber, calories, date)
+            VALUES (?, ?, ?, '100g', ?, 10, 5, 2, ?, ?)"""
+SCHEMA = """
+    CREATE TABLE food_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT, food TEXT, qty TEXT,
+                            protein REAL, carbs REAL, fat REAL, fiber REAL, calories INT, date TIMESTAMP);
+    CREATE TABLE food_log_archives (month DATE, part INT, path TEXT, row_count INT, calories INT,
+                                    max_id INT, PRIMARY KEY (month, part));
+"""
+
+# food_history hands the DB-API connection straight to pandas, as it does with mysql.connector
+pytestmark = pytest.mark.filterwarnings("ignore:pandas only supports SQLAlchemy")
+
+
+def _log(conn, username, calories, when, protein=20.0, row_id=None):
+    conn.db.execute(INSERT, (row_id, username, f"food {calories}", protein, calories, when))
+    conn.db.commit()
+
+
+def _hot_ids(conn):
+    return [row[0] for row in conn.db.execute("SELECT id FROM food_logs ORDER BY id")]
+
+
+@pytest.fixture
+def conn(sqlite_db):
+    conn = sqlite_db(SCHEMA)
+    for day in range(1, 29, 3):
+        for user in ("ana", "bob"):
+            _log(conn, user, 100 + day, datetime(2030, 1, day, 8, 30))
+    _log(conn, "ana", 400, datetime(2030, 2, 3, 13, 0))  # the next, still open month
+    return conn
+
+
+def _ids(df):
+    return list(df["id"])
+
+
+def test_archived_month_reads_back_once(conn, tmp_path):
+    before = food_history(conn, "ana", root=str(tmp_path))
+    assert archive_month(conn, conn, JAN, str(tmp_path), batch=3, log=lambda msg: None) == 20
+    assert (tmp_path / "2030-01" / "part-0.parquet").exists()
+
+    after = food_history(conn, "ana", root=str(tmp_path))
+    assert _ids(after) == _ids(before) and len(set(_ids(after))) == len(after) == 11
+    assert list(after["calories"]) == list(before["calories"])
+    assert len(_hot_ids(conn)) == 1  # only February is left in food_logs
+    assert _ids(food_history(conn, "ana", JAN, FEB, root=str(tmp_path))) == _ids(before)[:-1]
+
+
+def test_interrupted_delete_loses_and_repeats_nothing(conn, tmp_path, monkeypatch):
+    before = food_history(conn, "bob", root=str(tmp_path))
+
+    def crash(*args, **kwargs):
+        raise ConnectionError("killed after the part was registered")
+
+    monkeypatch.setattr(food_archive, "_finish_deletes", crash)
+    with pytest.raises(ConnectionError):
+        archive_month(conn, conn, JAN, str(tmp_path), log=lambda msg: None)
+    assert len(_hot_ids(conn)) == 21  # archived and registered, nothing deleted yet
+
+    caught = food_history(conn, "bob", root=str(tmp_path))
+    assert _ids(caught) == _ids(before) and len(set(_ids(caught))) == len(caught) == 10
+
+    monkeypatch.undo()
+    assert archive_month(conn, conn, JAN, str(tmp_path), batch=4, log=lambda msg: None) == 0  # finishes the deletes
+    assert len(_hot_ids(conn)) == 1
+    assert not (tmp_path / "2030-01" / "part-1.parquet").exists()
+    assert _ids(food_history(conn, "bob", root=str(tmp_path))) == _ids(before)
+
+
+def test_late_rows_become_the_next_part_and_count_in_totals(conn, tmp_path):
+    archive_month(conn, conn, JAN, str(tmp_path), log=lambda msg: None)
+    _log(conn, "ana", 250, datetime(2030, 1, 4, 19, 0), protein=5.0)  # lands after January was archived
+
+    # The rollup rebuild sums the late day from the archive and the hot row together
+    assert late_totals(conn, ["ana", "bob"], FEB, root=str(tmp_path)) == [
+        ("ana", date(2030, 1, 4), 25.0, 20.0, 10.0, 4.0, 104 + 250, 2)]
+
+    assert archive_month(conn, conn, JAN, str(tmp_path), log=lambda msg: None) == 1
+    assert (tmp_path / "2030-01" / "part-1.parquet").exists()
+    history = food_history(conn, "ana", JAN, FEB, root=str(tmp_path))
+    assert len(history) == 11 and len(set(_ids(history))) == 11
+
+
+def test_row_committed_after_the_read_is_not_deleted(conn, tmp_path, monkeypatch):
+    conn.db.execute("DELETE FROM food_logs WHERE id = 5")  # id 5 is taken by a transaction still open
+    conn.db.commit()
+    write_part = food_archive.write_part
+
+    def commit_during_write(rows, path):
+        written = write_part(rows, path)
+        _log(conn, "ana", 77, datetime(2030, 1, 9, 12, 0), row_id=5)
+        return written
+
+    monkeypatch.setattr(food_archive, "write_part", commit_during_write)
+    assert archive_month(conn, conn, JAN, str(tmp_path), log=lambda msg: None) == 19
+    assert _hot_ids(conn) == [5, 21]  # below max_id but never read into the part, so kept
+
+    monkeypatch.undo()
+    assert archive_month(conn, conn, JAN, str(tmp_path), log=lambda msg: None) == 1
+    assert food_archive.part_ids(str(tmp_path / "2030-01" / "part-1.parquet")) == [5]
+    assert 5 in _ids(food_history(conn, "ana", JAN, FEB, root=str(tmp_path)))
@@ -0,0 +1,39 @@
+# tests/test_progress_stats.py
+"""apply_check_ins against a brute-force RANGE-window mean; no database needed."""
+import pandas as pd
+
+from progress_stats import SERIES_COLUMNS, apply_check_ins
+
+
+def _window_mean(scores, day, days):
+    inside = [s for d, s in scores.items() if day - pd.Timedelta(days=days - 1) <= d <= day]
+    return sum(inside) / len(inside)
+
+
+def test_queued_days_get_scores_and_means():
+    days = pd.date_range("2030-01-01", periods=40)
+    lead = pd.Series([50.0 + i for i in range(29)], index=days[:29])
+    shown = days[29:]
+    df = pd.DataFrame({"Date": shown, "Score": [80.0] * 5 + [70.0] * 6, "7-day mean": 0.0, "30-day mean": 0.0,
+                       "Check-ins": 1})
+    df = df.drop(index=6).reset_index(drop=True)  # a day with no row yet
+    queued = {shown[2]: 10.0, shown[6]: 100.0}
+
+    out = apply_check_ins(df, queued, lead)
+
+    assert list(out.columns) == SERIES_COLUMNS
+    assert list(out["Date"]) == list(shown)
+    scores = dict(zip(lead.index, lead))
+    scores.update(zip(out["Date"], out["Score"]))
+    assert scores[shown[2]] == 10.0 and scores[shown[6]] == 100.0
+    for day, week, month in zip(out["Date"], out["7-day mean"], out["30-day mean"]):
+        assert abs(week - _window_mean(scores, day, 7)) < 1e-9
+        assert abs(month - _window_mean(scores, day, 30)) < 1e-9
+    assert df["Score"].iloc[2] == 80.0  # the shared cached frame is not touched
+
+
+def test_queued_days_on_an_empty_series():
+    day = pd.Timestamp("2030-01-01")
+    out = apply_check_ins(pd.DataFrame(columns=SERIES_COLUMNS), {day: 90.0}, pd.Series(dtype=float))
+    assert out.to_dict("records") == [{"Date": day, "Score": 90.0, "7-day mean": 90.0, "30-day mean": 90.0,
+                                       "Check-ins": 1}]
@@ -0,0 +1,57 @@
+# tests/test_session_profiler.py
+"""profile_rerun's one-shot and session modes, with a stand-in for st; no Streamlit runtime or database."""
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import session_profiler
+from session_profiler import profile_rerun
+
+
+class SessionState(dict):
+    __getattr__ = dict.get
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+@pytest.fixture
+def st(monkeypatch, tmp_path):
+    fake = SimpleNamespace(session_state=SessionState(username="ana"),
+                           secrets={"PROFILE_DIR": str(tmp_path), "PROFILE_INTERVAL_MS": 1})
+    monkeypatch.setattr(session_profiler, "st", fake)
+    counts = []
+    monkeypatch.setattr(session_profiler, "table_rows", lambda username: counts.append(username) or {"food_logs": 3})
+    fake.counts = counts
+    return fake
+
+
+def _rerun(page="Home"):
+    with profile_rerun(page):
+        pass
+
+
+def _collapsed(directory):
+    return [n for n in os.listdir(directory) if n.endswith(".collapsed")]
+
+
+def test_once_profiles_a_single_rerun(st, tmp_path):
+    st.session_state.profiling = "once"
+    for _ in range(3):
+        _rerun()
+    assert len(_collapsed(tmp_path)) == 1
+    assert not st.session_state.profiling
+
+
+def test_session_mode_profiles_every_rerun_and_counts_rows_once(st, tmp_path):
+    st.session_state.profiling = "session"
+    for page in ("Home", "Analytics", "Water"):
+        _rerun(page)
+    assert len(_collapsed(tmp_path)) == 3
+    assert st.counts == ["ana"]
+
+
+def test_unflagged_session_is_not_profiled(st, tmp_path):
+    _rerun()
+    assert _collapsed(tmp_path) == []
@@ -0,0 +1,146 @@
+# tests/test_water_log.py
+"""
+WaterCoalescer against an in-memory water_history, then the real upsert under
+concurrent connections against a local MySQL (skipped when none is reachable).
+"""
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.water_concurrency import run
+from water_log import WaterCoalescer, overlay
+
+DAY = "2030-01-01"
+
+
+class FakeWaterHistory:
+    """consumed per (username, day), with the upsert and reset the real statements perform."""
+
+    def __init__(self):
+        self.consumed = Counter()
+        self.batches = 0
+        self.lock = threading.Lock()
+
+    def write(self, increments):
+        with self.lock:
+            for username, day, amount in increments:
+                self.consumed[username, day] += amount
+            self.batches += 1
+
+    def reset(self, username, day):
+        with self.lock:
+            self.consumed[username, day] = 0
+
+
+def test_concurrent_taps_sum_exactly():
+    store = FakeWaterHistory()
+    coalescer = WaterCoalescer(store.write, window=3600)  # flushed by hand below
+    users = [f"user{i}" for i in range(8)]
+    amounts = (150, 200, 500)
+
+    def tap(i):
+        coalescer.add(users[i % len(users)], DAY, amounts[i % len(amounts)])
+        if i % 97 == 0:
+            coalescer.flush()  # flushes racing with taps must neither lose nor repeat any
+
+    with ThreadPoolExecutor(32) as ex:
+        list(ex.map(tap, range(5000)))
+    coalescer.flush()
+
+    expected = Counter()
+    for i in range(5000):
+        expected[users[i % len(users)], DAY] += amounts[i % len(amounts)]
+    assert store.consumed == expected
+    assert coalescer.taps == 5000
+    assert store.batches < 5000
+    assert all(coalescer.pending(u, DAY) == 0 for u in users)
+
+
+def test_pending_counts_unwritten_taps_once():
+    store = FakeWaterHistory()
+    seen = []
+    coalescer = WaterCoalescer(store.write, window=3600,
+                               on_flush=lambda username: seen.append(coalescer.pending(username, DAY)))
+    coalescer.add("ana", DAY, 150)
+    coalescer.add("ana", DAY, 200)
+    assert coalescer.pending("ana", DAY) == 350
+    coalescer.flush()
+    # By the time readers are told to reload, the written taps are no longer pending
+    assert seen == [0]
+    assert store.consumed["ana", DAY] + coalescer.pending("ana", DAY) == 350
+
+
+def test_reset_drops_pending_taps():
+    store = FakeWaterHistory()
+    coalescer = WaterCoalescer(store.write, window=3600)
+    coalescer.add("ana", DAY, 500)
+    coalescer.flush()
+    coalescer.add("ana", DAY, 150)
+    coalescer.add("bob", DAY, 200)
+    coalescer.reset("ana", DAY, lambda: store.reset("ana", DAY))
+    coalescer.flush()
+    assert store.consumed["ana", DAY] == 0
+    assert store.consumed["bob", DAY] == 200
+
+
+def test_reset_waits_for_inflight_batch():
+    store = FakeWaterHistory()
+    writing, release = threading.Event(), threading.Event()
+
+    def slow_write(increments):
+        writing.set()
+        assert release.wait(5)
+        store.write(increments)
+
+    coalescer = WaterCoalescer(slow_write, window=3600)
+    coalescer.add("ana", DAY, 500)
+    flusher = threading.Thread(target=coalescer.flush)
+    flusher.start()
+    assert writing.wait(5)
+    assert coalescer.pending("ana", DAY) == 500  # in flight, still shown
+
+    resetter = threading.Thread(target=coalescer.reset, args=("ana", DAY, lambda: store.reset("ana", DAY)))
+    resetter.start()
+    resetter.join(0.2)
+    assert resetter.is_alive()  # blocked behind the batch being written
+
+    release.set()
+    flusher.join(5)
+    resetter.join(5)
+    # The batch committed first and the reset wiped it; it did not come back after the reset
+    assert store.consumed["ana", DAY] == 0
+    assert coalescer.pending("ana", DAY) == 0
+
+
+def test_failed_write_is_retried_without_loss():
+    store = FakeWaterHistory()
+    fail = [True]
+
+    def flaky_write(increments):
+        if fail[0]:
+            fail[0] = False
+            raise ConnectionError("server gone away")
+        store.write(increments)
+
+    coalescer = WaterCoalescer(flaky_write, window=3600)
+    coalescer.add("ana", DAY, 150)
+    coalescer.flush()
+    assert coalescer.pending("ana", DAY) == 150
+    coalescer.add("ana", DAY, 200)
+    coalescer.flush()
+    assert store.consumed["ana", DAY] == 350
+
+
+def test_overlay_applies_queued_resets_in_order():
+    assert overlay(100, [("ana", DAY, 150), ("ana", DAY, None), ("ana", DAY, 200)]) == 200
+
+
+@pytest.mark.parametrize("mode", ["atomic", "coalesced"])
+def test_concurrent_upserts_sum_exactly_in_mysql(mysql_pool, mode):
+    # 5,000 increments from 32 connections onto 8 rows: every ON DUPLICATE KEY UPDATE must add, none overwrite
+    rng = random.Random(0)
+    jobs = [(f"water_test_{rng.randrange(8)}", rng.choice((150, 200, 250, 500))) for _ in range(5000)]
+    assert run(mode, mysql_pool, jobs, threads=32, window=0.05)
@@ -0,0 +1,79 @@
+# tests/test_workout_plans.py
+"""The workout plan engine against the split and pick rules of the original inline page code."""
+from itertools import product
+
+import pytest
+
+from database import EXERCISE_DB
+from workout_plans import (DAY_OPTIONS, GOALS, LEVELS, PLANS, VARIATIONS, build_plan, exercises_for, get_plan,
+                           plan_frame, plan_from_dict, plan_to_dict, split_for)
+
+EXPECTED_SPLITS = {
+    3: ("Full Body", ("Full Body",) * 3),
+    4: ("Upper/Lower", ("Upper Body", "Lower Body", "Upper Body", "Lower Body")),
+    5: ("Push/Pull/Legs + Upper/Lower", ("Push", "Pull", "Legs", "Upper Body", "Lower Body")),
+    6: ("Push/Pull/Legs (PPL)", ("Push", "Pull", "Legs", "Push", "Pull", "Legs")),
+}
+BRO_SPLIT = ("Bro Split (Single Muscle)", ("Chest", "Back", "Shoulders", "Legs", "Arms"))
+
+
+@pytest.mark.parametrize("days, level", list(product(DAY_OPTIONS, LEVELS)))
+def test_split_for_every_day_count_and_level(days, level):
+    expected = BRO_SPLIT if (days, level) == (5, "Advanced") else EXPECTED_SPLITS[days]
+    assert split_for(level, days) == expected
+    assert len(split_for(level, days)[1]) == days
+
+
+@pytest.mark.parametrize("days", [0, 2, 7])
+def test_split_for_falls_back_to_ppl(days):
+    assert split_for("Advanced", days) == EXPECTED_SPLITS[6]
+
+
+def test_exercises_for_composite_focuses():
+    chest, back, shoulders, arms, legs = (EXERCISE_DB[m] for m in ("Chest", "Back", "Shoulders", "Arms", "Legs"))
+    assert exercises_for("Full Body") == (chest[0], back[0], legs[0], shoulders[0], arms[0])
+    assert exercises_for("Upper Body") == (chest[1], back[1], shoulders[1], arms[1], back[2])
+    assert exercises_for("Lower Body") == (legs[1], legs[2], legs[3], legs[4], legs[0])
+    assert exercises_for("Push") == (chest[0], shoulders[0], arms[2], chest[3], shoulders[2])
+    assert exercises_for("Pull") == (back[0], back[2], arms[0], back[3], arms[1])
+
+
+@pytest.mark.parametrize("muscle", list(EXERCISE_DB))
+def test_exercises_for_single_muscle_is_catalog_order(muscle):
+    assert exercises_for(muscle) == tuple(EXERCISE_DB[muscle])
+
+
+@pytest.mark.parametrize("variations", VARIATIONS)
+def test_build_plan_truncates_to_variations(variations):
+    plan = build_plan("Intermediate", "Muscle Build", 4, variations)
+    assert plan.split == "Upper/Lower"
+    assert plan.reps == "8-12"
+    for focus, exercises in plan.days:
+        assert exercises == exercises_for(focus)[:variations]
+        assert len(exercises) == variations
+
+
+def test_build_plan_reps_by_goal():
+    assert build_plan("Beginner", "Fat Loss", 3, 3).reps == "15-20"
+    assert build_plan("Beginner", "Muscle Build", 3, 3).reps == "8-12"
+
+
+def test_plan_dict_round_trip():
+    for plan in PLANS.values():
+        assert plan_from_dict(plan_to_dict(plan)) == plan
+
+
+def test_precomputed_plans_match_build_plan():
+    keys = list(product(LEVELS, GOALS, DAY_OPTIONS, VARIATIONS))
+    assert len(keys) == 72 and set(PLANS) == set(keys)
+    for key in keys:
+        plan, frame = get_plan(*key)
+        assert plan == build_plan(*key)
+        assert frame.equals(plan_frame(plan))
+
+
+def test_get_plan_builds_keys_outside_the_table():
+    plan, frame = get_plan("Beginner", "Fat Loss", 7, 2)
+    assert plan == build_plan("Beginner", "Fat Loss", 7, 2)
+    assert len(frame) == 6 * 2
+    assert list(frame.columns) == ["Day", "Exercise", "Sets", "Reps"]
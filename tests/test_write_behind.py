@@ -0,0 +1,143 @@
+# tests/test_write_behind.py
+"""WriteBehindQueue against an in-memory transactional store; no database needed."""
+import json
+import time
+import uuid
+from contextlib import contextmanager
+
+import mysql.connector
+import pytest
+
+import write_behind
+from write_behind import MARK_APPLIED, Journal, WriteBehindQueue
+
+NOTE = "INSERT INTO notes (text) VALUES (%s)"
+
+
+class FakeStore:
+    """Committed notes and applied ids; each connection stages its writes until commit."""
+
+    def __init__(self):
+        self.notes = []
+        self.applied = set()
+        self.lose_commit_replies = 0  # commit succeeds, then the client sees the connection drop
+
+    @contextmanager
+    def connection(self):
+        conn = FakeConnection(self)
+        yield conn  # an exception leaves the staged writes uncommitted, like a rollback
+
+
+class FakeConnection:
+    def __init__(self, store):
+        self.store = store
+        self.notes, self.applied = [], set()
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.store.notes += self.notes
+        self.store.applied |= self.applied
+        self.notes, self.applied = [], set()
+        if self.store.lose_commit_replies:
+            self.store.lose_commit_replies -= 1
+            raise mysql.connector.errors.OperationalError("Lost connection to MySQL server during query")
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        if sql.startswith("SELECT entry_id"):
+            self.rows = [(i,) for i in params if i in self.conn.store.applied]
+        elif sql == NOTE:
+            if params[0] == "bad":
+                raise mysql.connector.errors.DataError("Data too long for column 'text'")
+            self.conn.notes.append(params[0])
+
+    def executemany(self, sql, seq):
+        assert sql == MARK_APPLIED
+        self.conn.applied.update(row[0] for row in seq)
+
+    def fetchall(self):
+        return self.rows
+
+
+def _apply_notes(cursor, rows):
+    for (text,) in rows:
+        cursor.execute(NOTE, (text,))
+
+
+@pytest.fixture(autouse=True)
+def note_kind(monkeypatch):
+    monkeypatch.setitem(write_behind.KINDS, "note", _apply_notes)
+
+
+def _drain(queue, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = queue.stats()
+        if not stats["queued"] and not stats["inflight"]:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"queue did not drain: {queue.stats()}")
+
+
+def _queue(store, tmp_path, **kwargs):
+    journal = Journal(str(tmp_path / "journal.log"))
+    return WriteBehindQueue(store.connection, journal, interval=0.01, max_backoff=0.02, **kwargs)
+
+
+def test_bad_entry_is_isolated_and_dead_lettered(tmp_path):
+    store = FakeStore()
+    queue = _queue(store, tmp_path, max_attempts=3)
+    texts = [f"note {i}" for i in range(10)]
+    queue.submit_many("note", "ana", [(t,) for t in texts[:4]] + [("bad",)] + [(t,) for t in texts[4:]])
+    _drain(queue)
+    queue.stop()
+
+    assert sorted(store.notes) == sorted(texts)  # every good entry landed once, despite the bad one
+    assert queue.stats()["dead_lettered"] == 1
+    with open(tmp_path / "journal.log.dead") as f:
+        dead = [json.loads(line) for line in f]
+    assert [d["params"] for d in dead] == [["bad"]]
+    assert dead[0]["attempts"] == 3 and "DataError" in dead[0]["error"]
+    assert Journal(str(tmp_path / "journal.log")).replay() == []  # dead letters are acked
+
+
+def test_retry_after_lost_commit_reply_applies_once(tmp_path):
+    store = FakeStore()
+    store.lose_commit_replies = 1
+    queue = _queue(store, tmp_path)
+    queue.submit_many("note", "ana", [("one",), ("two",)])
+    _drain(queue)
+    queue.stop()
+
+    assert sorted(store.notes) == ["one", "two"]
+    assert queue.stats()["duplicates"] == 2
+    assert queue.stats()["dead_lettered"] == 0
+
+
+def test_replay_skips_entries_committed_before_the_crash(tmp_path):
+    store = FakeStore()
+    path = str(tmp_path / "journal.log")
+    journal = Journal(path)
+    committed = (1, "note", "ana", ("committed",), uuid.uuid4().hex)
+    lost = (2, "note", "ana", ("lost",), uuid.uuid4().hex)
+    journal.append([committed, lost])
+    journal.close()
+    # The first entry's transaction committed, but the process died before its ack was journaled
+    store.notes.append("committed")
+    store.applied.add(committed[4])
+
+    queue = WriteBehindQueue(store.connection, Journal(path), interval=0.01)
+    _drain(queue)
+    queue.stop()
+
+    assert sorted(store.notes) == ["committed", "lost"]
+    assert queue.stats()["duplicates"] == 1
+    assert Journal(path).replay() == []
+
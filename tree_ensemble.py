@@ -0,0 +1,127 @@
+# tree_ensemble.py
+"""
+Compact, memory-mappable export of the calorie RandomForestRegressor.
+
+All trees are flattened into one set of contiguous arrays (node -> feature,
+float32 threshold, left/right child, float32 leaf value) stored as .npy files
+in a `<name>.forest/` directory. load_forest() memory-maps them read-only, so
+every server process on the host shares the same page-cache pages instead of
+holding its own unpickled copy of the forest.
+
+Prediction is pure NumPy: every tree of every row advances one level per step,
+so a single row costs ~max_depth vectorized operations instead of sklearn's
+per-call validation and thread dispatch.
+"""
+import json
+import os
+
+import numpy as np
+
+ARRAYS = ("feature", "threshold", "left", "right", "value", "roots")
+
+
+def _float32_floor(thresholds):
+    """
+    Largest float32 <= each float64 threshold. sklearn compares float32 inputs
+    against float64 thresholds; with this rounding the float32 comparison
+    `x <= t32` picks exactly the same branch for every float32 x.
+    """
+    t32 = thresholds.astype(np.float32)
+    over = t32.astype(np.float64) > thresholds
+    t32[over] = np.nextafter(t32[over], np.float32(-np.inf))
+    return t32
+
+
+def flatten_forest(model):
+    """Concatenate every fitted tree of `model` into flat node arrays."""
+    trees = [est.tree_ for est in model.estimators_]
+    sizes = np.array([t.node_count for t in trees])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    feature, threshold, left, right, value = [], [], [], [], []
+    for tree, offset in zip(trees, offsets):
+        ids = np.arange(tree.node_count) + offset
+        leaf = tree.children_left == -1
+        # Leaves point at themselves with an always-true split, so traversal needs no masking
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(np.where(leaf, np.inf, tree.threshold))
+        left.append(np.where(leaf, ids, tree.children_left + offset))
+        right.append(np.where(leaf, ids, tree.children_right + offset))
+        value.append(tree.value[:, 0, 0])
+
+    arrays = {
+        "feature": np.concatenate(feature).astype(np.int16),
+        "threshold": _float32_floor(np.concatenate(threshold).astype(np.float64)),
+        "left": np.concatenate(left).astype(np.int32),
+        "right": np.concatenate(right).astype(np.int32),
+        "value": np.concatenate(value).astype(np.float32),
+        "roots": offsets.astype(np.int32),
+    }
+    meta = {
+        "n_trees": len(trees),
+        "n_features": int(model.n_features_in_),
+        "max_depth": int(max(t.max_depth for t in trees)),
+        "n_nodes": int(sizes.sum()),
+        "feature_names": [str(f) for f in getattr(model, "feature_names_in_", [])],
+    }
+    return arrays, meta
+
+
+class CompactForest:
+    """Drop-in replacement for the forest's predict() over flat node arrays."""
+
+    def __init__(self, arrays, meta):
+        self.meta = meta
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.max_depth = meta["max_depth"]
+        self.n_features_in_ = meta["n_features"]
+
+    def predict(self, X):
+        """Mean leaf value over all trees for each row of X (rows x n_features)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.roots.shape[0]))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node].mean(axis=1, dtype=np.float64)
+
+    def predict_one(self, *features):
+        return float(self.predict(np.array(features, dtype=np.float32))[0])
+
+
+def max_abs_error(model, forest, X):
+    """Largest |sklearn - compact| prediction difference over X."""
+    return float(np.max(np.abs(model.predict(X) - forest.predict(X))))
+
+
+def export_forest(model, path, check_rows=None):
+    """
+    Write `model` to the `path` directory. If `check_rows` is given, the export is
+    verified against sklearn on those rows and the error is recorded in meta.json.
+    """
+    arrays, meta = flatten_forest(model)
+    if check_rows is not None:
+        meta["verified_max_abs_error"] = max_abs_error(model, CompactForest(arrays, meta), check_rows)
+    os.makedirs(path, exist_ok=True)
+    for name in ARRAYS:
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(arrays[name]))
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def load_forest(path, mmap=True):
+    """Open an exported forest; with mmap the arrays stay in the shared page cache."""
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+              for name in ARRAYS}
+    return CompactForest(arrays, meta)
@@ -0,0 +1,73 @@
+# user_profile.py
+"""
+The logged-in user's profile and every target derived from it.
+
+UserProfile is built once per login (from_row on PROFILE_QUERY's columns)
+and once per profile save, and lives in st.session_state.user. The daily
+calorie target, per-meal calories, macro grams and water goal are computed
+in the constructor, so the pages read attributes instead of re-deriving
+them on every rerun. Pure Python: no Streamlit, database or solver imports.
+"""
+
+GOAL_KCAL_OFFSET = {"Lose Weight": -500, "Gain Weight": 500}
+
+# Share of the day's intake per meal, in template order (breakfast, lunch, snacks, dinner)
+MEAL_NAMES = ("Breakfast", "Lunch", "Snacks", "Dinner")
+MEAL_SPLIT = (0.25, 0.35, 0.15, 0.25)
+
+# Share of calories from (protein, carbs, fat) per goal; 4/4/9 kcal per gram
+MACRO_SPLIT = {
+    "Lose Weight": (0.30, 0.40, 0.30),
+    "Maintain Weight": (0.20, 0.50, 0.30),
+    "Gain Weight": (0.25, 0.50, 0.25),
+}
+FIBER_PER_1000_KCAL = 14.0
+WATER_ML_PER_KG = 35
+
+# The profiles columns the app needs, in from_row order (never SELECT *)
+COLUMNS = ("name", "age", "weight", "height", "gender", "act_val", "diet", "goal", "cal")
+PROFILE_QUERY = f"SELECT {', '.join(COLUMNS)} FROM profiles WHERE username = %s"
+
+
+def daily_target(cal, goal):
+    """The day's calorie target for a predicted maintenance intake."""
+    return cal + GOAL_KCAL_OFFSET.get(goal, 0)
+
+
+def macro_grams(target, goal):
+    """Daily (kcal, protein g, carbs g, fat g, fiber g) for a calorie target."""
+    pro, carb, fat = MACRO_SPLIT.get(goal, MACRO_SPLIT["Maintain Weight"])
+    return (target, target * pro / 4, target * carb / 4, target * fat / 9,
+            target / 1000 * FIBER_PER_1000_KCAL)
+
+
+class UserProfile:
+    __slots__ = ("username", "name", "age", "weight", "height", "gender", "act_val", "diet", "goal", "cal",
+                 "target_kcal", "meal_kcal", "protein_g", "carbs_g", "fat_g", "fiber_g", "water_ml")
+
+    def __init__(self, username, name, age, weight, height, gender, act_val, diet, goal, cal):
+        self.username = username
+        self.name = name or ""
+        self.age = int(age)
+        self.weight = float(weight)
+        self.height = float(height)
+        self.gender = gender
+        self.act_val = int(act_val)
+        self.diet = diet or "Combined"
+        self.goal = goal
+        self.cal = int(cal)
+        # Derived once here; everything below is read-only for the pages
+        self.target_kcal = daily_target(self.cal, goal)
+        self.meal_kcal = dict(zip(MEAL_NAMES, (self.target_kcal * share for share in MEAL_SPLIT)))
+        _, self.protein_g, self.carbs_g, self.fat_g, self.fiber_g = macro_grams(self.target_kcal, goal)
+        self.water_ml = int(self.weight * WATER_ML_PER_KG)
+
+    @classmethod
+    def from_row(cls, username, row):
+        """From a PROFILE_QUERY row; None when the user has no complete profile yet."""
+        if row is None or any(v is None for v in row):
+            return None
+        return cls(username, *row)
+
+    def __repr__(self):
+        return f"UserProfile({self.username!r}, goal={self.goal!r}, target_kcal={self.target_kcal})"
@@ -0,0 +1,161 @@
+# water_log.py
+"""
+Race-free water logging.
+
+Every increment is a single atomic upsert (consumed = consumed + n), so two
+browser tabs or rapid taps can no longer overwrite each other's totals, and
+the day's row is created by the first increment instead of a separate
+INSERT IGNORE on every page view.
+
+Taps are coalesced per (user, day) for WATER_COALESCE_MS (default 1500 ms):
+a burst of "+150ml" taps becomes one increment, written by a timer thread
+when the window closes. The page shows the stored total plus whatever is
+still pending, so nothing looks lost in the meantime. Set the secret to 0 to
+write every tap immediately.
+"""
+import logging
+import threading
+
+import streamlit as st
+
+from data_cache import get_cache
+from database_manager import get_pool
+
+log = logging.getLogger(__name__)
+
+ADD_WATER = """INSERT INTO water_history (username, date, consumed) VALUES (%s, %s, %s)
+               ON DUPLICATE KEY UPDATE consumed = consumed + VALUES(consumed)"""
+
+READ_WATER = "SELECT consumed FROM water_history WHERE username = %s AND date = %s"
+
+RESET_WATER = "UPDATE water_history SET consumed = 0 WHERE username = %s AND date = %s"
+
+RETRY_SECONDS = 5.0
+
+
+def add_water(cursor, username, day, amount):
+    """Atomically add `amount` ml to the user's day. Caller commits."""
+    cursor.execute(ADD_WATER, (username, day, amount))
+
+
+def add_water_many(cursor, increments):
+    """Several (username, day, amount) increments in one batched upsert. Caller commits."""
+    cursor.executemany(ADD_WATER, increments)
+
+
+def read_water(cursor, username, day):
+    cursor.execute(READ_WATER, (username, day))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def overlay(stored, queued):
+    """`stored` with queued (username, day, amount) writes applied in order; an amount of None is a reset."""
+    total = stored
+    for _, _, amount in queued:
+        total = 0 if amount is None else total + amount
+    return total
+
+
+class WaterCoalescer:
+    """
+    Merges increments per (username, day) for `window` seconds, then hands
+    the batch to `write(increments)`. A failed write is merged back and
+    retried after RETRY_SECONDS. Writes and resets are serialized, so a
+    reset can never be overtaken by taps made before it.
+    """
+
+    def __init__(self, write, window=1.5, on_flush=None):
+        self.write = write
+        self.window = window
+        self.on_flush = on_flush
+        self._pending = {}
+        self._inflight = {}  # being written right now; still counted by pending()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # held for a whole flush or reset
+        self._timer = None
+        self.taps = 0
+        self.writes = 0
+
+    def add(self, username, day, amount):
+        if self.window <= 0:
+            with self._write_lock:
+                batch = {(username, day): amount}
+                self.write(_increments(batch))
+                self._written(batch)
+            return
+        with self._lock:
+            key = (username, day)
+            self._pending[key] = self._pending.get(key, 0) + amount
+            self.taps += 1
+            self._schedule(self.window)
+
+    def pending(self, username, day):
+        with self._lock:
+            return self._pending.get((username, day), 0) + self._inflight.get((username, day), 0)
+
+    def reset(self, username, day, write_reset=None):
+        """
+        Drop the day's unwritten taps and run `write_reset()` (the RESET_WATER
+        statement) with no flush in between. A batch already being written
+        finishes first, so the reset always lands after it.
+        """
+        with self._write_lock:
+            with self._lock:
+                self._pending.pop((username, day), None)
+            if write_reset:
+                write_reset()
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                batch, self._pending, self._timer = self._pending, {}, None
+                self._inflight = batch
+            if not batch:
+                return
+            try:
+                self.write(_increments(batch))
+            except Exception:
+                log.exception("Water increments not written; retrying in %ss", RETRY_SECONDS)
+                with self._lock:
+                    self._inflight = {}
+                    for key, amount in batch.items():
+                        self._pending[key] = self._pending.get(key, 0) + amount
+                    self._schedule(RETRY_SECONDS)
+                return
+            self._written(batch)
+
+    def _written(self, batch):
+        # Stop counting the batch as pending before readers are told to reload the stored total
+        with self._lock:
+            self._inflight = {}
+            self.writes += 1
+        if self.on_flush:
+            for username in {username for username, _ in batch}:
+                self.on_flush(username)
+
+    def _schedule(self, delay):
+        # Caller holds the lock; one timer covers everything pending
+        if self._timer is None:
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+def _increments(batch):
+    return [(username, day, amount) for (username, day), amount in batch.items() if amount]
+
+
+def _write_pooled(increments):
+    if not increments:
+        return
+    with get_pool().connection() as conn:
+        add_water_many(conn.cursor(), increments)
+        conn.commit()
+
+
+@st.cache_resource(show_spinner=False)
+def get_coalescer():
+    """One coalescer per server process, so taps from every tab of a user merge."""
+    cache = get_cache()  # bound here: flushes run on a timer thread outside any script run
+    return WaterCoalescer(_write_pooled, float(st.secrets.get("WATER_COALESCE_MS", 1500)) / 1000, cache.bump)
@@ -2,7 +2,10 @@
 import streamlit as st
 from datetime import datetime
 import pytz
-from database_manager import get_db_connection # Removed sqlite3
+from database_manager import db_connection # Pooled MySQL connections
+from data_cache import bump_version
+from water_log import RESET_WATER, get_coalescer, overlay, read_water
+from write_behind import get_write_behind
 
 def show_water_tracker():
     st.title("💧 Smart Hydration Tracker")
@@ -17,43 +20,56 @@ def show_water_tracker():
     today = datetime.now(IST).strftime('%Y-%m-%d')
     
     username = st.session_state.username
-    conn = get_db_connection() # Using centralized MySQL connection
-    if conn is None:
-        st.error("Database connection failed.")
-        return
-        
-    c = conn.cursor()
-    
-    # Ensure table exists using MySQL syntax
-    c.execute('''CREATE TABLE IF NOT EXISTS water_history 
-                 (username VARCHAR(255), date DATE, consumed INT, 
-                  PRIMARY KEY(username, date))''')
-    conn.commit()
 
-    # Fetch today's record
-    # MySQL uses %s instead of ?
-    c.execute("SELECT consumed FROM water_history WHERE username = %s AND date = %s", (username, today))
-    result = c.fetchone()
-    
-    if result:
-        st.session_state.daily_water_consumed = result[0]
-    else:
-        st.session_state.daily_water_consumed = 0
-        # MySQL "INSERT IGNORE" logic preserved
-        c.execute("INSERT IGNORE INTO water_history (username, date, consumed) VALUES (%s, %s, %s)", 
-                  (username, today, 0))
-        conn.commit()
+    coalescer = get_coalescer()
+    queue = get_write_behind()  # None unless WRITE_BEHIND is enabled
+
+    # Button callbacks run before the script body, so the rerun a click triggers already shows the new total
+    def log_water(amount):
+        if queue:
+            # Journaled and batched by the write-behind worker, which merges increments itself
+            queue.submit("water", username, (username, today, amount))
+            return
+        # Atomic "+amount" upsert; a burst of taps is merged into one write (see water_log.py)
+        coalescer.add(username, today, amount)
+
+    def reset_water():
+        if queue:
+            coalescer.reset(username, today)
+            queue.submit("water", username, (username, today, None))  # queued after earlier taps
+            return
+
+        def write_reset():
+            with db_connection() as conn:
+                if conn is None:
+                    return
+                conn.cursor().execute(RESET_WATER, (username, today))
+                conn.commit()
+        # Waits for a coalesced batch that is mid-write, so it can't land after the reset
+        coalescer.reset(username, today, write_reset)
+        bump_version(username)
 
-    # Logic fully preserved: Weight * 35ml per kg
-    user_weight = st.session_state.user['w']
-    water_goal_ml = user_weight * 35 
+    # Borrowed from the shared pool; the with-block hands it back even on st.rerun()
+    with db_connection() as conn:
+        if conn is None:
+            st.error("Database connection failed.")
+            return
+        # Stored total (0 until today's first increment creates the row) plus taps not yet written
+        stored = read_water(conn.cursor(buffered=True), username, today)
+    stored += coalescer.pending(username, today)
+    if queue:
+        stored = overlay(stored, [w for w in queue.pending(username, "water") if w[1] == today])
+    st.session_state.daily_water_consumed = stored
+
+    # Weight * 35ml per kg, derived once on the profile (login / profile save)
+    water_goal_ml = st.session_state.user.water_ml
     water_goal_liters = round(water_goal_ml / 1000, 2)
 
     st.subheader(f"Your Daily Goal: {water_goal_liters} Liters ({int(water_goal_ml)} ml)")
-    
+
     progress = min(st.session_state.daily_water_consumed / water_goal_ml, 1.0)
     st.progress(progress)
-    
+
     col1, col2 = st.columns(2)
     col1.metric("Consumed Today", f"{st.session_state.daily_water_consumed} ml")
     col2.metric("Remaining", f"{max(0, int(water_goal_ml - st.session_state.daily_water_consumed))} ml")
@@ -61,45 +77,13 @@ def show_water_tracker():
     st.divider()
     st.write("### Log Water Intake")
     c1, c2, c3 = st.columns(3)
-    
-    # Database update helper optimized for MySQL
-    def update_water_db(amount):
-        new_total = st.session_state.daily_water_consumed + amount
-        # Placeholders updated to %s
-        c.execute("UPDATE water_history SET consumed = %s WHERE username = %s AND date = %s", 
-                  (new_total, username, today))
-        conn.commit()
-        st.session_state.daily_water_consumed = new_total
 
-    # Button logic preserved exactly
-    if c1.button("+ 150ml"):
-        update_water_db(150)
-        conn.close()
-        st.rerun()
-    if c2.button("+ 200ml"):
-        update_water_db(200)
-        conn.close()
-        st.rerun()
-    if c3.button("+ 500ml"):
-        update_water_db(500)
-        conn.close()
-        st.rerun()
+    c1.button("+ 150ml", on_click=log_water, args=(150,))
+    c2.button("+ 200ml", on_click=log_water, args=(200,))
+    c3.button("+ 500ml", on_click=log_water, args=(500,))
 
-    custom_amt = st.number_input("Add custom amount (ml):", min_value=0, step=50)
-    if st.button("Add Custom"):
-        update_water_db(custom_amt)
-        conn.close()
+    custom_amt = st.number_input("Add custom amount (ml):", min_value=0, step=50, key="water_custom_amt")
+    if st.button("Add Custom", on_click=lambda: log_water(st.session_state.water_custom_amt)):
         st.success(f"Added {custom_amt}ml!")
-        st.rerun()
 
-    if st.button("🗑️ Reset Daily Total"):
-        # Reset logic preserved
-        c.execute("UPDATE water_history SET consumed = 0 WHERE username = %s AND date = %s", (username, today))
-        conn.commit()
-        st.session_state.daily_water_consumed = 0
-        conn.close()
-        st.rerun()
-        
-    # Final safety close to prevent MySQL connection leakage
-    if conn.is_connected():
-        conn.close()
\ No newline at end of file
+    st.button("🗑️ Reset Daily Total", on_click=reset_water)
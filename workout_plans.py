@@ -0,0 +1,97 @@
+# workout_plans.py
+"""
+Workout plan engine, independent of Streamlit and the database.
+
+build_plan(level, goal, days, variations) turns the exercise catalog
+(EXERCISE_DB in database.py, indexed here by muscle group) into a plan. The
+whole input space is 3 levels x 2 goals x 4 day counts x 3 variation counts,
+so every plan and its display frame is built once at import and get_plan()
+is a dict lookup.
+"""
+from itertools import product
+from typing import NamedTuple
+
+import pandas as pd
+
+from database import EXERCISE_DB
+
+LEVELS = ("Beginner", "Intermediate", "Advanced")
+GOALS = ("Muscle Build", "Fat Loss")
+DAY_OPTIONS = (3, 4, 5, 6)
+VARIATIONS = (3, 4, 5)
+SETS = "4"
+REPS = {"Muscle Build": "8-12", "Fat Loss": "15-20"}
+
+# muscle -> exercises, each muscle's list in catalog order
+BY_MUSCLE = {muscle: tuple(exercises) for muscle, exercises in EXERCISE_DB.items()}
+
+# (days, level or None for any level) -> (split name, focus per training day)
+SPLITS = {
+    (3, None): ("Full Body", ("Full Body",) * 3),
+    (4, None): ("Upper/Lower", ("Upper Body", "Lower Body", "Upper Body", "Lower Body")),
+    (5, "Advanced"): ("Bro Split (Single Muscle)", ("Chest", "Back", "Shoulders", "Legs", "Arms")),
+    (5, None): ("Push/Pull/Legs + Upper/Lower", ("Push", "Pull", "Legs", "Upper Body", "Lower Body")),
+    (6, None): ("Push/Pull/Legs (PPL)", ("Push", "Pull", "Legs", "Push", "Pull", "Legs")),
+}
+
+# Composite day focus -> (muscle, catalog index) picks, in order. Any other focus is a single
+# muscle and takes that muscle's exercises in catalog order.
+FOCUS_PICKS = {
+    "Full Body": (("Chest", 0), ("Back", 0), ("Legs", 0), ("Shoulders", 0), ("Arms", 0)),
+    "Upper Body": (("Chest", 1), ("Back", 1), ("Shoulders", 1), ("Arms", 1), ("Back", 2)),
+    "Lower Body": (("Legs", 1), ("Legs", 2), ("Legs", 3), ("Legs", 4), ("Legs", 0)),
+    "Push": (("Chest", 0), ("Shoulders", 0), ("Arms", 2), ("Chest", 3), ("Shoulders", 2)),
+    "Pull": (("Back", 0), ("Back", 2), ("Arms", 0), ("Back", 3), ("Arms", 1)),
+}
+
+
+class WorkoutPlan(NamedTuple):
+    split: str
+    reps: str
+    days: tuple  # ((focus, (exercise, ...)), ...) per training day
+
+
+def split_for(level, days):
+    """(split name, day focuses); 6 is the fallback for any other day count."""
+    return SPLITS.get((days, level)) or SPLITS.get((days, None)) or SPLITS[(6, None)]
+
+
+def exercises_for(focus):
+    if focus in FOCUS_PICKS:
+        return tuple(BY_MUSCLE[muscle][i] for muscle, i in FOCUS_PICKS[focus])
+    return BY_MUSCLE[focus]
+
+
+def build_plan(level, goal, days, variations):
+    split, focuses = split_for(level, days)
+    return WorkoutPlan(split, REPS.get(goal, REPS["Fat Loss"]),
+                       tuple((focus, exercises_for(focus)[:variations]) for focus in focuses))
+
+
+def plan_frame(plan):
+    """The whole plan as one frame: a row per exercise, labelled with its day."""
+    rows = [(f"Day {i}: {focus}", exercise, SETS, plan.reps)
+            for i, (focus, exercises) in enumerate(plan.days, start=1) for exercise in exercises]
+    return pd.DataFrame(rows, columns=["Day", "Exercise", "Sets", "Reps"])
+
+
+def plan_to_dict(plan):
+    """JSON-safe copy of a plan (for user_plans.workout_plan)."""
+    return {"split": plan.split, "reps": plan.reps, "days": [[focus, list(ex)] for focus, ex in plan.days]}
+
+
+def plan_from_dict(data):
+    return WorkoutPlan(data["split"], data["reps"], tuple((focus, tuple(ex)) for focus, ex in data["days"]))
+
+
+PLANS = {key: build_plan(*key) for key in product(LEVELS, GOALS, DAY_OPTIONS, VARIATIONS)}
+FRAMES = {key: plan_frame(plan) for key, plan in PLANS.items()}
+
+
+def get_plan(level, goal, days, variations):
+    """Precomputed (plan, frame); inputs outside the table are built on the fly. Treat the frame as read-only."""
+    key = (level, goal, int(days), int(variations))
+    if key in PLANS:
+        return PLANS[key], FRAMES[key]
+    plan = build_plan(*key)
+    return plan, plan_frame(plan)
@@ -0,0 +1,389 @@
+# write_behind.py
+"""
+Process-wide write-behind queue for user activity writes (opt-in).
+
+With the WRITE_BEHIND secret enabled, the Food Calculator, water tracker,
+check-in and workout preference writes return as soon as the entry is
+appended to a local journal. A worker thread batches queued entries per
+kind (one transaction per table), and flushes when WRITE_BEHIND_BATCH
+entries are waiting or every WRITE_BEHIND_INTERVAL_MS.
+
+Failures: connection-level errors (server gone, pool timeout, deadlock)
+retry the whole batch with exponential backoff. Any other error splits the
+failing group in halves until the bad entries stand alone, so one bad row
+never holds back the rest. An entry that still fails on its own after
+WRITE_BEHIND_MAX_ATTEMPTS tries is written to the dead-letter file
+(<journal>.dead, one JSON line with the error) and acked.
+
+Journal: WRITE_BEHIND_JOURNAL (default .write_behind/journal.log) is an
+append-only JSON-lines file of entries and acks. On start-up every entry
+without an ack is replayed, so a crash loses nothing that was acknowledged
+to the user. Each entry carries a random id, inserted into
+write_behind_applied in the same transaction as the write itself; entries
+whose id is already there are skipped, so a replay (or a retry after a
+commit whose outcome was lost) applies nothing twice. Ids are pruned after
+APPLIED_TTL_DAYS. The journal is rewritten at start-up and whenever the
+queue drains past COMPACT_BYTES. WRITE_BEHIND_FSYNC makes each append
+durable against power loss too, at the cost of an fsync per button press.
+
+Reads: pending(username, kind) returns the user's queued (and in-flight)
+entries, which the pages overlay on what they read from the database.
+"""
+import atexit
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import mysql.connector
+import streamlit as st
+
+from checkins import record_check_in
+from data_cache import get_cache
+from database_manager import PoolTimeout, get_pool
+from meal_log import apply_food_logs
+from water_log import RESET_WATER, add_water_many
+
+log = logging.getLogger(__name__)
+
+COMPACT_BYTES = 1 << 20  # rewrite the journal once it has drained and grown past this
+APPLIED_TTL_DAYS = 7
+TRANSIENT_ERRNOS = {1205, 1213}  # lock wait timeout, deadlock
+
+ALREADY_APPLIED = "SELECT entry_id FROM write_behind_applied WHERE entry_id IN ({ids})"
+MARK_APPLIED = "INSERT INTO write_behind_applied (entry_id) VALUES (%s)"
+PRUNE_APPLIED = "DELETE FROM write_behind_applied WHERE applied_at < NOW() - INTERVAL %s DAY"
+
+# The workout plan is part of the precomputed user_plans row, so this is a new profile version
+SAVE_WORKOUT_PREFS = """UPDATE profiles SET workout_level = %s, workout_goal = %s,
+                        workout_days = %s, workout_vars = %s, profile_version = profile_version + 1
+                        WHERE username = %s"""
+
+
+def _apply_water(cursor, rows):
+    """(username, day, amount) increments, merged per key; amount None is a reset of that day."""
+    merged = {}
+    for username, day, amount in rows:
+        if amount is None:
+            merged.pop((username, day), None)  # earlier increments are wiped by the reset anyway
+            cursor.execute(RESET_WATER, (username, day))
+        else:
+            merged[(username, day)] = merged.get((username, day), 0) + amount
+    if merged:
+        add_water_many(cursor, [(u, d, a) for (u, d), a in merged.items()])
+
+
+def _apply_check_ins(cursor, rows):
+    for row in rows:
+        record_check_in(cursor, *row)
+
+
+def _apply_workout_prefs(cursor, rows):
+    cursor.executemany(SAVE_WORKOUT_PREFS, rows)
+
+
+# kind -> apply(cursor, list of params), each run in its own transaction
+KINDS = {
+    "food_log": apply_food_logs,     # food_logs + daily_nutrition_totals
+    "water": _apply_water,           # water_history
+    "check_in": _apply_check_ins,    # compliance_data (+ compliance_history)
+    "workout_prefs": _apply_workout_prefs,  # profiles.workout_*
+}
+
+
+def _transient(error):
+    """True for errors worth retrying as they are (connection, pool, lock); False for bad entries."""
+    if isinstance(error, (PoolTimeout, OSError, mysql.connector.errors.OperationalError,
+                          mysql.connector.errors.InterfaceError)):
+        return True
+    return getattr(error, "errno", None) in TRANSIENT_ERRNOS
+
+
+class Journal:
+    """Append-only JSON-lines log of queued entries and acks, plus a dead-letter file beside it."""
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.dead_path = path + ".dead"
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _write(self, records):
+        with self._lock:
+            self._file.write("".join(json.dumps(r, default=str) + "\n" for r in records))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def append(self, entries):
+        self._write([_record(entry) for entry in entries])
+
+    def ack(self, seqs):
+        self._write([{"ack": list(seqs)}])
+
+    def dead_letter(self, entries, errors, attempts):
+        """Record entries given up on (with their last error) in the dead-letter file, then ack them."""
+        at = datetime.now().isoformat(timespec="seconds")
+        with self._lock, open(self.dead_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(dict(_record(e), error=errors.get(e[0]), attempts=attempts.get(e[0]),
+                                            at=at), default=str) + "\n" for e in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        self.ack(e[0] for e in entries)
+
+    def replay(self):
+        """Entries with no ack, in submission order. A torn last line (crash mid-write) is skipped."""
+        entries, acked = {}, set()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if "ack" in record:
+                    acked.update(record["ack"])
+                else:
+                    # Entries journaled before ids existed get one now; they can't be deduplicated
+                    entries[record["seq"]] = (record["seq"], record["kind"], record["user"],
+                                              tuple(record["params"]), record.get("id") or uuid.uuid4().hex)
+        return [entries[seq] for seq in sorted(entries) if seq not in acked]
+
+    def compact(self, pending):
+        """Rewrite the file with only `pending` entries (atomic rename)."""
+        with self._lock:
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(_record(e), default=str) + "\n" for e in pending))
+                f.flush()
+                os.fsync(f.fileno())
+            self._file.close()
+            os.replace(tmp, self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def _record(entry):
+    seq, kind, user, params, entry_id = entry
+    return {"seq": seq, "id": entry_id, "kind": kind, "user": user, "params": params}
+
+
+class WriteBehindQueue:
+    """
+    Journaled queue drained by one worker thread. `connection` is a context
+    manager factory yielding a DB connection (the pool's connection()).
+    Entries are (seq, kind, username, params, id) tuples.
+    """
+
+    def __init__(self, connection, journal, batch_size=200, interval=0.5, max_backoff=30.0, on_flush=None,
+                 max_attempts=5):
+        self.connection = connection
+        self.journal = journal
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.on_flush = on_flush
+        self.max_attempts = max_attempts
+        self._queue = []
+        self._inflight = []
+        self._attempts = {}  # seq -> failed tries on its own (data errors only)
+        self._errors = {}    # seq -> last error message
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._seq = 0
+        self.flushed = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self.duplicates = 0
+        self._replay()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def _replay(self):
+        entries = self.journal.replay()
+        # Start from a file of unacked entries only, so old acks can never match new sequence numbers
+        self.journal.compact(entries)
+        if entries:
+            log.warning("Replaying %d unflushed write(s) from %s", len(entries), self.journal.path)
+            self._queue.extend(entries)
+            self._seq = entries[-1][0]
+
+    # --- producer side (script thread) ---
+    def submit(self, kind, username, params):
+        self.submit_many(kind, username, [params])
+
+    def submit_many(self, kind, username, params_list):
+        """Queue entries; returns once they are journaled."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown write kind {kind!r}")
+        with self._cond:
+            entries = []
+            for params in params_list:
+                self._seq += 1
+                entries.append((self._seq, kind, username, tuple(params), uuid.uuid4().hex))
+            self.journal.append(entries)
+            was_empty = not self._queue
+            self._queue.extend(entries)
+            if was_empty or len(self._queue) >= self.batch_size:
+                self._cond.notify()
+
+    def pending(self, username, kind):
+        """Params of the user's not-yet-committed entries of `kind`, oldest first."""
+        with self._cond:
+            return [e[3] for e in self._inflight + self._queue if e[2] == username and e[1] == kind]
+
+    def stats(self):
+        with self._cond:
+            return {"queued": len(self._queue), "inflight": len(self._inflight),
+                    "flushed": self.flushed, "failures": self.failures,
+                    "dead_lettered": self.dead_lettered, "duplicates": self.duplicates}
+
+    def stop(self, timeout=10.0):
+        """Flush what is queued and stop the worker (registered with atexit)."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        self.journal.close()
+
+    # --- worker thread ---
+    def _run(self):
+        attempt = 0
+        while True:
+            with self._cond:
+                while not self._stopping and not self._queue:
+                    self._cond.wait()
+                # Give the batch up to `interval` to fill after its first entry arrives
+                deadline = time.monotonic() + self.interval
+                while not self._stopping and len(self._queue) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._queue:
+                    return
+                self._inflight, self._queue = self._queue[:self.batch_size], self._queue[self.batch_size:]
+                batch = self._inflight
+
+            failed = self._flush(batch)
+            dead = [e for e in failed if self._attempts.get(e[0], 0) >= self.max_attempts]
+            if dead:
+                log.error("Dead-lettering %d write(s) to %s", len(dead), self.journal.dead_path)
+                self.journal.dead_letter(dead, self._errors, self._attempts)
+                self._forget(dead)
+                self.dead_lettered += len(dead)
+                failed = [e for e in failed if e not in dead]
+            compacted = False
+            with self._cond:
+                # Failed entries go back to the front so per-user order is kept
+                self._queue = failed + self._queue
+                self._inflight = []
+                # Compact under the lock so no submit can append between the check and the rewrite
+                if not self._queue and os.path.getsize(self.journal.path) > COMPACT_BYTES:
+                    self.journal.compact([])
+                    compacted = True
+            if compacted:
+                self._prune_applied()
+            if failed:
+                attempt += 1
+                self.failures += 1
+                if self._stopping and attempt > 3:
+                    log.error("Giving up on %d write(s); they stay in %s", len(failed), self.journal.path)
+                    return
+                time.sleep(min(self.max_backoff, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0))
+            else:
+                attempt = 0
+
+    def _flush(self, batch):
+        """Apply `batch` one kind at a time; returns the entries that could not be committed."""
+        failed = []
+        for kind in KINDS:
+            group = [e for e in batch if e[1] == kind]
+            if group:
+                failed.extend(self._flush_group(kind, group)[0])
+        failed.sort()
+        return failed
+
+    def _flush_group(self, kind, group):
+        """
+        Commit `group` in one transaction. On a data error, split it in halves
+        until the bad entries are alone. Returns (failed entries, transient).
+        """
+        try:
+            self._commit(kind, group)
+        except Exception as e:
+            error = e
+        else:
+            self.journal.ack(e[0] for e in group)
+            self._forget(group)
+            self.flushed += len(group)
+            if self.on_flush:
+                for username in {e[2] for e in group}:
+                    self.on_flush(username)
+            return [], False
+        if _transient(error):
+            log.warning("Write-behind flush of %d %s entr(ies) failed: %s", len(group), kind, error)
+            return group, True
+        if len(group) == 1:
+            seq = group[0][0]
+            self._attempts[seq] = self._attempts.get(seq, 0) + 1
+            self._errors[seq] = f"{type(error).__name__}: {error}"
+            log.error("Write-behind %s entry %d failed (attempt %d): %s", kind, seq, self._attempts[seq], error)
+            return group, False
+        mid = len(group) // 2
+        failed, transient = self._flush_group(kind, group[:mid])
+        if transient:
+            return failed + group[mid:], True
+        rest, transient = self._flush_group(kind, group[mid:])
+        return failed + rest, transient
+
+    def _commit(self, kind, group):
+        """Apply the group's entries not yet in write_behind_applied and record their ids, atomically."""
+        with self.connection() as conn:
+            c = conn.cursor(buffered=True)
+            ids = [e[4] for e in group]
+            c.execute(ALREADY_APPLIED.format(ids=", ".join(["%s"] * len(ids))), ids)
+            applied = {row[0] for row in c.fetchall()}
+            todo = [e for e in group if e[4] not in applied]
+            self.duplicates += len(group) - len(todo)
+            if todo:
+                c.executemany(MARK_APPLIED, [(e[4],) for e in todo])
+                KINDS[kind](c, [e[3] for e in todo])
+            conn.commit()
+
+    def _forget(self, entries):
+        for e in entries:
+            self._attempts.pop(e[0], None)
+            self._errors.pop(e[0], None)
+
+    def _prune_applied(self):
+        try:
+            with self.connection() as conn:
+                conn.cursor().execute(PRUNE_APPLIED, (APPLIED_TTL_DAYS,))
+                conn.commit()
+        except Exception:
+            log.exception("Pruning write_behind_applied failed")
+
+
+@st.cache_resource(show_spinner=False)
+def get_write_behind():
+    """The process's queue, or None unless the WRITE_BEHIND secret is enabled."""
+    if not st.secrets.get("WRITE_BEHIND", False):
+        return None
+    journal = Journal(st.secrets.get("WRITE_BEHIND_JOURNAL", ".write_behind/journal.log"),
+                      fsync=bool(st.secrets.get("WRITE_BEHIND_FSYNC", False)))
+    queue = WriteBehindQueue(get_pool().connection, journal,
+                             batch_size=int(st.secrets.get("WRITE_BEHIND_BATCH", 200)),
+                             interval=float(st.secrets.get("WRITE_BEHIND_INTERVAL_MS", 500)) / 1000,
+                             on_flush=get_cache().bump,
+                             max_attempts=int(st.secrets.get("WRITE_BEHIND_MAX_ATTEMPTS", 5)))
+    atexit.register(queue.stop)
+    return queue